@@ -77,7 +77,281 @@ const getTranscript = async (ticker, year, quarter) => {
 };
 
 
-const runSentimentAnalysis = (data) => {
+// Number of warm corporate.py workers kept alive (0 disables the pool and spawns per request)
+const SENTIMENT_POOL_SIZE = parseInt(process.env.SENTIMENT_WORKERS || '2', 10);
+const SENTIMENT_REQUEST_TIMEOUT = parseInt(process.env.SENTIMENT_TIMEOUT_MS || '300000', 10);
+// Workers that die before becoming ready are respawned with exponential backoff;
+// after this many consecutive failures queued requests are rejected
+const SENTIMENT_WORKER_MAX_RESTARTS = parseInt(process.env.SENTIMENT_WORKER_MAX_RESTARTS || '5', 10);
+const SENTIMENT_RESPAWN_BASE_MS = 1000;
+const SENTIMENT_RESPAWN_MAX_MS = 30000;
+
+// Pool of long-running `corporate.py --worker` processes speaking newline-delimited JSON.
+// Each worker loads FinBERT once and then serves one request at a time.
+class SentimentWorkerPool {
+  constructor(size) {
+    this.size = Math.max(1, size);
+    this.workers = [];
+    this.queue = [];
+    this.nextRequestId = 1;
+    this.closed = false;
+    this.failed = false;
+    this.consecutiveFailures = 0;
+    // Live sessions live inside one worker process, so their requests stick to it
+    this.sessionWorkers = new Map();
+
+    for (let i = 0; i < this.size; i++) {
+      this.spawnWorker();
+    }
+  }
+
+  spawnWorker() {
+    const pythonCommand = process.platform === 'win32' ? 'python' : 'python3';
+    const scriptPath = path.join(__dirname, 'corporate.py');
+
+    const child = spawn(pythonCommand, [scriptPath, '--worker'], {
+      cwd: process.cwd(),
+      stdio: ['pipe', 'pipe', 'pipe'],
+      env: {
+        ...process.env,
+        HUGGINGFACE_TOKEN: process.env.HUGGINGFACE_TOKEN,
+        PYTHONPATH: process.cwd()
+      }
+    });
+
+    const worker = { process: child, ready: false, current: null, buffer: '' };
+    this.workers.push(worker);
+
+    child.stdout.on('data', (chunk) => {
+      worker.buffer += chunk.toString();
+      let newlineIndex;
+      while ((newlineIndex = worker.buffer.indexOf('\n')) !== -1) {
+        const line = worker.buffer.slice(0, newlineIndex).trim();
+        worker.buffer = worker.buffer.slice(newlineIndex + 1);
+        if (line) {
+          this.handleLine(worker, line);
+        }
+      }
+    });
+
+    child.stderr.on('data', (data) => {
+      const errorMsg = data.toString();
+      // Only log actual errors, not info messages
+      if (!errorMsg.includes('successful') && !errorMsg.includes('ready')) {
+        console.error(`Sentiment worker ${child.pid} stderr:`, errorMsg.trim());
+      }
+    });
+
+    child.on('error', (err) => {
+      console.error('Failed to start sentiment worker:', err);
+    });
+
+    child.on('exit', (code, signal) => {
+      this.workers = this.workers.filter(w => w !== worker);
+      for (const [sessionId, sessionWorker] of this.sessionWorkers) {
+        if (sessionWorker === worker) {
+          this.sessionWorkers.delete(sessionId);
+        }
+      }
+
+      if (worker.current) {
+        clearTimeout(worker.current.timer);
+        worker.current.reject(new Error(`Sentiment worker exited (code ${code}, signal ${signal}) while processing request`));
+        worker.current = null;
+      }
+
+      if (this.closed) {
+        return;
+      }
+
+      // A worker that never became ready is crash-looping (e.g. a failing import)
+      this.consecutiveFailures = worker.ready ? 0 : this.consecutiveFailures + 1;
+      if (this.consecutiveFailures >= SENTIMENT_WORKER_MAX_RESTARTS) {
+        if (this.workers.length === 0) {
+          this.fail(new Error(`Sentiment workers failed to start ${this.consecutiveFailures} times in a row (last exit code ${code})`));
+        }
+        return;
+      }
+
+      const delay = Math.min(SENTIMENT_RESPAWN_BASE_MS * 2 ** this.consecutiveFailures, SENTIMENT_RESPAWN_MAX_MS);
+      console.warn(`Sentiment worker ${child.pid} exited (code ${code}), respawning in ${delay}ms...`);
+      setTimeout(() => {
+        if (!this.closed) {
+          this.spawnWorker();
+        }
+      }, delay);
+    });
+  }
+
+  // Give up after repeated startup failures: reject everything queued and refuse new work
+  fail(error) {
+    console.error(error.message);
+    this.failed = true;
+    for (const job of this.queue) {
+      clearTimeout(job.timer);
+      job.reject(error);
+    }
+    this.queue = [];
+    this.failure = error;
+  }
+
+  handleLine(worker, line) {
+    let message;
+    try {
+      message = JSON.parse(line);
+    } catch (parseError) {
+      console.error('Unparseable sentiment worker output:', line.substring(0, 500));
+      return;
+    }
+
+    if (message.event === 'ready') {
+      worker.ready = true;
+      this.consecutiveFailures = 0;
+      if (message.error) {
+        console.error(`Sentiment worker ${worker.process.pid} started without a model:`, message.error);
+      } else {
+        console.log(`Sentiment worker ${worker.process.pid} ready`);
+      }
+      this.drain();
+      return;
+    }
+
+    const current = worker.current;
+    if (!current || message.id !== current.id) {
+      console.warn('Sentiment worker response with unknown id:', message.id);
+      return;
+    }
+
+    // Streaming requests emit per-chunk events before the final result
+    if (message.event) {
+      if (current.onEvent) {
+        current.onEvent(message);
+      }
+      return;
+    }
+
+    clearTimeout(current.timer);
+    worker.current = null;
+    const action = current.data.action;
+    if (action === 'live_open' && message.result && message.result.session_id) {
+      this.sessionWorkers.set(message.result.session_id, worker);
+    } else if (action === 'live_close') {
+      this.sessionWorkers.delete(current.data.session_id);
+    }
+    current.resolve(message.result);
+    this.drain();
+  }
+
+  drain() {
+    for (let i = 0; i < this.queue.length;) {
+      const job = this.queue[i];
+      const isSessionJob = job.data.action === 'live_append' || job.data.action === 'live_close';
+      const pinned = isSessionJob ? this.sessionWorkers.get(job.data.session_id) : null;
+
+      if (isSessionJob && !pinned) {
+        this.queue.splice(i, 1);
+        clearTimeout(job.timer);
+        job.resolve({ error: `Unknown live session: ${job.data.session_id}`, type: 'live_session_error' });
+        continue;
+      }
+
+      const worker = pinned
+        ? (pinned.ready && !pinned.current ? pinned : null)
+        : this.workers.find(w => w.ready && !w.current);
+      if (!worker) {
+        i++;
+        continue;
+      }
+
+      this.queue.splice(i, 1);
+      this.dispatch(worker, job);
+    }
+  }
+
+  dispatch(worker, job) {
+    job.worker = worker;
+    worker.current = job;
+    worker.process.stdin.write(JSON.stringify({ ...job.data, id: job.id }) + '\n');
+  }
+
+  // The timeout covers queueing as well as processing, so callers never wait on a pool with no live workers
+  timeoutJob(job) {
+    const error = new Error(`Sentiment analysis timed out after ${SENTIMENT_REQUEST_TIMEOUT}ms`);
+    const queued = this.queue.indexOf(job);
+    if (queued !== -1) {
+      console.error(`Sentiment request ${job.id} timed out waiting for a worker`);
+      this.queue.splice(queued, 1);
+      job.reject(error);
+      return;
+    }
+    const worker = job.worker;
+    if (worker && worker.current === job) {
+      console.error(`Sentiment request ${job.id} timed out, restarting worker ${worker.process.pid}`);
+      worker.current = null;
+      job.reject(error);
+      worker.process.kill();
+    }
+  }
+
+  run(data, onEvent = null) {
+    if (this.failed) {
+      return Promise.reject(this.failure);
+    }
+    return new Promise((resolve, reject) => {
+      const job = { id: String(this.nextRequestId++), data, onEvent, resolve, reject, worker: null };
+      job.timer = setTimeout(() => this.timeoutJob(job), SENTIMENT_REQUEST_TIMEOUT);
+      this.queue.push(job);
+      this.drain();
+    });
+  }
+
+  shutdown() {
+    this.closed = true;
+    for (const job of this.queue) {
+      clearTimeout(job.timer);
+      job.reject(new Error('Sentiment worker pool shut down'));
+    }
+    this.queue = [];
+    for (const worker of this.workers) {
+      worker.process.stdin.end();
+      worker.process.kill();
+    }
+  }
+}
+
+let sentimentWorkerPool = null;
+
+const getSentimentWorkerPool = () => {
+  // A pool that gave up after repeated startup failures is replaced on the next request
+  if (sentimentWorkerPool && sentimentWorkerPool.failed) {
+    sentimentWorkerPool.shutdown();
+    sentimentWorkerPool = null;
+  }
+  if (!sentimentWorkerPool) {
+    console.log(`Starting sentiment worker pool with ${SENTIMENT_POOL_SIZE} worker(s)`);
+    sentimentWorkerPool = new SentimentWorkerPool(SENTIMENT_POOL_SIZE);
+  }
+  return sentimentWorkerPool;
+};
+
+const shutdownSentimentWorkers = () => {
+  if (sentimentWorkerPool) {
+    sentimentWorkerPool.shutdown();
+    sentimentWorkerPool = null;
+  }
+};
+
+// onEvent, when given, receives each {event: 'chunk', sentiment} line of a streaming
+// (options.stream) request; the promise still resolves with the final summary result.
+const runSentimentAnalysis = (data, onEvent = null) => {
+  if (SENTIMENT_POOL_SIZE > 0) {
+    return getSentimentWorkerPool().run(data, onEvent);
+  }
+  return runSentimentAnalysisProcess(data, onEvent);
+};
+
+// One-shot execution: spawns a fresh corporate.py per request (used when the pool is disabled)
+const runSentimentAnalysisProcess = (data, onEvent = null) => {
   return new Promise((resolve, reject) => {
     const pythonCommand = process.platform === 'win32' ? 'python' : 'python3';
     const scriptPath = path.join(__dirname, 'corporate.py');
@@ -113,9 +387,35 @@ const runSentimentAnalysis = (data) => {
       
       let result = '';
       let error = '';
+      let streamBuffer = '';
+      let streamSummary = null;
+      const streaming = Boolean(data.options && data.options.stream);
       
       pythonProcess.stdout.on('data', (data) => {
-        result += data.toString();
+        if (!streaming) {
+          result += data.toString();
+          return;
+        }
+        // NDJSON: forward chunk events as they arrive, keep the summary for resolve
+        streamBuffer += data.toString();
+        let newlineIndex;
+        while ((newlineIndex = streamBuffer.indexOf('\n')) !== -1) {
+          const line = streamBuffer.slice(0, newlineIndex).trim();
+          streamBuffer = streamBuffer.slice(newlineIndex + 1);
+          if (!line) {
+            continue;
+          }
+          try {
+            const message = JSON.parse(line);
+            if (message.event === 'summary') {
+              streamSummary = message.result;
+            } else if (onEvent) {
+              onEvent(message);
+            }
+          } catch (parseError) {
+            console.error('Unparseable streaming output:', line.substring(0, 500));
+          }
+        }
       });
 
       pythonProcess.stderr.on('data', (data) => {
@@ -143,6 +443,15 @@ const runSentimentAnalysis = (data) => {
           return;
         }
         
+        if (streaming) {
+          if (streamSummary) {
+            resolve(streamSummary);
+          } else {
+            reject(new Error('Streaming sentiment analysis ended without a summary'));
+          }
+          return;
+        }
+        
         try {
           const parsedResult = JSON.parse(result);
           resolve(parsedResult);
@@ -415,6 +724,16 @@ const handleTextAnalysis = async (req, res) => {
       options: options
     };
 
+    if (options.stream) {
+      // NDJSON response: one line per scored chunk, then a final summary line
+      res.setHeader('Content-Type', 'application/x-ndjson');
+      const summary = await runSentimentAnalysis(analysisData, (message) => {
+        res.write(JSON.stringify({ event: message.event, sentiment: message.sentiment }) + '\n');
+      });
+      res.write(JSON.stringify({ event: 'summary', result: summary }) + '\n');
+      return res.end();
+    }
+
     const analysis = await runSentimentAnalysis(analysisData);
 
     if (analysis.error) {
@@ -431,6 +750,10 @@ const handleTextAnalysis = async (req, res) => {
 
   } catch (error) {
     console.error('Text analysis error:', error);
+    if (res.headersSent) {
+      res.write(JSON.stringify({ event: 'summary', result: { error: error.message } }) + '\n');
+      return res.end();
+    }
     res.status(500).json({ 
       error: 'Text analysis failed', 
       details: error.message 
@@ -441,7 +764,7 @@ const handleTextAnalysis = async (req, res) => {
 // Bulk Analysis Handler
 const handleBulkAnalysis = async (req, res) => {
   try {
-    const { tickers, year, quarter, maxConcurrent = 2 } = req.body; // Reduced concurrent requests
+    const { tickers, year, quarter, maxConcurrent = 2, options = {} } = req.body; // Reduced concurrent requests
     
     if (!tickers || !Array.isArray(tickers) || tickers.length === 0) {
       return res.status(400).json({ error: 'No tickers provided' });
@@ -455,13 +778,14 @@ const handleBulkAnalysis = async (req, res) => {
 
     const results = [];
     const errors = [];
+    const items = [];
     
-    // Process tickers sequentially to avoid rate limiting
+    // Fetch transcripts sequentially to avoid rate limiting
     for (let i = 0; i < tickers.length; i++) {
       const ticker = tickers[i];
       
       try {
-        console.log(`Processing ${ticker} (${i + 1}/${tickers.length})...`);
+        console.log(`Fetching ${ticker} (${i + 1}/${tickers.length})...`);
         
         // Add delay between requests to avoid rate limiting
         if (i > 0) {
@@ -469,98 +793,83 @@ const handleBulkAnalysis = async (req, res) => {
           await new Promise(resolve => setTimeout(resolve, 1000));
         }
         
-        const transcript = await getTranscript(ticker, year, quarter);
+        let transcript = await getTranscript(ticker, year, quarter);
+        let isMock = false;
         
         if (!transcript) {
           console.log(`No transcript found for ${ticker}, using mock data for testing`);
           // Use mock data for testing when transcript is not available
-          const mockTranscript = `This is a mock earnings call transcript for ${ticker} for Q${quarter} ${year}. The company reported strong quarterly results with positive outlook for the future. Revenue growth exceeded expectations and the management team expressed confidence in their strategic initiatives. The CEO highlighted key achievements including market expansion, product innovation, and customer satisfaction improvements. Financial performance showed robust growth across all major segments.`;
-          
-          const analysisData = {
-            action: 'historical',
-            transcript: mockTranscript,
-            ticker: ticker,
-            year: parseInt(year),
-            quarter: parseInt(quarter)
-          };
-
-          const analysis = await runSentimentAnalysis(analysisData);
-          
-          if (analysis.error) {
-            console.error(`Analysis error for ${ticker}:`, analysis.error);
-            errors.push({ ticker, error: analysis.error });
-            continue;
-          }
+          transcript = `This is a mock earnings call transcript for ${ticker} for Q${quarter} ${year}. The company reported strong quarterly results with positive outlook for the future. Revenue growth exceeded expectations and the management team expressed confidence in their strategic initiatives. The CEO highlighted key achievements including market expansion, product innovation, and customer satisfaction improvements. Financial performance showed robust growth across all major segments.`;
+          isMock = true;
+        }
+        
+        items.push({ ticker, year: parseInt(year), quarter: parseInt(quarter), transcript, isMock });
+        
+      } catch (error) {
+        console.error(`Error fetching ${ticker}:`, error);
+        errors.push({ ticker, error: error.message });
+      }
+    }
+    
+    // Analyze every transcript in one batch_historical request: one model, shared batches
+    if (items.length > 0) {
+      let analyses = null;
+      try {
+        const batch = await runSentimentAnalysis({
+          action: 'batch_historical',
+          options, // e.g. { cascade: true } for lexicon-first scoring on large backfills
+          items: items.map(({ ticker, year, quarter, transcript }) => ({ ticker, year, quarter, transcript }))
+        });
+        if (batch.error || !Array.isArray(batch.results)) {
+          console.error('Batch analysis error:', batch.error || 'missing results');
+        } else {
+          analyses = batch.results;
+        }
+      } catch (error) {
+        console.error('Batch analysis failed:', error.message);
+      }
 
-          // Ensure the data structure matches frontend expectations
-          const result = {
-            ticker,
-            year: parseInt(year),
-            quarter: parseInt(quarter),
-            success: true,
-            overall_sentiment: analysis.overall_sentiment || 0.0,
-            summary: analysis.summary || {},
-            sentiments: analysis.sentiments || [],
-            transcript: analysis.transcript || mockTranscript
-          };
-
-          // Ensure summary has the required fields
-          if (result.summary && typeof result.summary === 'object') {
-            if (!result.summary.positive_ratio && result.summary.sentiment_ratios) {
-              result.summary.positive_ratio = result.summary.sentiment_ratios.positive_ratio || 0;
-            }
-            if (!result.summary.negative_ratio && result.summary.sentiment_ratios) {
-              result.summary.negative_ratio = result.summary.sentiment_ratios.negative_ratio || 0;
-            }
-            if (!result.summary.neutral_ratio && result.summary.sentiment_ratios) {
-              result.summary.neutral_ratio = result.summary.sentiment_ratios.neutral_ratio || 0;
-            }
-            
-            // Ensure key_points exists
-            if (!result.summary.key_points) {
-              result.summary.key_points = [
-                `Strong quarterly performance for ${ticker}`,
-                `Revenue growth exceeded expectations`,
-                `Positive outlook for future quarters`,
-                `Market expansion and product innovation`,
-                `Customer satisfaction improvements`
-              ];
-            }
+      // A batch-level failure must not fail every ticker: retry each one on its own
+      if (!analyses) {
+        console.log(`Retrying ${items.length} ticker(s) individually`);
+        analyses = [];
+        for (const item of items) {
+          try {
+            analyses.push(await runSentimentAnalysis({
+              action: 'historical',
+              transcript: item.transcript,
+              ticker: item.ticker,
+              year: item.year,
+              quarter: item.quarter,
+              options
+            }));
+          } catch (error) {
+            analyses.push({ error: error.message });
           }
-
-          console.log(`Successfully processed ${ticker} with mock data`);
-          results.push(result);
-          continue;
         }
+      }
 
-        const analysisData = {
-          action: 'historical',
-          transcript: transcript,
-          ticker: ticker,
-          year: parseInt(year),
-          quarter: parseInt(quarter)
-        };
-
-        const analysis = await runSentimentAnalysis(analysisData);
+      items.forEach((item, index) => {
+        const analysis = analyses[index] || { error: 'Missing analysis result' };
         
         if (analysis.error) {
-          console.error(`Analysis error for ${ticker}:`, analysis.error);
-          errors.push({ ticker, error: analysis.error });
-          continue;
+          console.error(`Analysis error for ${item.ticker}:`, analysis.error);
+          errors.push({ ticker: item.ticker, error: analysis.error });
+          return;
         }
-
+        
         // Ensure the data structure matches frontend expectations
         const result = {
-          ticker,
-          year: parseInt(year),
-          quarter: parseInt(quarter),
+          ticker: item.ticker,
+          year: item.year,
+          quarter: item.quarter,
           success: true,
           overall_sentiment: analysis.overall_sentiment || 0.0,
           summary: analysis.summary || {},
           sentiments: analysis.sentiments || [],
-          transcript: analysis.transcript || transcript
+          transcript: analysis.transcript || item.transcript
         };
-
+        
         // Ensure summary has the required fields
         if (result.summary && typeof result.summary === 'object') {
           if (!result.summary.positive_ratio && result.summary.sentiment_ratios) {
@@ -575,17 +884,19 @@ const handleBulkAnalysis = async (req, res) => {
           
           // Ensure key_points exists
           if (!result.summary.key_points) {
-            result.summary.key_points = [];
+            result.summary.key_points = item.isMock ? [
+              `Strong quarterly performance for ${item.ticker}`,
+              `Revenue growth exceeded expectations`,
+              `Positive outlook for future quarters`,
+              `Market expansion and product innovation`,
+              `Customer satisfaction improvements`
+            ] : [];
           }
         }
-
-        console.log(`Successfully processed ${ticker}`);
+        
+        console.log(`Successfully processed ${item.ticker}${item.isMock ? ' with mock data' : ''}`);
         results.push(result);
-
-      } catch (error) {
-        console.error(`Error processing ${ticker}:`, error);
-        errors.push({ ticker, error: error.message });
-      }
+      });
     }
 
     console.log(`Bulk analysis completed. Results: ${results.length}, Errors: ${errors.length}`);
@@ -621,6 +932,17 @@ const handleLiveRecording = (ws, req) => {
   let audioChunks = [];
   let currentCompany = '';
   let currentTicker = '';
+  // Incremental sentiment session for transcript text streamed during the call (pool mode only)
+  let liveSessionId = null;
+
+  const closeLiveSession = async () => {
+    if (!liveSessionId) {
+      return null;
+    }
+    const sessionId = liveSessionId;
+    liveSessionId = null;
+    return runSentimentAnalysis({ action: 'live_close', session_id: sessionId });
+  };
 
   ws.on('message', async (message) => {
     try {
@@ -633,14 +955,49 @@ const handleLiveRecording = (ws, req) => {
           currentCompany = data.company || '';
           currentTicker = data.ticker || '';
           
+          if (SENTIMENT_POOL_SIZE > 0) {
+            await closeLiveSession().catch(() => null);
+            const session = await runSentimentAnalysis({
+              action: 'live_open',
+              company: currentCompany,
+              ticker: currentTicker,
+              options: data.options || {}
+            });
+            liveSessionId = session.session_id || null;
+          }
+          
           ws.send(JSON.stringify({
             type: 'recording_started',
             company: currentCompany,
             ticker: currentTicker,
+            liveSessionId,
             timestamp: new Date().toISOString()
           }));
           break;
 
+        case 'transcript_segment':
+          // Partial transcript text: re-score only the trailing chunks and report the running sentiment
+          if (!liveSessionId) {
+            ws.send(JSON.stringify({
+              type: 'error',
+              error: 'No live sentiment session (start_recording first; requires SENTIMENT_WORKERS > 0)'
+            }));
+            break;
+          }
+          if (data.text && data.text.trim()) {
+            const update = await runSentimentAnalysis({
+              action: 'live_append',
+              session_id: liveSessionId,
+              text: data.text
+            });
+            ws.send(JSON.stringify({
+              type: update.error ? 'error' : 'live_update',
+              ...(update.error ? { error: update.error } : { data: update }),
+              timestamp: new Date().toISOString()
+            }));
+          }
+          break;
+
         case 'audio_chunk':
           if (isRecording && data.audio) {
             try {
@@ -662,6 +1019,13 @@ const handleLiveRecording = (ws, req) => {
           break;
 
         case 'stop_recording':
+          if (liveSessionId) {
+            const liveResult = await closeLiveSession();
+            if (liveResult && !liveResult.error) {
+              ws.send(JSON.stringify({ type: 'live_session_closed', data: liveResult }));
+            }
+          }
+          
           if (isRecording && audioChunks.length > 0) {
             isRecording = false;
             
@@ -776,6 +1140,7 @@ const handleLiveRecording = (ws, req) => {
     console.log('Live recording WebSocket disconnected');
     isRecording = false;
     audioChunks = [];
+    closeLiveSession().catch(error => console.warn('Failed to close live sentiment session:', error.message));
   });
 
   ws.on('error', (error) => {
@@ -969,5 +1334,6 @@ module.exports = {
   handleTest,
   handleAudioDebug,
   upload,
-  cleanupTempFiles
+  cleanupTempFiles,
+  shutdownSentimentWorkers
 };
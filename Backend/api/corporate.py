@@ -3,88 +3,494 @@ import json
 import re
 import os
 import math
-from typing import Dict, List, Any, Optional, Tuple
+import time
+import hashlib
+import inspect
+import sqlite3
+import threading
+import copy
+import heapq
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Any, Optional, Tuple, Iterator
 import warnings
 warnings.filterwarnings("ignore")
 
+_import_start = time.perf_counter()
+
 try:
-    from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
     import numpy as np
-    from huggingface_hub import login
-    import torch
-    from scipy.special import softmax
 except ImportError as e:
     print(f"Missing required library: {e}", file=sys.stderr)
-    print("Please install: pip install transformers torch numpy huggingface_hub scipy", file=sys.stderr)
+    print("Please install: pip install transformers torch numpy huggingface_hub", file=sys.stderr)
     sys.exit(1)
 
-try:
-    huggingface_token = os.getenv("HUGGINGFACE_TOKEN")
-    if huggingface_token:
-        login(token=huggingface_token)
-        print("HuggingFace authentication successful", file=sys.stderr)
-    else:
-        print("Warning: HUGGINGFACE_TOKEN not found in environment variables", file=sys.stderr)
-except Exception as e:
-    print(f"HuggingFace authentication failed: {e}", file=sys.stderr)
+# Number of chunks sent through FinBERT per forward pass (override with options.batch_size)
+DEFAULT_BATCH_SIZE = int(os.getenv("FINBERT_BATCH_SIZE", "16"))
 
-try:
-    MODEL_NAME = "ProsusAI/finbert"
-    finbert_tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-    finbert_model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME)
-    
-    sentiment_pipeline = pipeline(
-        "sentiment-analysis", 
-        model=finbert_model, 
-        tokenizer=finbert_tokenizer,
-        return_all_scores=True,
-        truncation=True,
-        padding=True,
-        max_length=512,
-        device=-1  
-    )
-    print("FinBERT initialized successfully (CPU mode)", file=sys.stderr)
-except Exception as e:
-    print(f"FinBERT initialization failed: {e}", file=sys.stderr)
-    print("Error: FinBERT is required for this script to function", file=sys.stderr)
-    sys.exit(1)
+# Score text chunks by calling the model directly instead of through the transformers
+# pipeline (pre-tokenized chunks always take the direct path)
+DIRECT_INFERENCE = os.getenv("FINBERT_DIRECT_INFERENCE", "on").lower() not in ("0", "off", "false", "no")
+
+MODEL_NAME = "ProsusAI/finbert"
+
+# Local snapshot directory (e.g. from `huggingface-cli download ProsusAI/finbert --local-dir ...`).
+# When set, or when FINBERT_OFFLINE / HF_HUB_OFFLINE is on, the model loads without touching the network.
+MODEL_DIR = os.getenv("FINBERT_MODEL_DIR", "")
+OFFLINE_MODE = any(
+    os.getenv(var, "").lower() in ("1", "true", "yes", "on")
+    for var in ("FINBERT_OFFLINE", "HF_HUB_OFFLINE", "TRANSFORMERS_OFFLINE")
+)
+
+# The model and the heavy libraries are loaded on first use (see load_finbert),
+# so invalid input is rejected without paying for transformers/torch.
+finbert_tokenizer = None
+finbert_model = None
+sentiment_pipeline = None
+pipeline = None
+_model_lock = threading.RLock()
+
+# Cold-start breakdown in seconds, filled in as each stage runs
+STARTUP_TIMINGS: Dict[str, Optional[float]] = {
+    'module_import': None,
+    'library_import': None,
+    'hub_login': None,
+    'tokenizer_load': None,
+    'model_load': None,
+    'pipeline_init': None,
+    'first_inference': None
+}
+
+def model_source() -> str:
+    """Where FinBERT weights are loaded from: a local snapshot or the hub id"""
+    return MODEL_DIR or MODEL_NAME
+
+def hub_login() -> None:
+    """Authenticate against the HuggingFace hub unless running offline"""
+    if OFFLINE_MODE or MODEL_DIR:
+        return
+    
+    try:
+        huggingface_token = os.getenv("HUGGINGFACE_TOKEN")
+        if huggingface_token:
+            from huggingface_hub import login
+            login(token=huggingface_token)
+            print("HuggingFace authentication successful", file=sys.stderr)
+        else:
+            print("Warning: HUGGINGFACE_TOKEN not found in environment variables", file=sys.stderr)
+    except Exception as e:
+        print(f"HuggingFace authentication failed: {e}", file=sys.stderr)
+
+def load_finbert() -> Any:
+    """
+    Load tokenizer, model and the fp32 pipeline once per process
+    
+    Returns:
+        The fp32 sentiment pipeline
+        
+    Raises:
+        RuntimeError: When the libraries are missing or the model cannot be loaded
+    """
+    global finbert_tokenizer, finbert_model, sentiment_pipeline, pipeline
+    
+    if sentiment_pipeline is not None:
+        return sentiment_pipeline
+    
+    with _model_lock:
+        if sentiment_pipeline is not None:
+            return sentiment_pipeline
+        
+        start = time.perf_counter()
+        try:
+            from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
+            import torch  # noqa: F401  (fail early with a clear message)
+        except ImportError as e:
+            raise RuntimeError(
+                f"Missing required library: {e}. "
+                "Please install: pip install transformers torch numpy huggingface_hub"
+            )
+        STARTUP_TIMINGS['library_import'] = round(time.perf_counter() - start, 4)
+        
+        start = time.perf_counter()
+        hub_login()
+        STARTUP_TIMINGS['hub_login'] = round(time.perf_counter() - start, 4)
+        
+        local_only = OFFLINE_MODE or bool(MODEL_DIR)
+        try:
+            start = time.perf_counter()
+            tokenizer = AutoTokenizer.from_pretrained(model_source(), local_files_only=local_only)
+            STARTUP_TIMINGS['tokenizer_load'] = round(time.perf_counter() - start, 4)
+            
+            start = time.perf_counter()
+            model = AutoModelForSequenceClassification.from_pretrained(model_source(), local_files_only=local_only)
+            model.eval()
+            STARTUP_TIMINGS['model_load'] = round(time.perf_counter() - start, 4)
+            
+            start = time.perf_counter()
+            fp32_pipeline = pipeline(
+                "sentiment-analysis", 
+                model=model, 
+                tokenizer=tokenizer,
+                return_all_scores=True,
+                truncation=True,
+                padding=True,
+                max_length=512,
+                device=-1  
+            )
+            STARTUP_TIMINGS['pipeline_init'] = round(time.perf_counter() - start, 4)
+        except Exception as e:
+            print(f"FinBERT initialization failed: {e}", file=sys.stderr)
+            raise RuntimeError(f"FinBERT initialization failed from {model_source()}: {e}")
+        
+        finbert_tokenizer = tokenizer
+        finbert_model = model
+        sentiment_pipeline = fp32_pipeline
+        print(f"FinBERT initialized successfully (CPU mode, {'offline' if local_only else 'online'})", file=sys.stderr)
+        return sentiment_pipeline
+
+def startup_profile(warmup: bool = True) -> Dict[str, Any]:
+    """Report the cold-start breakdown, loading the model (and running one inference) if needed"""
+    try:
+        if warmup:
+            infer_finbert_chunks(["Warmup sentence for startup profiling."], 1)
+        
+        timings = dict(STARTUP_TIMINGS)
+        measured = [value for value in timings.values() if value is not None]
+        return {
+            'timings_seconds': timings,
+            'total_seconds': round(sum(measured), 4),
+            'model_source': model_source(),
+            'offline_mode': OFFLINE_MODE or bool(MODEL_DIR),
+            'model_loaded': sentiment_pipeline is not None,
+            'loaded_backends': (['pytorch'] if sentiment_pipeline is not None else []) + sorted(_backend_pipelines.keys())
+        }
+    except Exception as e:
+        return {"error": str(e), "type": "startup_profile_error", "timings_seconds": dict(STARTUP_TIMINGS)}
+
+# ========== STAGE TIMINGS ==========
+
+# When set, requests with options.profile also dump a cProfile .pstats file here.
+# Only the operator chooses the directory; requests can merely switch profiling on.
+PROFILE_DIR = os.getenv("FINBERT_PROFILE_DIR", "")
+
+_stage_timer = threading.local()
+
+class StageTimer:
+    """
+    Wall and CPU time per pipeline stage for one profiled request
+    
+    Stages may nest; each is charged its exclusive time (nested stages are
+    subtracted), so the stage totals add up to the request's wall time minus
+    whatever ran outside any stage. CPU time is process-wide
+    (time.process_time): it includes torch's intra-op threads, but also any
+    request running concurrently in the same process, and not the inference
+    pool's worker processes.
+    """
+    
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.counters: Dict[str, int] = {}
+        self.stack: List[List[float]] = []
+        self.started_wall = time.perf_counter()
+        self.started_cpu = time.process_time()
+    
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        # [wall start, cpu start, nested wall, nested cpu]
+        frame = [time.perf_counter(), time.process_time(), 0.0, 0.0]
+        self.stack.append(frame)
+        try:
+            yield
+        finally:
+            self.stack.pop()
+            wall = time.perf_counter() - frame[0]
+            cpu = time.process_time() - frame[1]
+            totals = self.stages.setdefault(name, {'wall': 0.0, 'cpu': 0.0, 'calls': 0})
+            totals['wall'] += wall - frame[2]
+            totals['cpu'] += cpu - frame[3]
+            totals['calls'] += 1
+            if self.stack:
+                self.stack[-1][2] += wall
+                self.stack[-1][3] += cpu
+    
+    def count(self, name: str, value: int) -> None:
+        self.counters[name] = self.counters.get(name, 0) + int(value)
+    
+    def report(self) -> Dict[str, Any]:
+        total_wall = time.perf_counter() - self.started_wall
+        total_cpu = time.process_time() - self.started_cpu
+        attributed = sum(totals['wall'] for totals in self.stages.values())
+        inference_wall = self.stages.get('inference', {}).get('wall', 0.0)
+        tokens = self.counters.get('tokens', 0)
+        inference_tokens = self.counters.get('inference_tokens', 0)
+        
+        return {
+            'total_wall_seconds': round(total_wall, 4),
+            'total_cpu_seconds': round(total_cpu, 4),
+            'stages': {
+                name: {
+                    'wall_seconds': round(totals['wall'], 4),
+                    'cpu_seconds': round(totals['cpu'], 4),
+                    'calls': totals['calls'],
+                    'wall_share': round(totals['wall'] / total_wall, 3) if total_wall > 0 else 0.0
+                }
+                for name, totals in self.stages.items()
+            },
+            'unattributed_wall_seconds': round(max(0.0, total_wall - attributed), 4),
+            'counts': dict(self.counters),
+            'tokens_per_second': round(tokens / total_wall, 1) if tokens and total_wall > 0 else None,
+            'inference_tokens_per_second': (
+                round(inference_tokens / inference_wall, 1) if inference_tokens and inference_wall > 0 else None
+            )
+        }
+
+def timed_stage(name: str) -> Any:
+    """Context manager timing a block as stage `name` when the current request is profiled"""
+    timer = getattr(_stage_timer, 'timer', None)
+    return timer.stage(name) if timer is not None else nullcontext()
+
+def count_stage(name: str, value: int) -> None:
+    """Add to a profiling counter (chunks, tokens, ...) when the current request is profiled"""
+    timer = getattr(_stage_timer, 'timer', None)
+    if timer is not None:
+        timer.count(name, value)
+
+def profiled_call(options: Optional[Dict[str, Any]], label: str, fn: Any, *args: Any
+                  ) -> Tuple[Any, Optional[Dict[str, Any]]]:
+    """
+    Run fn(*args), recording stage timings when options.profile is set
+    
+    When FINBERT_PROFILE_DIR is set the call also runs under cProfile and the
+    stats are written to <dir>/<label>-<timestamp>-<pid>-<n>.pstats (path in
+    profile_path). The request cannot choose the directory.
+    
+    Returns:
+        Tuple: (fn's result, timings dict or None when profiling is off)
+    """
+    options = options or {}
+    if not options.get('profile'):
+        return fn(*args), None
+    
+    timer = StageTimer()
+    previous = getattr(_stage_timer, 'timer', None)
+    _stage_timer.timer = timer
+    
+    profile_dir = PROFILE_DIR
+    profiler = None
+    profile_error = None
+    if profile_dir:
+        import cProfile
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as e:
+            # Only one profiler can be active per process (e.g. a concurrent profiled request)
+            profiler = None
+            profile_error = str(e)
+    
+    try:
+        result = fn(*args)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        _stage_timer.timer = previous
+    
+    timings = timer.report()
+    if profiler is not None:
+        try:
+            os.makedirs(profile_dir, exist_ok=True)
+            path = os.path.join(
+                profile_dir, f"{label}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{id(timer):x}.pstats"
+            )
+            profiler.dump_stats(path)
+            timings['profile_path'] = path
+        except OSError as e:
+            profile_error = str(e)
+    if profile_error:
+        timings['profile_error'] = profile_error
+        print(f"cProfile dump skipped: {profile_error}", file=sys.stderr)
+    
+    return result, timings
+
+# ========== INFERENCE BACKENDS ==========
+
+# pytorch: fp32 (reference), pytorch_int8: dynamic int8-quantized Linear layers,
+# onnx: exported model on ONNX Runtime (requires `pip install optimum[onnxruntime]`)
+INFERENCE_BACKENDS = ('pytorch', 'pytorch_int8', 'onnx')
+DEFAULT_BACKEND = os.getenv("FINBERT_BACKEND", "pytorch").lower()
+ONNX_MODEL_DIR = os.getenv(
+    "FINBERT_ONNX_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "finbert-onnx")
+)
+
+# Fixed sample for backend parity checks; keep stable so drift numbers are comparable over time
+PARITY_SAMPLE = [
+    "Revenue grew 15% year-over-year, exceeding our guidance.",
+    "Operating margins contracted due to higher input costs.",
+    "We maintained our full-year outlook.",
+    "The company reported a net loss and withdrew its dividend.",
+    "Cash flow from operations remained robust at $2.1 billion.",
+    "Demand softened in Europe while North America was stable.",
+    "We are pleased with the strong momentum across all segments.",
+    "Litigation risk and regulatory pressure remain significant concerns.",
+    "Thank you, operator, and good morning everyone.",
+    "Gross margin was 42.3%, down 80 basis points sequentially."
+]
+
+_backend_pipelines: Dict[str, Any] = {}
+_backend_lock = threading.Lock()
+
+def resolve_backend(backend: Optional[str] = None) -> str:
+    """Normalize a backend name, falling back to FINBERT_BACKEND"""
+    name = (backend or DEFAULT_BACKEND or 'pytorch').lower()
+    if name in ('fp32', 'torch'):
+        name = 'pytorch'
+    elif name in ('int8', 'quantized'):
+        name = 'pytorch_int8'
+    elif name in ('onnxruntime', 'ort'):
+        name = 'onnx'
+    if name not in INFERENCE_BACKENDS:
+        raise ValueError(f"Unknown inference backend: {backend}. Expected one of {', '.join(INFERENCE_BACKENDS)}")
+    return name
+
+def _build_backend_model(backend: str) -> Any:
+    """Create the sequence-classification model for a non-default backend"""
+    if backend == 'pytorch_int8':
+        import torch
+        quantized = torch.quantization.quantize_dynamic(
+            copy.deepcopy(finbert_model), {torch.nn.Linear}, dtype=torch.qint8
+        )
+        quantized.eval()
+        return quantized
+    
+    if backend == 'onnx':
+        try:
+            from optimum.onnxruntime import ORTModelForSequenceClassification
+        except ImportError as e:
+            raise RuntimeError(
+                f"ONNX backend unavailable ({e}). Please install: pip install optimum[onnxruntime]"
+            )
+        
+        if os.path.isdir(ONNX_MODEL_DIR) and any(f.endswith('.onnx') for f in os.listdir(ONNX_MODEL_DIR)):
+            return ORTModelForSequenceClassification.from_pretrained(ONNX_MODEL_DIR)
+        
+        print(f"Exporting {model_source()} to ONNX at {ONNX_MODEL_DIR}", file=sys.stderr)
+        ort_model = ORTModelForSequenceClassification.from_pretrained(
+            model_source(), export=True, local_files_only=OFFLINE_MODE or bool(MODEL_DIR)
+        )
+        os.makedirs(ONNX_MODEL_DIR, exist_ok=True)
+        ort_model.save_pretrained(ONNX_MODEL_DIR)
+        return ort_model
+    
+    return finbert_model
+
+def get_sentiment_pipeline(backend: Optional[str] = None) -> Any:
+    """Return the (lazily built) sentiment pipeline for an inference backend"""
+    name = resolve_backend(backend)
+    
+    if name == 'pytorch':
+        return load_finbert()
+    
+    load_finbert()
+    with _backend_lock:
+        if name not in _backend_pipelines:
+            start = time.perf_counter()
+            _backend_pipelines[name] = pipeline(
+                "sentiment-analysis",
+                model=_build_backend_model(name),
+                tokenizer=finbert_tokenizer,
+                return_all_scores=True,
+                truncation=True,
+                padding=True,
+                max_length=512,
+                device=-1
+            )
+            print(f"FinBERT {name} backend ready in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+        return _backend_pipelines[name]
+
+def score_vector(raw_result: List[Dict[str, Any]]) -> List[float]:
+    """Order a raw all-scores output as [positive, negative, neutral]"""
+    scores = {r['label'].lower(): float(r['score']) for r in raw_result}
+    return [scores.get('positive', 0.0), scores.get('negative', 0.0), scores.get('neutral', 0.0)]
+
+def backend_parity_check(backend: Optional[str] = None, sample: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Compare a backend's score vectors against the fp32 PyTorch reference
+    
+    Returns:
+        Dict: max/mean absolute score drift, top-label agreement and timings
+    """
+    try:
+        name = resolve_backend(backend)
+        sample = sample or PARITY_SAMPLE
+        
+        reference_pipeline = get_sentiment_pipeline('pytorch')
+        candidate_pipeline = get_sentiment_pipeline(name)
+        
+        start = time.perf_counter()
+        reference = reference_pipeline(sample, truncation=True, max_length=512, padding=True)
+        reference_seconds = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        candidate = candidate_pipeline(sample, truncation=True, max_length=512, padding=True)
+        candidate_seconds = time.perf_counter() - start
+        
+        reference_scores = np.array([score_vector(r) for r in reference])
+        candidate_scores = np.array([score_vector(r) for r in candidate])
+        drift = np.abs(reference_scores - candidate_scores)
+        
+        return {
+            'backend': name,
+            'reference_backend': 'pytorch',
+            'samples': len(sample),
+            'max_score_drift': round(float(drift.max()), 6),
+            'mean_score_drift': round(float(drift.mean()), 6),
+            'label_agreement': round(float(np.mean(
+                reference_scores.argmax(axis=1) == candidate_scores.argmax(axis=1)
+            )), 3),
+            'reference_seconds': round(reference_seconds, 4),
+            'backend_seconds': round(candidate_seconds, 4)
+        }
+    except Exception as e:
+        return {"error": str(e), "type": "parity_check_error"}
+
+POSITIVE_FINANCIAL_TERMS = {
+    'growth': 'strong growth',
+    'increase': 'significant increase',
+    'revenue': 'solid revenue',
+    'profit': 'strong profit',
+    'margin': 'healthy margin',
+    'beat': 'exceeded',
+    'outperform': 'significantly outperform',
+    'expansion': 'successful expansion',
+    'opportunity': 'great opportunity'
+}
+
+NEGATIVE_FINANCIAL_TERMS = {
+    'decline': 'significant decline',
+    'decrease': 'notable decrease',
+    'loss': 'concerning loss',
+    'miss': 'missed expectations',
+    'underperform': 'underperformed significantly',
+    'challenge': 'serious challenge',
+    'risk': 'significant risk',
+    'pressure': 'intense pressure'
+}
 
 def preprocess_financial_text(text: str) -> str:
     """Preprocess financial text to enhance sentiment detection"""
     if not text:
         return text
     
-    positive_financial_terms = {
-        'growth': 'strong growth',
-        'increase': 'significant increase',
-        'revenue': 'solid revenue',
-        'profit': 'strong profit',
-        'margin': 'healthy margin',
-        'beat': 'exceeded',
-        'outperform': 'significantly outperform',
-        'expansion': 'successful expansion',
-        'opportunity': 'great opportunity'
-    }
-    
-    negative_financial_terms = {
-        'decline': 'significant decline',
-        'decrease': 'notable decrease',
-        'loss': 'concerning loss',
-        'miss': 'missed expectations',
-        'underperform': 'underperformed significantly',
-        'challenge': 'serious challenge',
-        'risk': 'significant risk',
-        'pressure': 'intense pressure'
-    }
-    
     processed_text = text
     
-    for term, replacement in positive_financial_terms.items():
+    for term, replacement in POSITIVE_FINANCIAL_TERMS.items():
         if term in processed_text.lower():
             if any(pos_word in processed_text.lower() for pos_word in ['good', 'better', 'improved', 'strong', 'solid']):
                 processed_text = processed_text.replace(term, replacement)
     
-    for term, replacement in negative_financial_terms.items():
+    for term, replacement in NEGATIVE_FINANCIAL_TERMS.items():
         if term in processed_text.lower():
             if any(neg_word in processed_text.lower() for neg_word in ['concern', 'worry', 'problem', 'weak', 'poor']):
                 processed_text = processed_text.replace(term, replacement)
@@ -307,42 +713,6 @@ def entropy_adjusted_sentiment_score(sentiment_label: str, raw_score: float,
         return raw_score
 
 # ========== WEIGHTED SENTIMENT CALCULATION ==========
-    """
-    Split text into chunks with safe token count control.
-    Uses max_tokens=510 to leave room for special tokens ([CLS], [SEP]).
-    """
-    if not text or not text.strip():
-        return []
-    
-    try:
-        input_ids = tokenizer.encode(text, add_special_tokens=False, truncation=False)
-        
-        if len(input_ids) <= max_tokens:
-            return [text]
-        
-        chunks = []
-        step = max_tokens - overlap
-        
-        for i in range(0, len(input_ids), step):
-            chunk_ids = input_ids[i:i + max_tokens]
-            
-            if len(chunk_ids) > max_tokens:
-                chunk_ids = chunk_ids[:max_tokens]
-            
-            chunk_text = tokenizer.decode(chunk_ids, skip_special_tokens=True)
-            if chunk_text.strip():
-                verify_ids = tokenizer.encode(chunk_text, add_special_tokens=True, truncation=False)
-                if len(verify_ids) > 512:
-                    chunk_text = tokenizer.decode(chunk_ids[:max_tokens-20], skip_special_tokens=True)
-                
-                chunks.append(chunk_text)
-        
-        return chunks
-        
-    except Exception as e:
-        print(f"Error in token-based splitting: {e}", file=sys.stderr)
-        
-        return fallback_text_split(text, max_chars=1500)
 
 def fallback_text_split(text: str, max_chars: int = 1500) -> List[str]:
     """Fallback text splitting based on characters and sentence boundaries"""
@@ -366,6 +736,82 @@ def fallback_text_split(text: str, max_chars: int = 1500) -> List[str]:
     
     return chunks
 
+# Token budget per chunk: FinBERT's 512-token window minus [CLS] and [SEP]
+DEFAULT_MAX_CHUNK_TOKENS = 510
+
+SENTENCE_BOUNDARY_PATTERN = re.compile(r'(?<=[.!?])\s+')
+
+def token_budget_split(text: str, max_tokens: int = DEFAULT_MAX_CHUNK_TOKENS) -> Optional[List[Tuple[str, List[int]]]]:
+    """
+    Pack whole sentences into chunks of at most `max_tokens` FinBERT tokens
+    
+    The text is tokenized once with the fast tokenizer; offset mappings give
+    each token's character span, so chunk text is sliced from the input and
+    its input ids are reused for inference without a decode/re-encode round
+    trip. Sentences longer than the budget are split on token boundaries.
+    
+    Returns:
+        List of (chunk_text, input_ids) pairs without special tokens, or None
+        when no fast tokenizer is available
+    """
+    if not text or not text.strip():
+        return []
+    
+    with timed_stage('model_load'):
+        load_finbert()
+    if not getattr(finbert_tokenizer, 'is_fast', False):
+        return None
+    
+    max_tokens = max(8, min(int(max_tokens), DEFAULT_MAX_CHUNK_TOKENS))
+    with timed_stage('tokenize'):
+        encoding = finbert_tokenizer(
+            text,
+            add_special_tokens=False,
+            return_offsets_mapping=True,
+            return_attention_mask=False,
+            truncation=False,
+            verbose=False
+        )
+    input_ids = encoding['input_ids']
+    offsets = encoding['offset_mapping']
+    if not input_ids:
+        return []
+    
+    # Sentence start positions in characters, then in tokens
+    sentence_starts = [0] + [match.end() for match in SENTENCE_BOUNDARY_PATTERN.finditer(text)]
+    token_sentence_starts = []
+    sentence_idx = 0
+    for token_idx, (char_start, _) in enumerate(offsets):
+        while sentence_idx < len(sentence_starts) and sentence_starts[sentence_idx] <= char_start:
+            if not token_sentence_starts or token_sentence_starts[-1] != token_idx:
+                token_sentence_starts.append(token_idx)
+            sentence_idx += 1
+    token_sentence_starts.append(len(input_ids))
+    
+    chunks: List[Tuple[str, List[int]]] = []
+    
+    def emit(token_start: int, token_end: int) -> None:
+        if token_end > token_start:
+            chunk_text = text[offsets[token_start][0]:offsets[token_end - 1][1]]
+            chunks.append((chunk_text, input_ids[token_start:token_end]))
+    
+    chunk_start = 0
+    for sentence_start, sentence_end in zip(token_sentence_starts, token_sentence_starts[1:]):
+        if sentence_end - chunk_start <= max_tokens:
+            continue
+        
+        # Adding this sentence overflows the budget: close the current chunk first
+        emit(chunk_start, sentence_start)
+        chunk_start = sentence_start
+        
+        # A single sentence over budget is cut into budget-sized token windows
+        while sentence_end - chunk_start > max_tokens:
+            emit(chunk_start, chunk_start + max_tokens)
+            chunk_start += max_tokens
+    
+    emit(chunk_start, len(input_ids))
+    return chunks
+
 def normalize_finbert_score(label: str, raw_score: float, all_scores: List[Dict[str, Any]]) -> tuple:
     """
     Normalize FinBERT scores with reduced neutral bias for better sentiment classification.
@@ -412,6 +858,36 @@ def normalize_finbert_score(label: str, raw_score: float, all_scores: List[Dict[
     
     return normalized_score, confidence, final_label
 
+def sentiment_components(sentiment: Dict[str, Any]) -> Tuple[float, float]:
+    """
+    Numeric sentiment and certainty weight of one chunk, as used by calculate_overall_sentiment
+    
+    Returns:
+        Tuple: (sentiment in [-1, 1], confidence x entropy weight before speaker weighting)
+    """
+    score = sentiment.get('score', 0.5)
+    confidence = sentiment.get('confidence', 0.5)
+    entropy = sentiment.get('entropy', 1.0)
+    
+    # Convert sentiment score to numeric range [-1, 1]
+    sentiment_score = score
+    if sentiment.get('label') == 'positive':
+        sentiment_score = 0.5 + abs(score - 0.5)
+    elif sentiment.get('label') == 'negative':
+        sentiment_score = 0.5 - abs(score - 0.5)
+    else:  # neutral
+        sentiment_score = 0.5
+    
+    sentiment_numeric = (sentiment_score - 0.5) * 2  # Convert to [-1, 1]
+    
+    # Calculate composite weight
+    # Higher confidence = higher weight
+    # Lower entropy = higher weight (more certain predictions)
+    entropy_weight = max(0.3, 1.0 - (entropy / 2.0))  # Scale entropy impact
+    confidence_weight = max(0.5, confidence)
+    
+    return sentiment_numeric, confidence_weight * entropy_weight
+
 def calculate_overall_sentiment(sentiments: List[Dict[str, Any]], speaker_weights: Optional[Dict[str, float]] = None) -> float:
     """
     Calculate weighted overall sentiment score with speaker weighting, entropy, and confidence
@@ -434,9 +910,6 @@ def calculate_overall_sentiment(sentiments: List[Dict[str, Any]], speaker_weight
             if 'error' in sentiment:
                 continue
                 
-            score = sentiment.get('score', 0.5)
-            confidence = sentiment.get('confidence', 0.5)
-            entropy = sentiment.get('entropy', 1.0)
             speaker = sentiment.get('speaker', 'Unknown')
             
             # Get speaker weight
@@ -446,24 +919,8 @@ def calculate_overall_sentiment(sentiments: List[Dict[str, Any]], speaker_weight
             elif hasattr(sentiment, 'speaker_role_weight'):
                 speaker_weight = sentiment.get('speaker_role_weight', 1.0)
             
-            # Convert sentiment score to numeric range [-1, 1]
-            sentiment_score = score
-            if sentiment.get('label') == 'positive':
-                sentiment_score = 0.5 + abs(score - 0.5)
-            elif sentiment.get('label') == 'negative':
-                sentiment_score = 0.5 - abs(score - 0.5)
-            else:  # neutral
-                sentiment_score = 0.5
-            
-            sentiment_numeric = (sentiment_score - 0.5) * 2  # Convert to [-1, 1]
-            
-            # Calculate composite weight
-            # Higher confidence = higher weight
-            # Lower entropy = higher weight (more certain predictions)
-            entropy_weight = max(0.3, 1.0 - (entropy / 2.0))  # Scale entropy impact
-            confidence_weight = max(0.5, confidence)
-            
-            composite_weight = speaker_weight * confidence_weight * entropy_weight
+            sentiment_numeric, certainty_weight = sentiment_components(sentiment)
+            composite_weight = speaker_weight * certainty_weight
             
             weighted_score = sentiment_numeric * composite_weight
             weighted_scores.append(weighted_score)
@@ -484,8 +941,16 @@ def calculate_overall_sentiment(sentiments: List[Dict[str, Any]], speaker_weight
         print(f"Error calculating overall sentiment: {e}", file=sys.stderr)
         return 0.0
 
-def analyze_finbert_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """Enhanced FinBERT analysis with entropy, confidence scoring, and speaker weighting"""
+def analyze_finbert_results(results: List[Dict[str, Any]],
+                            diagnostics: Optional[frozenset] = None) -> Dict[str, Any]:
+    """
+    Enhanced FinBERT analysis with entropy, confidence scoring, and speaker weighting
+    
+    Args:
+        results: All-scores pipeline output for one chunk
+        diagnostics: Chunk diagnostic blocks to attach (see CHUNK_DIAGNOSTIC_FIELDS);
+                     None attaches all of them plus all_scores
+    """
     if not results:
         return {'label': 'neutral', 'score': 0.50, 'confidence': 0.5, 'entropy': 1.0}
     
@@ -550,138 +1015,1612 @@ def analyze_finbert_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
     # Use enhanced confidence over legacy
     final_confidence = enhanced_confidence
     
-    return {
+    result = {
         'label': final_label,
         'score': entropy_adjusted_score,  # Use entropy-adjusted score
         'confidence': final_confidence,
         'entropy': entropy,
         'raw_score': decision_score,
-        'legacy_score': normalized_score,  # Keep for comparison
-        'all_scores': normalized_results,
-        'score_distribution': {
+        'legacy_score': normalized_score  # Keep for comparison
+    }
+    if diagnostics is None:
+        result['all_scores'] = normalized_results
+    if diagnostics is None or 'debug_info' in diagnostics:
+        result['score_distribution'] = {
             'positive': pos_score,
             'negative': neg_score,
             'neutral': neu_score
-        },
-        'decision_info': {
+        }
+    if diagnostics is None or 'decision_info' in diagnostics:
+        result['decision_info'] = {
             'pos_vs_neu_diff': round(pos_vs_neu_diff, 3),
             'neg_vs_neu_diff': round(neg_vs_neu_diff, 3),
             'pos_vs_neg_diff': round(pos_vs_neg_diff, 3),
             'entropy_threshold': round(entropy_adjusted_threshold, 3)
-        },
-        'enhanced_metrics': score_metrics
+        }
+    if diagnostics is None or 'enhanced_metrics' in diagnostics:
+        result['enhanced_metrics'] = score_metrics
+    
+    return result
+
+def analyze_finbert_matrix(probabilities: np.ndarray,
+                           labels: Tuple[str, ...] = ('positive', 'negative', 'neutral'),
+                           diagnostics: Optional[frozenset] = None) -> List[Dict[str, Any]]:
+    """
+    Vectorized analyze_finbert_results for many chunks at once
+    
+    Args:
+        probabilities: N x 3 matrix of FinBERT probabilities, one row per chunk
+        labels: Normalized label of each column, in the model's output order
+        diagnostics: Chunk diagnostic blocks to build, as in analyze_finbert_results
+        
+    Returns:
+        List[Dict]: One result per row, identical to analyze_finbert_results on that row
+    """
+    probs = np.asarray(probabilities, dtype=np.float64)
+    if probs.ndim != 2 or probs.shape[0] == 0:
+        return []
+    
+    column = {label: idx for idx, label in enumerate(labels)}
+    pos = probs[:, column['positive']]
+    neg = probs[:, column['negative']]
+    neu = probs[:, column['neutral']]
+    
+    # calculate_entropy
+    clipped = np.maximum(probs, 1e-10)
+    clipped = clipped / np.sum(clipped, axis=1, keepdims=True)
+    entropy = -np.sum(clipped * np.log2(clipped), axis=1)
+    
+    # enhanced_confidence_scoring
+    max_entropy = math.log2(probs.shape[1])
+    normalized_entropy = entropy / max_entropy if max_entropy > 0 else np.zeros_like(entropy)
+    ordered = np.sort(probs, axis=1)
+    max_prob = ordered[:, -1]
+    second_max_prob = ordered[:, -2] if probs.shape[1] > 1 else np.zeros_like(max_prob)
+    prob_margin = max_prob - second_max_prob
+    entropy_confidence = 1.0 - normalized_entropy
+    margin_confidence = np.minimum(1.0, prob_margin * 2.0)
+    confidence = entropy_confidence * 0.4 + margin_confidence * 0.3 + max_prob * 0.3
+    confidence = np.maximum(0.1, np.minimum(0.95, confidence))
+    
+    # Decision logic (analyze_finbert_results)
+    pos_vs_neu_diff = pos - neu
+    neg_vs_neu_diff = neg - neu
+    pos_vs_neg_diff = np.abs(pos - neg)
+    entropy_threshold = 0.02 + (entropy * 0.01)
+    
+    is_positive = (pos_vs_neu_diff > entropy_threshold) & (pos > neg)
+    is_negative = ~is_positive & (neg_vs_neu_diff > entropy_threshold) & (neg > pos)
+    is_close = ~is_positive & ~is_negative & (pos_vs_neg_diff < (0.05 + entropy * 0.02)) & (np.maximum(pos, neg) > neu)
+    decision_positive = is_positive | (is_close & (pos > neg))
+    decision_negative = is_negative | (is_close & ~(pos > neg))
+    decision_score = np.where(decision_positive, pos, np.where(decision_negative, neg, neu))
+    
+    # entropy_adjusted_sentiment_score
+    base_score = np.where(decision_positive, 0.5 + (decision_score * 0.5),
+                          np.where(decision_negative, 0.5 - (decision_score * 0.5), 0.5))
+    entropy_factor = np.maximum(0.3, np.minimum(1.2, 1.0 - (entropy / 2.0)))
+    confidence_factor = 0.7 + (confidence * 0.3)
+    adjusted = np.where(
+        base_score > 0.5, 0.5 + ((base_score - 0.5) * entropy_factor * confidence_factor),
+        np.where(base_score < 0.5, 0.5 - ((0.5 - base_score) * entropy_factor * confidence_factor), base_score)
+    )
+    adjusted = np.maximum(0.0, np.minimum(1.0, adjusted))
+    
+    # normalize_finbert_score (legacy label and score)
+    legacy_ordered = np.sort(np.stack([pos, neg, neu], axis=1), axis=1)
+    legacy_margin = legacy_ordered[:, -1] - legacy_ordered[:, -2]
+    adjusted_neu = neu - 0.05
+    strong_positive = pos > np.maximum(neg, adjusted_neu) + 0.05
+    strong_negative = ~strong_positive & (neg > np.maximum(pos, adjusted_neu) + 0.05)
+    lean_positive = ~strong_positive & ~strong_negative & (pos > 0.4) & (pos > neg)
+    lean_negative = ~strong_positive & ~strong_negative & ~lean_positive & (neg > 0.4) & (neg > pos)
+    
+    strong_confidence = np.minimum(0.95, np.maximum(0.4, legacy_margin * 1.5 + 0.4))
+    lean_confidence = np.minimum(0.8, np.maximum(0.3, np.where(lean_positive, pos, neg) * 1.2))
+    neutral_confidence = np.minimum(0.7, np.maximum(0.2, 0.7 - legacy_margin))
+    legacy_score = np.where(
+        strong_positive | strong_negative, 0.65 + (strong_confidence - 0.4) * 0.55,
+        np.where(lean_positive | lean_negative, 0.60 + (lean_confidence - 0.3) * 0.6,
+                 0.30 + (neutral_confidence * 0.5))
+    )
+    
+    label_column = np.where(strong_positive | lean_positive, 'positive',
+                            np.where(strong_negative | lean_negative, 'negative', 'neutral'))
+    results = [
+        {
+            'label': label,
+            'score': score,
+            'confidence': conf,
+            'entropy': h,
+            'raw_score': raw,
+            'legacy_score': legacy
+        }
+        for label, score, conf, h, raw, legacy in zip(
+            label_column.tolist(), adjusted.tolist(), confidence.tolist(), entropy.tolist(),
+            decision_score.tolist(), legacy_score.tolist()
+        )
+    ]
+    
+    # Diagnostic blocks are only built when requested
+    if diagnostics is None:
+        for result, row in zip(results, probs.tolist()):
+            result['all_scores'] = [{'label': label, 'score': value} for label, value in zip(labels, row)]
+    if diagnostics is None or 'debug_info' in diagnostics:
+        for result, p, n, u in zip(results, pos.tolist(), neg.tolist(), neu.tolist()):
+            result['score_distribution'] = {
+                'positive': p,
+                'negative': n,
+                'neutral': u
+            }
+    if diagnostics is None or 'decision_info' in diagnostics:
+        for result, pn_diff, nn_diff, pneg_diff, threshold in zip(
+                results, pos_vs_neu_diff.tolist(), neg_vs_neu_diff.tolist(),
+                pos_vs_neg_diff.tolist(), entropy_threshold.tolist()):
+            result['decision_info'] = {
+                'pos_vs_neu_diff': round(pn_diff, 3),
+                'neg_vs_neu_diff': round(nn_diff, 3),
+                'pos_vs_neg_diff': round(pneg_diff, 3),
+                'entropy_threshold': round(threshold, 3)
+            }
+    if diagnostics is None or 'enhanced_metrics' in diagnostics:
+        for result, h, nh, hc, mc, mp, margin in zip(
+                results, entropy.tolist(), normalized_entropy.tolist(), entropy_confidence.tolist(),
+                margin_confidence.tolist(), max_prob.tolist(), prob_margin.tolist()):
+            result['enhanced_metrics'] = {
+                'entropy': round(h, 3),
+                'normalized_entropy': round(nh, 3),
+                'entropy_confidence': round(hc, 3),
+                'margin_confidence': round(mc, 3),
+                'max_prob_confidence': round(mp, 3),
+                'probability_margin': round(margin, 3),
+                'max_probability': round(mp, 3)
+            }
+    
+    return results
+
+def normalize_label(label: str) -> str:
+    label = label.lower()
+    return 'positive' if 'pos' in label else 'negative' if 'neg' in label else 'neutral'
+
+class ProbabilityRow:
+    """
+    One chunk's raw output from the direct model path
+    
+    Holds the softmax row (a view into the batch's N x 3 probability array)
+    and the normalized label of each column, so scoring can stack rows
+    without going through the pipeline's label dicts.
+    """
+    __slots__ = ('labels', 'scores')
+    
+    def __init__(self, labels: Tuple[str, ...], scores: np.ndarray):
+        self.labels = labels
+        self.scores = scores
+    
+    def __getstate__(self) -> Tuple[Tuple[str, ...], np.ndarray]:
+        return self.labels, self.scores
+    
+    def __setstate__(self, state: Tuple[Tuple[str, ...], np.ndarray]) -> None:
+        self.labels, self.scores = state
+    
+    def as_pipeline_output(self) -> List[Dict[str, Any]]:
+        """The same row in the pipeline's all-scores format"""
+        return [{'label': label, 'score': float(score)} for label, score in zip(self.labels, self.scores)]
+
+def pipeline_output(raw_result: Any) -> Optional[List[Dict[str, Any]]]:
+    """All-scores list for a full raw output (pipeline list or ProbabilityRow), else None"""
+    if isinstance(raw_result, ProbabilityRow):
+        return raw_result.as_pipeline_output()
+    if isinstance(raw_result, list):
+        return raw_result
+    return None
+
+def normalized_score_row(raw_result: Any) -> Optional[Tuple[Tuple[str, ...], List[float]]]:
+    """Return (labels, scores) for a full three-label FinBERT output, or None if it can't be vectorized"""
+    if isinstance(raw_result, ProbabilityRow):
+        return raw_result.labels, raw_result.scores
+    if not isinstance(raw_result, list) or len(raw_result) != 3:
+        return None
+    
+    labels = []
+    for result in raw_result:
+        label = result['label'].lower()
+        if 'pos' in label:
+            labels.append('positive')
+        elif 'neg' in label:
+            labels.append('negative')
+        else:
+            labels.append('neutral')
+    
+    if sorted(labels) != ['negative', 'neutral', 'positive']:
+        return None
+    return tuple(labels), [result['score'] for result in raw_result]
+
+def finbert_result_from_raw(raw_result: Any, diagnostics: Optional[frozenset] = None) -> Dict[str, Any]:
+    """Convert one raw pipeline output (all-scores list or single top label) into a scored result"""
+    if isinstance(raw_result, ProbabilityRow):
+        return analyze_finbert_results(raw_result.as_pipeline_output(), diagnostics)
+    if isinstance(raw_result, list):
+        return analyze_finbert_results(raw_result, diagnostics)
+    
+    single_result = raw_result
+    
+    mock_all_scores = [
+        {'label': 'positive', 'score': 0.33},
+        {'label': 'negative', 'score': 0.33},
+        {'label': 'neutral', 'score': 0.33}
+    ]
+    
+    label = single_result['label'].lower()
+    if 'pos' in label:
+        label = 'positive'
+    elif 'neg' in label:
+        label = 'negative'
+    else:
+        label = 'neutral'
+    for mock_score in mock_all_scores:
+        if mock_score['label'] == label:
+            mock_score['score'] = single_result['score']
+    
+    normalized_score, confidence, final_label = normalize_finbert_score(
+        label, single_result['score'], mock_all_scores
+    )
+    
+    return {
+        'label': final_label,
+        'score': normalized_score,
+        'confidence': confidence,
+        'raw_score': single_result['score']
     }
 
-def analyze_text(text: str) -> Dict[str, Any]:
-    """Analyze sentiment of text using FinBERT only with reduced neutral bias"""
+def build_chunk_sentiment(chunk_id: int, chunk: str, result: Dict[str, Any],
+                          diagnostics: Optional[frozenset] = None) -> Dict[str, Any]:
+    """Build the per-chunk sentiment record returned in `sentiments`"""
+    record = {
+        'chunk_id': chunk_id,
+        'text': chunk,
+        'original_text': chunk, 
+        'label': result['label'],
+        'score': round(result['score'], 3),
+        'confidence': round(result['confidence'], 3),
+        'entropy': round(result.get('entropy', 1.0), 3),
+        'raw_score': round(result.get('raw_score', result['score']), 3),
+        'legacy_score': round(result.get('legacy_score', result['score']), 3)
+    }
+    if diagnostics is None or 'debug_info' in diagnostics:
+        record['debug_info'] = result.get('score_distribution', {})
+    if diagnostics is None or 'decision_info' in diagnostics:
+        record['decision_info'] = result.get('decision_info', {})
+    if diagnostics is None or 'enhanced_metrics' in diagnostics:
+        record['enhanced_metrics'] = result.get('enhanced_metrics', {})
+    return record
+
+def build_chunk_error(chunk_id: int, chunk: str, error: Exception) -> Dict[str, Any]:
+    """Build the neutral placeholder record for a chunk that failed inference"""
+    return {
+        'chunk_id': chunk_id,
+        'text': chunk,
+        'label': 'neutral',
+        'score': 0.50,
+        'confidence': 0.3,
+        'entropy': 1.0,
+        'error': str(error)
+    }
+
+def encode_batch(tokenizer: Any, batch: List[str], id_batch: List[Optional[List[int]]]) -> Dict[str, Any]:
+    """
+    Model inputs for one mini-batch as padded tensors
+    
+    Pre-tokenized chunks (ids without special tokens, from token_budget_split)
+    only get [CLS]/[SEP] added and are padded; anything else is tokenized
+    with the pipeline's settings (truncated to 512 tokens).
+    """
+    if id_batch and all(ids for ids in id_batch):
+        return tokenizer.pad(
+            {'input_ids': [tokenizer.build_inputs_with_special_tokens(ids) for ids in id_batch]},
+            padding=True,
+            return_tensors='pt'
+        )
+    return tokenizer(batch, truncation=True, max_length=512, padding=True, return_tensors='pt')
+
+def model_labels(model: Any) -> Tuple[str, ...]:
+    """Normalized label of each logit column of a sequence-classification model"""
+    id2label = model.config.id2label
+    return tuple(normalize_label(id2label[label_id]) for label_id in range(len(id2label)))
+
+def infer_encoded(backend_pipeline: Any, encoded: Dict[str, Any]) -> np.ndarray:
+    """Run the pipeline's model on encoded inputs; returns the N x labels softmax probabilities"""
+    import torch
+    
+    with torch.inference_mode():
+        logits = backend_pipeline.model(**encoded).logits
+        return torch.softmax(logits.float(), dim=-1).numpy()
+
+def padding_token_counts(lengths: List[int], batch_size: int) -> Tuple[int, int]:
+    """Real vs padded token counts when `lengths` are batched in order with dynamic padding"""
+    real_tokens = sum(lengths)
+    padded_tokens = sum(
+        max(lengths[start:start + batch_size]) * len(lengths[start:start + batch_size])
+        for start in range(0, len(lengths), batch_size)
+    )
+    return real_tokens, padded_tokens
+
+def infer_batch(backend_pipeline: Any, batch: List[str], id_batch: List[Optional[List[int]]],
+                encoded: Any = None) -> List[Any]:
+    """
+    Score one mini-batch, returning a raw output or Exception per chunk
+    
+    The direct path runs encode_batch output through the model and returns
+    ProbabilityRows; `encoded` may carry inputs already prepared (or the
+    Exception raised preparing them) by a background tokenizer thread.
+    Without DIRECT_INFERENCE, text chunks go through the pipeline. A failing
+    batch is retried chunk by chunk through the pipeline so one bad chunk
+    does not take down its neighbours.
+    """
     try:
-        if not text or not text.strip():
-            return {"error": "Empty text provided"}
-        
-        processed_text = preprocess_financial_text(text)
-        
-        chunks = fallback_text_split(processed_text, max_chars=1000)
-        
-        if not chunks:
-            return {"error": "No valid text chunks found after processing"}
-        
-        sentiments = []
-        
-        for i, chunk in enumerate(chunks):
-            if not chunk.strip():
-                continue
-                
+        if DIRECT_INFERENCE or (id_batch and all(ids for ids in id_batch)):
+            if encoded is None:
+                encoded = encode_batch(backend_pipeline.tokenizer, batch, id_batch)
+            elif isinstance(encoded, Exception):
+                raise encoded
+            probabilities = infer_encoded(backend_pipeline, encoded)
+            labels = model_labels(backend_pipeline.model)
+            return [ProbabilityRow(labels, row) for row in probabilities]
+        return list(backend_pipeline(
+            batch,
+            truncation=True,
+            max_length=512,
+            padding=True,
+            batch_size=len(batch)
+        ))
+    except Exception as e:
+        print(f"Batch inference failed ({e}), retrying chunks individually", file=sys.stderr)
+        raw_outputs: List[Any] = []
+        for chunk in batch:
             try:
-                raw_results = sentiment_pipeline(
-                    chunk, 
-                    truncation=True, 
+                raw_outputs.append(backend_pipeline(
+                    chunk,
+                    truncation=True,
                     max_length=512,
                     padding=True
-                )
-                
-                if isinstance(raw_results[0], list):
-                    result = analyze_finbert_results(raw_results[0])
-                else:
-                    single_result = raw_results[0]
-                    
-                    mock_all_scores = [
-                        {'label': 'positive', 'score': 0.33},
-                        {'label': 'negative', 'score': 0.33},
-                        {'label': 'neutral', 'score': 0.33}
-                    ]
-                    
-                    label = single_result['label'].lower()
-                    if 'pos' in label:
-                        label = 'positive'
-                    elif 'neg' in label:
-                        label = 'negative'
-                    else:
-                        label = 'neutral'
-                    for mock_score in mock_all_scores:
-                        if mock_score['label'] == label:
-                            mock_score['score'] = single_result['score']
-                    
-                    normalized_score, confidence, final_label = normalize_finbert_score(
-                        label, single_result['score'], mock_all_scores
-                    )
-                    
-                    result = {
-                        'label': final_label,
-                        'score': normalized_score,
-                        'confidence': confidence,
-                        'raw_score': single_result['score']
-                    }
-                
-                sentiments.append({
-                    'chunk_id': i + 1,
-                    'text': chunk,
-                    'original_text': chunks[i] if i < len(chunks) else chunk, 
-                    'label': result['label'],
-                    'score': round(result['score'], 3),
-                    'confidence': round(result['confidence'], 3),
-                    'entropy': round(result.get('entropy', 1.0), 3),
-                    'raw_score': round(result.get('raw_score', result['score']), 3),
-                    'legacy_score': round(result.get('legacy_score', result['score']), 3),
-                    'debug_info': result.get('score_distribution', {}),
-                    'decision_info': result.get('decision_info', {}),
-                    'enhanced_metrics': result.get('enhanced_metrics', {})
-                })
-                
-            except Exception as e:
-                print(f"Error processing chunk {i}: {e}", file=sys.stderr)
-                
-                sentiments.append({
-                    'chunk_id': i + 1,
-                    'text': chunk,
-                    'label': 'neutral',
-                    'score': 0.50,
-                    'confidence': 0.3,
-                    'entropy': 1.0,
-                    'error': str(e)
-                })
+                )[0])
+            except Exception as chunk_error:
+                raw_outputs.append(chunk_error)
+        return raw_outputs
+
+def infer_batches_overlapped(backend_pipeline: Any, batches: List[Tuple[List[str], List[Optional[List[int]]]]]
+                             ) -> Iterator[List[Any]]:
+    """
+    Score batches in order, tokenizing batch k+1 on a background thread while batch k runs
+    
+    Fast tokenizers and torch both release the GIL, so encoding overlaps the
+    forward pass. Falls back to plain infer_batch calls when the pipeline path
+    is in use or there is only one batch.
+    """
+    if not DIRECT_INFERENCE or len(batches) < 2:
+        for batch, id_batch in batches:
+            yield infer_batch(backend_pipeline, batch, id_batch)
+        return
+    
+    def encode(index: int) -> Any:
+        try:
+            return encode_batch(backend_pipeline.tokenizer, *batches[index])
+        except Exception as e:
+            return e
+    
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="finbert-tokenize") as executor:
+        pending = executor.submit(encode, 0)
+        for index, (batch, id_batch) in enumerate(batches):
+            encoded = pending.result()
+            if index + 1 < len(batches):
+                pending = executor.submit(encode, index + 1)
+            yield infer_batch(backend_pipeline, batch, id_batch, encoded)
+
+# ========== MULTI-PROCESS INFERENCE ==========
+
+# Number of forked inference processes batches are sharded across (0 or 1 runs in-process)
+INFERENCE_PROCESSES = int(os.getenv("FINBERT_PROCESSES", "0"))
+# torch intra-op threads per inference process; defaults to an even split of the cores
+INFERENCE_THREADS = int(os.getenv("FINBERT_INTRA_OP_THREADS", "0"))
+# Backends the pool is forked with; requests for any other backend run in-process
+POOL_BACKENDS = tuple(
+    name.strip() for name in os.getenv("FINBERT_POOL_BACKENDS", DEFAULT_BACKEND).split(",") if name.strip()
+)
+# ONNX Runtime sessions own thread pools from creation, so they are never forked
+UNFORKABLE_BACKENDS = ('onnx',)
+
+_inference_pool = None
+_inference_pool_lock = threading.Lock()
+# Set once the pool has been forked, or once forking is no longer safe
+_inference_pool_sealed = False
+_in_pool_worker = False
+
+def _init_pool_worker(threads: int) -> None:
+    """Pool initializer: pin torch threads and mark the process as a pool worker"""
+    global _in_pool_worker
+    _in_pool_worker = True
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+def _run_pool_batch(task: Tuple[int, Optional[str], List[str], List[Optional[List[int]]]]
+                    ) -> Tuple[int, int, float, List[Any]]:
+    """Score one batch inside a pool worker using the model inherited at fork time"""
+    batch_number, backend, batch, id_batch = task
+    start_time = time.perf_counter()
+    raw_outputs = infer_batch(get_sentiment_pipeline(backend), batch, id_batch)
+    return batch_number, os.getpid(), time.perf_counter() - start_time, raw_outputs
+
+class InferenceProcessPool:
+    """
+    Forked worker processes that score FinBERT batches in parallel
+    
+    The pool is forked after the model (and every backend it serves) is
+    loaded in the parent, so workers share the weights copy-on-write instead
+    of loading N copies. Each worker runs torch with its own intra-op thread
+    budget so N workers do not oversubscribe the cores.
+    """
+    
+    def __init__(self, processes: int, threads: int = 0, backends: Tuple[str, ...] = ('pytorch',)):
+        import multiprocessing
         
-        if not sentiments:
-            return {"error": "No valid sentiment analysis results"}
+        self.processes = processes
+        self.threads = threads or max(1, (os.cpu_count() or 1) // processes)
+        self.backends = set(backends)
+        self.started_at = time.perf_counter()
+        self.worker_totals: Dict[int, Dict[str, float]] = {}
         
-        overall_sentiment = calculate_overall_sentiment(sentiments)
+        for backend in self.backends:
+            get_sentiment_pipeline(backend)
+        
+        context = multiprocessing.get_context('fork')
+        self.pool = context.Pool(processes, initializer=_init_pool_worker, initargs=(self.threads,))
+        print(f"Inference pool started: {processes} processes x {self.threads} threads", file=sys.stderr)
+    
+    def infer_batches(self, backend: str, batches: List[Tuple[List[str], List[Optional[List[int]]]]]
+                      ) -> Tuple[List[List[Any]], Dict[str, Any]]:
+        """
+        Score batches across the pool
         
+        Returns:
+            Tuple: (per-batch raw outputs in input order, utilization report)
+        """
+        start_time = time.perf_counter()
+        tasks = [(n, backend, batch, id_batch) for n, (batch, id_batch) in enumerate(batches)]
+        outputs: List[List[Any]] = [[] for _ in batches]
+        request_workers: Dict[int, Dict[str, float]] = {}
+        
+        # Longest (last-sorted) batches first so the slowest work does not land at the tail
+        for batch_number, pid, busy_seconds, raw_outputs in self.pool.imap_unordered(_run_pool_batch, reversed(tasks)):
+            outputs[batch_number] = raw_outputs
+            for totals in (request_workers.setdefault(pid, {}), self.worker_totals.setdefault(pid, {})):
+                totals['batches'] = totals.get('batches', 0) + 1
+                totals['chunks'] = totals.get('chunks', 0) + len(raw_outputs)
+                totals['busy_seconds'] = totals.get('busy_seconds', 0.0) + busy_seconds
+        
+        wall_seconds = time.perf_counter() - start_time
+        return outputs, self._report(request_workers, wall_seconds)
+    
+    def _report(self, workers: Dict[int, Dict[str, float]], wall_seconds: float) -> Dict[str, Any]:
         return {
-            "sentiments": sentiments,
-            "overall_sentiment": round(overall_sentiment, 3),
-            "summary": generate_summary(text, sentiments),
-            "metadata": {
-                "total_chunks": len(sentiments),
-                "text_length": len(text),
-                "processed_text_length": len(processed_text),
-                "text_modified": processed_text != text,
-                "avg_chunk_size": round(len(text) / len(sentiments)) if sentiments else 0,
-                "model_used": "FinBERT",
-                "avg_confidence": round(np.mean([s.get('confidence', 0.5) for s in sentiments]), 3),
-                "device": "CPU",
-                "neutral_bias_reduction": "enabled"
-            }
+            'processes': self.processes,
+            'threads_per_process': self.threads,
+            'wall_seconds': round(wall_seconds, 4),
+            'workers': [
+                {
+                    'pid': pid,
+                    'batches': int(totals['batches']),
+                    'chunks': int(totals['chunks']),
+                    'busy_seconds': round(totals['busy_seconds'], 4),
+                    'utilization': round(min(1.0, totals['busy_seconds'] / wall_seconds), 3) if wall_seconds > 0 else 0.0
+                }
+                for pid, totals in sorted(workers.items())
+            ]
         }
+    
+    def merge_reports(self, reports: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Combine the utilization reports of several infer_batches calls"""
+        workers: Dict[int, Dict[str, float]] = {}
+        for report in reports:
+            for worker in report['workers']:
+                totals = workers.setdefault(worker['pid'], {})
+                for key in ('batches', 'chunks', 'busy_seconds'):
+                    totals[key] = totals.get(key, 0) + worker[key]
+        return self._report(workers, sum(report['wall_seconds'] for report in reports))
+    
+    def stats(self) -> Dict[str, Any]:
+        """Cumulative per-worker utilization since the pool started"""
+        return self._report(self.worker_totals, time.perf_counter() - self.started_at)
+    
+    def close(self) -> None:
+        self.pool.terminate()
+        self.pool.join()
+
+def start_inference_pool(backends: Tuple[str, ...] = POOL_BACKENDS) -> Optional[InferenceProcessPool]:
+    """
+    Fork the shared inference pool, at most once per process
+    
+    Must run before the parent does any inference: forking a process whose
+    torch/OpenMP thread pools are already running can deadlock the children.
+    run_worker and the HTTP service call it right after loading the model.
+    """
+    global _inference_pool, _inference_pool_sealed
+    
+    with _inference_pool_lock:
+        if _inference_pool_sealed:
+            return _inference_pool
+        _inference_pool_sealed = True
+        
+        if INFERENCE_PROCESSES <= 1 or _in_pool_worker:
+            return None
+        
+        forkable = tuple(sorted({resolve_backend(name) for name in backends} - set(UNFORKABLE_BACKENDS)))
+        if not forkable:
+            return None
+        try:
+            _inference_pool = InferenceProcessPool(INFERENCE_PROCESSES, INFERENCE_THREADS, forkable)
+        except ValueError as e:
+            # No fork start method (e.g. Windows): stay in-process
+            print(f"Multi-process inference unavailable ({e}), running in-process", file=sys.stderr)
+        return _inference_pool
+
+def seal_inference_pool() -> None:
+    """Record that inference ran in this process, after which the pool is never forked"""
+    global _inference_pool_sealed
+    if not _inference_pool_sealed and not _in_pool_worker:
+        with _inference_pool_lock:
+            if not _inference_pool_sealed and INFERENCE_PROCESSES > 1:
+                print("Inference ran in-process before the pool was forked; staying in-process", file=sys.stderr)
+            _inference_pool_sealed = True
+
+def get_inference_pool(backend: str) -> Optional[InferenceProcessPool]:
+    """
+    Return the shared inference pool if it serves `backend`
+    
+    Returns None when multi-process inference is disabled, unsupported on this
+    platform, called from inside a pool worker, or when the pool was not
+    forked with this backend. The pool is never re-forked: it is started by
+    run_worker or the HTTP service at startup, or on first use here if nothing
+    has been scored in-process yet and this is the main thread.
+    """
+    if INFERENCE_PROCESSES <= 1 or _in_pool_worker:
+        return None
+    if not _inference_pool_sealed and threading.current_thread() is not threading.main_thread():
+        # Forking from a helper thread of a threaded server can deadlock the children
+        return None
+    
+    pool = start_inference_pool() if not _inference_pool_sealed else _inference_pool
+    return pool if pool is not None and backend in pool.backends else None
+
+def infer_finbert_chunks(chunks: List[str], batch_size: int = DEFAULT_BATCH_SIZE,
+                         backend: Optional[str] = None,
+                         input_ids: Optional[List[Optional[List[int]]]] = None,
+                         length_bucketing: bool = True,
+                         stats: Optional[Dict[str, Any]] = None) -> List[Any]:
+    """
+    Run FinBERT over chunks in mini-batches
+    
+    With length_bucketing, chunks are sorted by token length before batching
+    so each batch pads to a similar length, and outputs are put back in the
+    original order. Batches whose chunks all come with pre-computed input ids
+    (from token_budget_split) skip tokenization entirely; the rest are
+    tokenized on a background thread one batch ahead of the model (see
+    infer_batches_overlapped). When FINBERT_PROCESSES > 1 and there is more than one batch,
+    batches are sharded across the forked inference pool.
+    
+    Returns one entry per chunk: a ProbabilityRow (direct path), the raw
+    pipeline output, or the Exception raised for that chunk.
+    """
+    batch_size = max(1, int(batch_size))
+    backend = resolve_backend(backend)
+    backend_pipeline = get_sentiment_pipeline(backend)
+    raw_outputs: List[Any] = [None] * len(chunks)
+    first_inference_start = time.perf_counter() if STARTUP_TIMINGS['first_inference'] is None else None
+    
+    # Token lengths incl. [CLS]/[SEP] when known; character length is only a sorting proxy
+    has_ids = bool(input_ids) and all(ids for ids in input_ids)
+    lengths = [len(ids) + 2 for ids in input_ids] if has_ids else [len(chunk) for chunk in chunks]
+    order = sorted(range(len(chunks)), key=lambda i: lengths[i]) if length_bucketing else list(range(len(chunks)))
+    batch_indexes = [order[start:start + batch_size] for start in range(0, len(order), batch_size)]
+    batches = [
+        ([chunks[i] for i in indexes], [input_ids[i] for i in indexes] if input_ids else [])
+        for indexes in batch_indexes
+    ]
+    
+    pool = get_inference_pool(backend) if len(batches) > 1 else None
+    if pool is not None:
+        batch_outputs, utilization = pool.infer_batches(backend, batches)
+        if stats is not None:
+            stats.setdefault('process_pool', []).append(utilization)
+    else:
+        seal_inference_pool()
+        batch_outputs = []
+        for outputs in infer_batches_overlapped(backend_pipeline, batches):
+            batch_outputs.append(outputs)
+            if first_inference_start is not None:
+                STARTUP_TIMINGS['first_inference'] = round(time.perf_counter() - first_inference_start, 4)
+                first_inference_start = None
+    
+    for indexes, outputs in zip(batch_indexes, batch_outputs):
+        for i, raw_result in zip(indexes, outputs):
+            raw_outputs[i] = raw_result
+    
+    if first_inference_start is not None and batch_outputs:
+        STARTUP_TIMINGS['first_inference'] = round(time.perf_counter() - first_inference_start, 4)
+    
+    if stats is not None and has_ids:
+        real_tokens, padded_tokens = padding_token_counts([lengths[i] for i in order], batch_size)
+        _, unbucketed_padded_tokens = padding_token_counts(lengths, batch_size)
+        stats['real_tokens'] = stats.get('real_tokens', 0) + real_tokens
+        stats['padded_tokens'] = stats.get('padded_tokens', 0) + padded_tokens
+        stats['unbucketed_padded_tokens'] = stats.get('unbucketed_padded_tokens', 0) + unbucketed_padded_tokens
+    
+    return raw_outputs
+
+# ========== CHUNK SENTIMENT CACHE ==========
+
+# Bump to force-invalidate cached score vectors when inference changes in a way
+# the automatic fingerprint below cannot see
+SCORING_VERSION = "1"
+
+CACHE_ENABLED = os.getenv("FINBERT_CACHE", "on").lower() not in ("0", "off", "false", "no")
+CACHE_PATH = os.getenv(
+    "FINBERT_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "finbert_chunk_cache.sqlite")
+)
+CACHE_MEMORY_SIZE = int(os.getenv("FINBERT_CACHE_MEMORY_SIZE", "4096"))
+# SQLite tier bounds: entries older than the max age are dropped, and past the size
+# limit the oldest entries go first (entries from other scoring versions before current ones)
+CACHE_MAX_BYTES = int(float(os.getenv("FINBERT_CACHE_MAX_MB", "512")) * 1024 * 1024)
+CACHE_MAX_AGE = float(os.getenv("FINBERT_CACHE_MAX_AGE_DAYS", "30")) * 86400
+# Eviction runs after this many rows have been written by the process
+CACHE_EVICT_EVERY = 1000
+
+def scoring_functions() -> Tuple[Any, ...]:
+    """Functions whose code determines the raw score vector of a chunk"""
+    return (infer_finbert_chunks, infer_batch, encode_batch, infer_encoded, _build_backend_model, pipeline_output)
+
+MODEL_IDENTITY_FILES = ("config.json", "model.safetensors", "pytorch_model.bin")
+
+def model_identity() -> str:
+    """
+    Identity of the FinBERT weights that would be loaded, without loading them
+    
+    For a hub download the snapshot revision plus the resolved blob names
+    (content hashes); for a local snapshot directory each file's size and
+    mtime, so re-downloading into the same directory changes it. Falls back
+    to the loaded model's revision when no snapshot is on disk yet.
+    """
+    snapshot_dir = MODEL_DIR
+    if not snapshot_dir:
+        try:
+            from huggingface_hub import try_to_load_from_cache
+            config_path = try_to_load_from_cache(MODEL_NAME, "config.json")
+            if isinstance(config_path, str):
+                snapshot_dir = os.path.dirname(config_path)
+        except ImportError:
+            pass
+    
+    parts = []
+    if snapshot_dir and os.path.isdir(snapshot_dir):
+        if not MODEL_DIR:
+            parts.append(os.path.basename(os.path.normpath(snapshot_dir)))
+        for name in MODEL_IDENTITY_FILES:
+            path = os.path.join(snapshot_dir, name)
+            if os.path.exists(path):
+                stat = os.stat(path)
+                parts.append(f"{name}:{os.path.basename(os.path.realpath(path))}:{stat.st_size}:{stat.st_mtime_ns}")
+    if parts:
+        return "|".join(parts)
+    
+    load_finbert()
+    return getattr(finbert_model.config, '_commit_hash', None) or ''
+
+def scoring_fingerprint() -> str:
+    """
+    Fingerprint of everything that determines a chunk's raw score vector
+    
+    Covers the model id, snapshot directory and weights (model_identity),
+    SCORING_VERSION and the source of scoring_functions(), so swapping
+    MODEL_NAME, a new model revision or editing the inference code
+    invalidates the cache without a manual bump. The inference backend
+    is part of each key, so int8/ONNX scores never mix with fp32 ones. Post-processing
+    (analyze_finbert_results and friends) reruns on every hit, so changes
+    there never need invalidation.
+    """
+    sources = []
+    for fn in scoring_functions():
+        try:
+            sources.append(inspect.getsource(fn))
+        except (OSError, TypeError):
+            sources.append(fn.__name__)
+    
+    fingerprint = hashlib.sha256()
+    for part in (MODEL_NAME, MODEL_DIR, model_identity(), SCORING_VERSION, *sources):
+        fingerprint.update(str(part).encode('utf-8'))
+        fingerprint.update(b'\x00')
+    return fingerprint.hexdigest()[:16]
+
+class ChunkSentimentCache:
+    """
+    Content-addressed cache of raw FinBERT score vectors
+    
+    A bounded in-memory LRU sits in front of a SQLite file shared by every
+    corporate.py process on the host. Keys hash the preprocessed chunk text
+    together with scoring_fingerprint().
+    """
+    
+    def __init__(self, path: str = CACHE_PATH, memory_size: int = CACHE_MEMORY_SIZE):
+        self.path = path
+        self.memory_size = max(0, memory_size)
+        self.memory: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self.namespace = scoring_fingerprint()
+        self.hits = 0
+        self.misses = 0
+        self.max_bytes = CACHE_MAX_BYTES
+        self.max_age = CACHE_MAX_AGE
+        self._writes_since_evict = 0
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_failed = False
+    
+    def key(self, chunk: str, backend: str = 'pytorch') -> str:
+        return hashlib.sha256(f"{self.namespace}\x00{backend}\x00{chunk}".encode('utf-8')).hexdigest()
+    
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        if self._db is not None or self._db_failed:
+            return self._db
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._db = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS chunk_scores ("
+                "key TEXT PRIMARY KEY, namespace TEXT NOT NULL, scores TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS chunk_scores_created ON chunk_scores (created_at)")
+            # Entries of other scoring versions are not purged here: processes running
+            # different code may share the file, so they age out through evict()
+            self._db.commit()
+        except Exception as e:
+            print(f"Chunk cache disabled, SQLite unavailable: {e}", file=sys.stderr)
+            self._db = None
+            self._db_failed = True
+        return self._db
+    
+    def _remember(self, key: str, scores: List[Dict[str, Any]]) -> None:
+        if not self.memory_size:
+            return
+        self.memory[key] = scores
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+    
+    def get_many(self, chunks: List[str], backend: str = 'pytorch') -> List[Optional[List[Dict[str, Any]]]]:
+        """Look up chunks; returns the cached score vector or None for each"""
+        keys = [self.key(chunk, backend) for chunk in chunks]
+        found: List[Optional[List[Dict[str, Any]]]] = [None] * len(chunks)
+        
+        with self._lock:
+            missing = []
+            for i, key in enumerate(keys):
+                if key in self.memory:
+                    self.memory.move_to_end(key)
+                    found[i] = self.memory[key]
+                else:
+                    missing.append(i)
+            
+            db = self._connection() if missing else None
+            if db is not None:
+                try:
+                    for start in range(0, len(missing), 500):
+                        batch = missing[start:start + 500]
+                        placeholders = ",".join("?" * len(batch))
+                        rows = db.execute(
+                            f"SELECT key, scores FROM chunk_scores WHERE key IN ({placeholders})",
+                            [keys[i] for i in batch]
+                        ).fetchall()
+                        stored = {key: json.loads(scores) for key, scores in rows}
+                        for i in batch:
+                            if keys[i] in stored:
+                                found[i] = stored[keys[i]]
+                                self._remember(keys[i], found[i])
+                except Exception as e:
+                    print(f"Chunk cache read failed: {e}", file=sys.stderr)
+            
+            hits = sum(1 for scores in found if scores is not None)
+            self.hits += hits
+            self.misses += len(chunks) - hits
+        
+        return found
+    
+    def put_many(self, chunks: List[str], score_vectors: List[List[Dict[str, Any]]],
+                 backend: str = 'pytorch') -> None:
+        """Store raw score vectors for freshly scored chunks"""
+        if not chunks:
+            return
+        
+        rows = []
+        now = time.time()
+        with self._lock:
+            for chunk, scores in zip(chunks, score_vectors):
+                key = self.key(chunk, backend)
+                self._remember(key, scores)
+                rows.append((key, self.namespace, json.dumps(scores), now))
+            
+            db = self._connection()
+            if db is not None:
+                try:
+                    db.executemany("INSERT OR REPLACE INTO chunk_scores VALUES (?, ?, ?, ?)", rows)
+                    db.commit()
+                    self._writes_since_evict += len(rows)
+                    if self._writes_since_evict >= CACHE_EVICT_EVERY:
+                        self._writes_since_evict = 0
+                        self._evict(db)
+                except Exception as e:
+                    print(f"Chunk cache write failed: {e}", file=sys.stderr)
+    
+    def _evict(self, db: sqlite3.Connection) -> int:
+        """
+        Drop expired entries, then the oldest ones until the file's live pages fit max_bytes
         
+        Returns:
+            Number of rows deleted
+        """
+        deleted = db.execute("DELETE FROM chunk_scores WHERE created_at < ?", (time.time() - self.max_age,)).rowcount
+        
+        page_size = db.execute("PRAGMA page_size").fetchone()[0]
+        used_pages = db.execute("PRAGMA page_count").fetchone()[0] - db.execute("PRAGMA freelist_count").fetchone()[0]
+        used_bytes = used_pages * page_size
+        if used_bytes > self.max_bytes:
+            rows = db.execute("SELECT COUNT(*) FROM chunk_scores").fetchone()[0]
+            if rows:
+                # Aim 10% under the limit so eviction does not run on every write
+                excess = used_bytes - int(self.max_bytes * 0.9)
+                count = min(rows, int(excess / (used_bytes / rows)) + 1)
+                deleted += db.execute(
+                    "DELETE FROM chunk_scores WHERE key IN ("
+                    "SELECT key FROM chunk_scores ORDER BY namespace = ?, created_at LIMIT ?)",
+                    (self.namespace, count)
+                ).rowcount
+        db.commit()
+        if deleted:
+            print(f"Chunk cache evicted {deleted} entries", file=sys.stderr)
+        return deleted
+    
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0,
+            'memory_entries': len(self.memory),
+            'namespace': self.namespace
+        }
+
+_chunk_cache: Optional[ChunkSentimentCache] = None
+
+def get_chunk_cache() -> Optional[ChunkSentimentCache]:
+    """Return the process-wide chunk cache, or None when caching is disabled"""
+    global _chunk_cache
+    if not CACHE_ENABLED:
+        return None
+    if _chunk_cache is None:
+        _chunk_cache = ChunkSentimentCache()
+    return _chunk_cache
+
+# Per-thread replacement for infer_finbert_chunks (same signature), used by the
+# HTTP service to route cache misses through its cross-request micro-batcher
+_inference_override = threading.local()
+
+def set_inference_override(infer: Optional[Any]) -> None:
+    """Route this thread's FinBERT inference through `infer` (None restores the default)"""
+    _inference_override.infer = infer
+
+def count_inference_inputs(chunks: List[str], input_ids: Optional[List[Optional[List[int]]]]) -> None:
+    """Profiling counters for the chunks (and known token counts) sent to the model"""
+    count_stage('inference_chunks', len(chunks))
+    if input_ids:
+        count_stage('inference_tokens', sum(len(ids) for ids in input_ids if ids))
+
+def run_finbert_batches(chunks: List[str], batch_size: int = DEFAULT_BATCH_SIZE,
+                        use_cache: bool = True, stats: Optional[Dict[str, Any]] = None,
+                        backend: Optional[str] = None,
+                        input_ids: Optional[List[Optional[List[int]]]] = None,
+                        length_bucketing: bool = True) -> List[Any]:
+    """
+    Score chunks with FinBERT, serving repeats from the chunk cache
+    
+    `input_ids`, when given, is aligned with `chunks` and lets inference skip
+    tokenization for chunks that were already tokenized by the chunker.
+    
+    Only cache misses reach the model. When `stats` is given it receives
+    'cache_hits', 'cache_misses', a per-chunk 'cache_hit_mask' and, for
+    pre-tokenized chunks, real/padded token counts.
+    """
+    backend = resolve_backend(backend)
+    cache = get_chunk_cache() if use_cache else None
+    infer = getattr(_inference_override, 'infer', None) or infer_finbert_chunks
+    
+    if cache is None:
+        count_inference_inputs(chunks, input_ids)
+        with timed_stage('inference'):
+            raw_outputs = infer(chunks, batch_size, backend, input_ids, length_bucketing, stats)
+        hit_mask = [False] * len(chunks)
+    else:
+        with timed_stage('cache'):
+            raw_outputs = cache.get_many(chunks, backend)
+        hit_mask = [scores is not None for scores in raw_outputs]
+        miss_indexes = [i for i, hit in enumerate(hit_mask) if not hit]
+        
+        if miss_indexes:
+            miss_chunks = [chunks[i] for i in miss_indexes]
+            miss_input_ids = [input_ids[i] for i in miss_indexes] if input_ids else None
+            count_inference_inputs(miss_chunks, miss_input_ids)
+            with timed_stage('inference'):
+                fresh_outputs = infer(
+                    miss_chunks, batch_size, backend, miss_input_ids, length_bucketing, stats
+                )
+            
+            cacheable_chunks = []
+            cacheable_scores = []
+            for i, chunk, output in zip(miss_indexes, miss_chunks, fresh_outputs):
+                raw_outputs[i] = output
+                # Only full score vectors are cached; errors and top-1 outputs are not
+                scores = pipeline_output(output)
+                if scores is not None:
+                    cacheable_chunks.append(chunk)
+                    cacheable_scores.append([{'label': r['label'], 'score': float(r['score'])} for r in scores])
+            with timed_stage('cache'):
+                cache.put_many(cacheable_chunks, cacheable_scores, backend)
+    
+    if stats is not None:
+        stats['backend'] = backend
+        stats['cache_enabled'] = cache is not None
+        stats['cache_hits'] = stats.get('cache_hits', 0) + sum(hit_mask)
+        stats['cache_misses'] = stats.get('cache_misses', 0) + len(hit_mask) - sum(hit_mask)
+        stats['cache_hit_mask'] = stats.get('cache_hit_mask', []) + hit_mask
+    
+    return raw_outputs
+
+# ========== DUPLICATE & BOILERPLATE DETECTION ==========
+
+DEDUP_ENABLED = os.getenv("FINBERT_DEDUP", "off").lower() not in ("0", "off", "false", "no")
+# Estimated Jaccard similarity (word shingles) at which two chunks share one score
+DEDUP_THRESHOLD = float(os.getenv("FINBERT_DEDUP_THRESHOLD", "0.9"))
+BOILERPLATE_PATH = os.getenv(
+    "FINBERT_BOILERPLATE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "boilerplate_library.json")
+)
+# Offline curation learns a near-duplicate cluster seen in this many transcripts
+BOILERPLATE_MIN_REPEATS = int(os.getenv("FINBERT_BOILERPLATE_MIN_REPEATS", "3"))
+BOILERPLATE_MAX_ENTRIES = int(os.getenv("FINBERT_BOILERPLATE_MAX_ENTRIES", "500"))
+
+SHINGLE_SIZE = 3
+MINHASH_PERMUTATIONS = 64
+MINHASH_BANDS = 16
+_MINHASH_PRIME = np.uint64(4294967311)
+_minhash_rng = np.random.RandomState(20240501)
+_MINHASH_A = _minhash_rng.randint(1, 1 << 31, size=MINHASH_PERMUTATIONS).astype(np.uint64)
+_MINHASH_B = _minhash_rng.randint(0, 1 << 31, size=MINHASH_PERMUTATIONS).astype(np.uint64)
+
+# Lines every earnings call repeats; seeded into a new boilerplate library
+BOILERPLATE_SEED = [
+    "Before we begin, I would like to remind you that this call contains forward-looking statements "
+    "that are subject to risks and uncertainties that could cause actual results to differ materially.",
+    "Actual results may differ materially from those expressed or implied in any forward-looking statements. "
+    "We undertake no obligation to update these statements.",
+    "Thank you for standing by and welcome to the conference call. At this time all participants are in a listen-only mode.",
+    "If you would like to ask a question, please press star one on your telephone keypad.",
+    "Thank you. Our next question comes from the line of",
+    "Thank you for taking my question.",
+    "Thanks for taking my questions.",
+    "This concludes today's conference call. Thank you for participating. You may now disconnect."
+]
+
+def shingle_words(text: str) -> List[str]:
+    """Lowercased word tokens used for exact and near-duplicate matching"""
+    return re.findall(r"[a-z0-9']+", text.lower())
+
+def word_shingles(words: List[str]) -> set:
+    """Word n-grams of SHINGLE_SIZE (the whole text when it is shorter than one shingle)"""
+    return {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(max(1, len(words) - SHINGLE_SIZE + 1))}
+
+def minhash_signature(shingles: set) -> np.ndarray:
+    """MinHash signature of a shingle set"""
+    hashes = np.array(
+        [int.from_bytes(hashlib.md5(shingle.encode('utf-8')).digest()[:4], 'little') for shingle in shingles],
+        dtype=np.uint64
+    )
+    return ((np.outer(hashes, _MINHASH_A) + _MINHASH_B) % _MINHASH_PRIME).min(axis=0)
+
+def signature_bands(signature: np.ndarray) -> List[Tuple[int, bytes]]:
+    """LSH band keys: chunks sharing any band are near-duplicate candidates"""
+    rows = MINHASH_PERMUTATIONS // MINHASH_BANDS
+    return [(band, signature[band * rows:(band + 1) * rows].tobytes()) for band in range(MINHASH_BANDS)]
+
+class BoilerplateLibrary:
+    """
+    Persisted library of known boilerplate chunks (JSON at BOILERPLATE_PATH)
+    
+    Chunks matching an entry are scored with the entry's representative text,
+    which the chunk cache then serves without touching the model. A chunk
+    matches when it is a near-duplicate of the entry, or when all of its words
+    already appear in the entry. Entries come from BOILERPLATE_SEED and from
+    curate_boilerplate_library(); live requests only read the library.
+    """
+    
+    def __init__(self, path: str = BOILERPLATE_PATH, max_entries: int = BOILERPLATE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.entries: List[Dict[str, Any]] = []
+        self._signatures: Optional[np.ndarray] = None
+        self._dirty = False
+        self._load()
+    
+    def _load(self) -> None:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f).get('entries', [])
+        except FileNotFoundError:
+            self.entries = [{'text': text, 'source': 'seed'} for text in BOILERPLATE_SEED]
+            self._dirty = True
+        except Exception as e:
+            print(f"Boilerplate library unreadable ({e}), starting empty", file=sys.stderr)
+            self.entries = []
+        
+        self._shingles = [word_shingles(shingle_words(entry['text'])) for entry in self.entries]
+        self._signatures = np.array(
+            [minhash_signature(shingles) for shingles in self._shingles], dtype=np.uint64
+        ).reshape(len(self.entries), MINHASH_PERMUTATIONS)
+    
+    def match(self, signature: np.ndarray, shingles: set, threshold: float) -> Optional[int]:
+        """Index of the best matching entry, else None"""
+        with self._lock:
+            if not self.entries:
+                return None
+            # MinHash narrows the candidates; exact shingle overlap decides
+            similarities = (self._signatures == signature).mean(axis=1)
+            best, best_score = None, 0.0
+            for index in np.argsort(-similarities)[:5]:
+                if similarities[index] <= 0:
+                    break
+                entry_shingles = self._shingles[index]
+                overlap = len(entry_shingles & shingles)
+                # A chunk that adds its own content never inherits the entry's label
+                score = 1.0 if overlap == len(shingles) else overlap / len(entry_shingles | shingles)
+                if score >= threshold and score > best_score:
+                    best, best_score = int(index), score
+            return best
+    
+    def learn(self, text: str, signature: np.ndarray, shingles: set, threshold: float, repeats: int = 0) -> bool:
+        """Add a repeated chunk as boilerplate unless an entry already covers it"""
+        if self.match(signature, shingles, threshold) is not None:
+            return False
+        with self._lock:
+            self.entries.append({'text': text, 'source': 'learned', 'repeats': repeats,
+                                 'learned_at': int(time.time())})
+            self._shingles.append(shingles)
+            self._signatures = np.vstack([self._signatures, signature[np.newaxis, :]])
+            if len(self.entries) > self.max_entries:
+                # Evict the least repeated learned entries; seeds stay
+                learned = sorted(
+                    (i for i, entry in enumerate(self.entries) if entry.get('source') != 'seed'),
+                    key=lambda i: self.entries[i].get('repeats', 0)
+                )
+                drop = set(learned[:len(self.entries) - self.max_entries])
+                keep = [i for i in range(len(self.entries)) if i not in drop]
+                self.entries = [self.entries[i] for i in keep]
+                self._shingles = [self._shingles[i] for i in keep]
+                self._signatures = self._signatures[keep]
+            self._dirty = True
+        return True
+    
+    def text(self, index: int) -> str:
+        return self.entries[index]['text']
+    
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump({'entries': self.entries}, f, ensure_ascii=False, indent=1)
+                os.replace(tmp_path, self.path)
+                self._dirty = False
+            except Exception as e:
+                print(f"Could not save boilerplate library: {e}", file=sys.stderr)
+
+_boilerplate_library: Optional[BoilerplateLibrary] = None
+
+def get_boilerplate_library() -> BoilerplateLibrary:
+    global _boilerplate_library
+    if _boilerplate_library is None:
+        _boilerplate_library = BoilerplateLibrary()
+    return _boilerplate_library
+
+def deduplicate_chunks(chunks: List[str], input_ids: Optional[List[Optional[List[int]]]] = None,
+                       threshold: float = DEDUP_THRESHOLD, use_library: bool = True
+                       ) -> Tuple[List[str], List[Optional[List[int]]], List[int], Dict[str, Any]]:
+    """
+    Collapse exact and near-duplicate chunks so each cluster is scored once
+    
+    Returns:
+        Tuple: (unique_chunks, unique_input_ids, assignment, report) where
+        assignment[i] is the index in unique_chunks whose score chunk i reuses.
+        Chunks matching the boilerplate library map to the library's text.
+    """
+    library = get_boilerplate_library() if use_library else None
+    unique_chunks: List[str] = []
+    unique_ids: List[Optional[List[int]]] = []
+    assignment: List[int] = []
+    exact: Dict[str, int] = {}
+    buckets: Dict[Tuple[int, bytes], List[int]] = {}
+    signatures: Dict[int, np.ndarray] = {}
+    library_units: Dict[int, int] = {}
+    report = {'exact_duplicates': 0, 'near_duplicates': 0, 'boilerplate_matches': 0}
+    
+    for i, chunk in enumerate(chunks):
+        words = shingle_words(chunk)
+        normalized = ' '.join(words)
+        
+        if normalized and normalized in exact:
+            assignment.append(exact[normalized])
+            report['exact_duplicates'] += 1
+        else:
+            unit = None
+            shingles = word_shingles(words) if words else None
+            signature = minhash_signature(shingles) if words else None
+            
+            if signature is not None:
+                bands = signature_bands(signature)
+                candidates = {unit_index for band in bands for unit_index in buckets.get(band, [])}
+                unit = next((u for u in sorted(candidates)
+                             if float(np.mean(signatures[u] == signature)) >= threshold), None)
+                if unit is not None:
+                    report['near_duplicates'] += 1
+                elif library is not None:
+                    entry = library.match(signature, shingles, threshold)
+                    if entry is not None:
+                        report['boilerplate_matches'] += 1
+                        if entry not in library_units:
+                            library_units[entry] = len(unique_chunks)
+                            unique_chunks.append(library.text(entry))
+                            unique_ids.append(None)
+                        unit = library_units[entry]
+            
+            if unit is None:
+                unit = len(unique_chunks)
+                unique_chunks.append(chunk)
+                unique_ids.append(input_ids[i] if input_ids else None)
+                if signature is not None:
+                    signatures[unit] = signature
+                    for band in bands:
+                        buckets.setdefault(band, []).append(unit)
+            
+            assignment.append(unit)
+            if normalized:
+                exact[normalized] = unit
+    
+    own_text_units = len(unique_chunks) - len(library_units)
+    report.update({
+        'enabled': True,
+        'total_chunks': len(chunks),
+        'model_chunks': len(unique_chunks),
+        'skipped_chunks': len(chunks) - own_text_units,
+        'threshold': threshold,
+        'library_size': len(library.entries) if library is not None else 0
+    })
+    return unique_chunks, unique_ids, assignment, report
+
+def curate_boilerplate_library(texts: List[str], min_repeats: int = BOILERPLATE_MIN_REPEATS,
+                               threshold: float = DEDUP_THRESHOLD) -> Dict[str, Any]:
+    """
+    Learn boilerplate offline from a corpus of transcripts
+    
+    A near-duplicate cluster is added to the library when it occurs in at
+    least min_repeats different transcripts, so one request repeating itself
+    cannot teach the shared library anything.
+    
+    Returns:
+        Dict: Number of transcripts, learned entries and resulting library size
+    """
+    library = get_boilerplate_library()
+    chunks: List[str] = []
+    documents: List[int] = []
+    for doc, text in enumerate(texts):
+        _, indexed_chunks, _ = prepare_text_chunks(text)
+        chunks.extend(chunk for _, chunk in indexed_chunks)
+        documents.extend([doc] * len(indexed_chunks))
+    
+    unique_chunks, _, assignment, _ = deduplicate_chunks(chunks, threshold=threshold, use_library=False)
+    seen_in: Dict[int, set] = {}
+    for unit, doc in zip(assignment, documents):
+        seen_in.setdefault(unit, set()).add(doc)
+    
+    learned = 0
+    for unit, docs in sorted(seen_in.items(), key=lambda item: -len(item[1])):
+        words = shingle_words(unique_chunks[unit])
+        if len(docs) < min_repeats or not words:
+            continue
+        shingles = word_shingles(words)
+        if library.learn(unique_chunks[unit], minhash_signature(shingles), shingles, threshold, len(docs)):
+            learned += 1
+    library.save()
+    
+    return {'transcripts': len(texts), 'learned': learned, 'library_size': len(library.entries)}
+
+# ========== LEXICON CASCADE ==========
+
+# Word prefixes for the cheap first-stage scorer: the preprocess_financial_text
+# terms and cue words, plus common earnings-call vocabulary
+LEXICON_POSITIVE_PREFIXES = [
+    'growth', 'grow', 'increas', 'profit', 'beat', 'exceed', 'outperform', 'expan', 'opportunit',
+    'strong', 'solid', 'healthy', 'successful', 'great', 'good', 'better', 'improv', 'record',
+    'robust', 'gain', 'upside', 'momentum', 'accelerat', 'confident'
+]
+LEXICON_NEGATIVE_PREFIXES = [
+    'declin', 'decreas', 'loss', 'missed', 'underperform', 'challeng', 'risk', 'pressure',
+    'weak', 'poor', 'concern', 'worr', 'problem', 'headwind', 'slowdown', 'downturn',
+    'uncertain', 'impair', 'difficult'
+]
+LEXICON_LABELS = ('positive', 'negative', 'neutral')
+_LEXICON_POSITIVE_RE = re.compile(r"\b(?:" + "|".join(LEXICON_POSITIVE_PREFIXES) + r")\w*", re.IGNORECASE)
+_LEXICON_NEGATIVE_RE = re.compile(r"\b(?:" + "|".join(LEXICON_NEGATIVE_PREFIXES) + r")\w*", re.IGNORECASE)
+# Linear scorer: logits are term hits per 100 words times the weight; neutral has a fixed bias
+LEXICON_WEIGHT = 1.2
+LEXICON_NEUTRAL_BIAS = 1.0
+
+# Confidence band: lexicon results are kept only below this entropy (bits) and above this margin
+CASCADE_MAX_ENTROPY = float(os.getenv("FINBERT_CASCADE_MAX_ENTROPY", "1.0"))
+CASCADE_MIN_MARGIN = float(os.getenv("FINBERT_CASCADE_MIN_MARGIN", "0.4"))
+# Lexicon-accepted chunks also sent to FinBERT to measure agreement
+CASCADE_VALIDATION_SAMPLE = int(os.getenv("FINBERT_CASCADE_VALIDATION_SAMPLE", "16"))
+
+def lexicon_probabilities(chunks: List[str]) -> np.ndarray:
+    """
+    Score chunks with the financial lexicon
+    
+    Returns:
+        np.ndarray: N x 3 probabilities in LEXICON_LABELS order
+    """
+    counts = np.array([
+        (len(_LEXICON_POSITIVE_RE.findall(chunk)), len(_LEXICON_NEGATIVE_RE.findall(chunk)), max(1, len(chunk.split())))
+        for chunk in chunks
+    ], dtype=float).reshape(len(chunks), 3)
+    
+    rates = counts[:, :2] * (100.0 / counts[:, 2:3])
+    logits = np.column_stack([LEXICON_WEIGHT * rates, np.full(len(chunks), LEXICON_NEUTRAL_BIAS)])
+    logits -= logits.max(axis=1, keepdims=True)
+    probabilities = np.exp(logits)
+    return probabilities / probabilities.sum(axis=1, keepdims=True)
+
+def cascade_route(probabilities: np.ndarray, max_entropy: float = CASCADE_MAX_ENTROPY,
+                  min_margin: float = CASCADE_MIN_MARGIN) -> np.ndarray:
+    """Boolean mask of chunks whose lexicon result is confident enough to keep"""
+    clipped = np.maximum(probabilities, 1e-10)
+    entropy = -np.sum(clipped * np.log2(clipped), axis=1)
+    top_two = np.sort(probabilities, axis=1)[:, -2:]
+    margin = top_two[:, 1] - top_two[:, 0]
+    return (entropy <= max_entropy) & (margin >= min_margin)
+
+def top_label(raw_result: List[Dict[str, Any]]) -> str:
+    """Normalized label of the highest-scoring entry of an all-scores output"""
+    label = max(raw_result, key=lambda r: r['score'])['label'].lower()
+    return 'positive' if 'pos' in label else 'negative' if 'neg' in label else 'neutral'
+
+def run_cascade(chunks: List[str], input_ids: Optional[List[Optional[List[int]]]], batch_size: int,
+                options: Dict[str, Any], stats: Dict[str, Any], backend: str) -> Tuple[List[Any], Dict[str, Any]]:
+    """
+    Lexicon-first scoring: FinBERT only sees chunks outside the confidence band
+    
+    An evenly spaced sample of lexicon-accepted chunks is also scored with
+    FinBERT to report the label agreement rate; those chunks keep the FinBERT
+    output since it has been paid for.
+    
+    Returns:
+        Tuple: (raw outputs aligned with chunks, cascade report)
+    """
+    probabilities = lexicon_probabilities(chunks)
+    max_entropy = float(options.get('cascade_max_entropy', CASCADE_MAX_ENTROPY))
+    min_margin = float(options.get('cascade_min_margin', CASCADE_MIN_MARGIN))
+    accepted = cascade_route(probabilities, max_entropy, min_margin)
+    
+    escalated = [i for i in range(len(chunks)) if not accepted[i]]
+    accepted_indexes = [i for i in range(len(chunks)) if accepted[i]]
+    sample_size = min(len(accepted_indexes), int(options.get('cascade_validation_sample', CASCADE_VALIDATION_SAMPLE)))
+    validation = sorted({
+        accepted_indexes[int(position)]
+        for position in np.linspace(0, len(accepted_indexes) - 1, sample_size).round()
+    }) if sample_size > 0 else []
+    
+    raw_outputs: List[Any] = [
+        [{'label': label, 'score': float(score)} for label, score in zip(LEXICON_LABELS, row)]
+        for row in probabilities
+    ]
+    model_indexes = escalated + validation
+    model_outputs = run_finbert_batches(
+        [chunks[i] for i in model_indexes], batch_size, use_cache=options.get('use_cache', True),
+        stats=stats, backend=backend,
+        input_ids=[input_ids[i] for i in model_indexes] if input_ids else None,
+        length_bucketing=options.get('length_bucketing', True)
+    ) if model_indexes else []
+    
+    validation_set = set(validation)
+    agreements = 0
+    validated = 0
+    for i, output in zip(model_indexes, model_outputs):
+        if i in validation_set and pipeline_output(output) is not None:
+            validated += 1
+            agreements += top_label(pipeline_output(output)) == LEXICON_LABELS[int(np.argmax(probabilities[i]))]
+        raw_outputs[i] = output
+    
+    # Report cache hits against the full chunk list
+    model_hit_mask = stats.get('cache_hit_mask', [])
+    hit_mask = [False] * len(chunks)
+    for i, hit in zip(model_indexes, model_hit_mask):
+        hit_mask[i] = hit
+    stats['cache_hit_mask'] = hit_mask
+    
+    return raw_outputs, {
+        'enabled': True,
+        'total_chunks': len(chunks),
+        'escalated': len(escalated),
+        'escalated_fraction': round(len(escalated) / len(chunks), 3) if chunks else 0.0,
+        'lexicon_scored': len(accepted_indexes) - len(validation),
+        'validation_sample': validated,
+        'agreement_rate': round(agreements / validated, 3) if validated else None,
+        'band': {'max_entropy': max_entropy, 'min_margin': min_margin}
+    }
+
+def prepare_text_chunks(text: str, options: Optional[Dict[str, Any]] = None
+                        ) -> Tuple[str, List[Tuple[int, str]], Optional[List[List[int]]]]:
+    """
+    Preprocess text and split it into (chunk_index, chunk) pairs ready for inference
+    
+    Returns:
+        Tuple: (processed_text, indexed_chunks, chunk_input_ids) where
+        chunk_input_ids is aligned with indexed_chunks, or None when the
+        character splitter was used
+    """
+    with timed_stage('preprocess'):
+        processed_text = preprocess_financial_text(text)
+    return (processed_text,) + chunk_processed_text(processed_text, options)
+
+def chunk_processed_text(processed_text: str, options: Optional[Dict[str, Any]] = None
+                         ) -> Tuple[List[Tuple[int, str]], Optional[List[List[int]]]]:
+    """Split already preprocessed text into (indexed_chunks, chunk_input_ids) per options.chunker"""
+    options = options or {}
+    
+    with timed_stage('chunk'):
+        if options.get('chunker', 'tokens') == 'tokens':
+            token_chunks = token_budget_split(processed_text, options.get('max_tokens', DEFAULT_MAX_CHUNK_TOKENS))
+            if token_chunks is not None:
+                kept = [(i, chunk, ids) for i, (chunk, ids) in enumerate(token_chunks) if chunk.strip()]
+                count_stage('chunks', len(kept))
+                count_stage('tokens', sum(len(ids) for _, _, ids in kept))
+                return [(i, chunk) for i, chunk, _ in kept], [ids for _, _, ids in kept]
+        
+        chunks = fallback_text_split(processed_text, max_chars=1000)
+        
+        # Keep the original chunk positions so chunk_id matches the split
+        indexed_chunks = [(i, chunk) for i, chunk in enumerate(chunks) if chunk.strip()]
+        count_stage('chunks', len(indexed_chunks))
+        return indexed_chunks, None
+
+def assemble_text_analysis(text: str, processed_text: str, indexed_chunks: List[Tuple[int, str]],
+                           raw_outputs: List[Any], batch_size: int, vectorized: bool = True,
+                           diagnostics: Optional[frozenset] = None) -> Dict[str, Any]:
+    """Turn raw FinBERT outputs for one text's chunks into the analyze_text result"""
+    with timed_stage('postprocess'):
+        sentiments = score_chunk_outputs(indexed_chunks, raw_outputs, vectorized, diagnostics)
+    
+    if not sentiments:
+        return {"error": "No valid sentiment analysis results"}
+    
+    with timed_stage('summary'):
+        overall_sentiment = calculate_overall_sentiment(sentiments)
+        summary = generate_summary(text, sentiments)
+    
+    return {
+        "sentiments": sentiments,
+        "overall_sentiment": round(overall_sentiment, 3),
+        "summary": summary,
+        "metadata": text_analysis_metadata(
+            text, processed_text, len(sentiments),
+            np.mean([s.get('confidence', 0.5) for s in sentiments]), batch_size
+        )
+    }
+
+def text_analysis_metadata(text: str, processed_text: str, chunk_count: int, avg_confidence: float,
+                           batch_size: int) -> Dict[str, Any]:
+    """Base metadata block shared by analyze_text results and streamed summaries"""
+    return {
+        "total_chunks": chunk_count,
+        "text_length": len(text),
+        "processed_text_length": len(processed_text),
+        "text_modified": processed_text != text,
+        "avg_chunk_size": round(len(text) / chunk_count) if chunk_count else 0,
+        "model_used": "FinBERT",
+        "avg_confidence": round(avg_confidence, 3),
+        "device": "CPU",
+        "batch_size": batch_size,
+        "neutral_bias_reduction": "enabled"
+    }
+
+def score_chunk_outputs(indexed_chunks: List[Tuple[int, str]], raw_outputs: List[Any],
+                        vectorized: bool = True, diagnostics: Optional[frozenset] = None) -> List[Dict[str, Any]]:
+    """
+    Build per-chunk sentiment records from raw FinBERT outputs, in chunk order
+    
+    diagnostics limits which diagnostic blocks are computed (None: all of them).
+    """
+    # Score all full probability rows in one vectorized pass; anything else goes per chunk
+    precomputed: Dict[int, Dict[str, Any]] = {}
+    if vectorized:
+        rows_by_labels: Dict[Tuple[str, ...], List[Tuple[int, List[float]]]] = {}
+        for position, raw_output in enumerate(raw_outputs):
+            row = normalized_score_row(raw_output)
+            if row is not None:
+                rows_by_labels.setdefault(row[0], []).append((position, row[1]))
+        
+        for labels, rows in rows_by_labels.items():
+            matrix_results = analyze_finbert_matrix(np.array([scores for _, scores in rows]), labels, diagnostics)
+            for (position, _), result in zip(rows, matrix_results):
+                precomputed[position] = result
+    
+    sentiments = []
+    
+    for position, ((i, chunk), raw_output) in enumerate(zip(indexed_chunks, raw_outputs)):
+        try:
+            if isinstance(raw_output, Exception):
+                raise raw_output
+            
+            result = precomputed.get(position) or finbert_result_from_raw(raw_output, diagnostics)
+            sentiments.append(build_chunk_sentiment(i + 1, chunk, result, diagnostics))
+            
+        except Exception as e:
+            print(f"Error processing chunk {i}: {e}", file=sys.stderr)
+            
+            sentiments.append(build_chunk_error(i + 1, chunk, e))
+    
+    return sentiments
+
+def padding_summary(inference_stats: Dict[str, Any], length_bucketing: bool) -> Dict[str, Any]:
+    """Padding efficiency (real tokens / padded tokens) for the batches a request ran"""
+    padded_tokens = inference_stats.get('padded_tokens', 0)
+    unbucketed_padded_tokens = inference_stats.get('unbucketed_padded_tokens', 0)
+    real_tokens = inference_stats.get('real_tokens', 0)
+    return {
+        'length_bucketing': bool(length_bucketing),
+        'real_tokens': real_tokens,
+        'padded_tokens': padded_tokens,
+        'efficiency': round(real_tokens / padded_tokens, 3) if padded_tokens else None,
+        'unbucketed_efficiency': round(real_tokens / unbucketed_padded_tokens, 3) if unbucketed_padded_tokens else None
+    }
+
+def process_pool_summary(inference_stats: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Per-worker utilization for a request that ran on the inference pool, else None"""
+    reports = inference_stats.get('process_pool')
+    if not reports or _inference_pool is None:
+        return None
+    return _inference_pool.merge_reports(reports)
+
+def analyze_text_batch(texts: List[str], options: Optional[Dict[str, Any]] = None,
+                       internal: bool = False) -> List[Dict[str, Any]]:
+    """
+    Analyze several texts with one shared batched FinBERT pass
+    
+    Chunks from every text are collected first, scored together, and scattered
+    back, so many short texts cost a handful of forward passes instead of one
+    pipeline call each.
+    
+    Args:
+        texts: Texts to analyze
+        options: analyze_text options; fields/compact project the chunk records
+        internal: The caller only aggregates the chunk records (per-speaker,
+                  audio transcript), so diagnostics are skipped and no
+                  projection is applied
+    
+    Returns:
+        List[Dict]: One analyze_text-style result per input text, in order
+    """
+    options = options or {}
+    batch_size = max(1, int(options.get('batch_size', DEFAULT_BATCH_SIZE)))
+    fields = None if internal else requested_chunk_fields(options)
+    diagnostics = frozenset() if internal else requested_diagnostics(fields)
+    
+    results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+    prepared = []
+    all_chunks: List[str] = []
+    all_input_ids: List[Optional[List[int]]] = []
+    
+    for idx, text in enumerate(texts):
+        try:
+            if not text or not text.strip():
+                results[idx] = {"error": "Empty text provided"}
+                continue
+            
+            processed_text, indexed_chunks, chunk_input_ids = prepare_text_chunks(text, options)
+            
+            if not indexed_chunks:
+                results[idx] = {"error": "No valid text chunks found after processing"}
+                continue
+            
+            prepared.append((idx, text, processed_text, indexed_chunks, len(all_chunks)))
+            all_chunks.extend(chunk for _, chunk in indexed_chunks)
+            all_input_ids.extend(chunk_input_ids or [None] * len(indexed_chunks))
+        except Exception as e:
+            results[idx] = {"error": str(e), "type": "text_analysis_error"}
+    
+    backend = resolve_backend(options.get('backend'))
+    inference_stats: Dict[str, Any] = {}
+    
+    # Score one representative per duplicate/boilerplate cluster and fan the outputs back out
+    dedup_report: Dict[str, Any] = {'enabled': False}
+    model_chunks, model_input_ids, assignment = all_chunks, all_input_ids, list(range(len(all_chunks)))
+    if options.get('dedup', DEDUP_ENABLED) and all_chunks:
+        with timed_stage('dedup'):
+            model_chunks, model_input_ids, assignment, dedup_report = deduplicate_chunks(
+                all_chunks, all_input_ids,
+                threshold=float(options.get('dedup_threshold', DEDUP_THRESHOLD)),
+                use_library=options.get('boilerplate_library', True)
+            )
+    
+    cascade_report: Dict[str, Any] = {'enabled': False}
+    if options.get('cascade') and model_chunks:
+        with timed_stage('cascade'):
+            model_outputs, cascade_report = run_cascade(
+                model_chunks, model_input_ids, batch_size, options, inference_stats, backend
+            )
+    else:
+        model_outputs = run_finbert_batches(
+            model_chunks, batch_size, use_cache=options.get('use_cache', True),
+            stats=inference_stats, backend=backend, input_ids=model_input_ids,
+            length_bucketing=options.get('length_bucketing', True)
+        ) if model_chunks else []
+    raw_outputs = [model_outputs[unit] for unit in assignment]
+    padding = padding_summary(inference_stats, options.get('length_bucketing', True))
+    pool_utilization = process_pool_summary(inference_stats)
+    model_hit_mask = inference_stats.get('cache_hit_mask', [])
+    hit_mask = [model_hit_mask[unit] for unit in assignment] if model_hit_mask else []
+    
+    for idx, text, processed_text, indexed_chunks, offset in prepared:
+        try:
+            results[idx] = assemble_text_analysis(
+                text, processed_text, indexed_chunks,
+                raw_outputs[offset:offset + len(indexed_chunks)], batch_size,
+                vectorized=options.get('vectorized_scoring', True), diagnostics=diagnostics
+            )
+            if 'metadata' in results[idx]:
+                results[idx]['metadata']['inference_backend'] = backend
+                results[idx]['metadata']['chunker'] = 'tokens' if all_input_ids[offset] is not None else 'chars'
+                results[idx]['metadata']['padding'] = padding
+                results[idx]['metadata']['dedup'] = dedup_report
+                results[idx]['metadata']['cascade'] = cascade_report
+                if pool_utilization is not None:
+                    results[idx]['metadata']['process_pool'] = pool_utilization
+                chunk_hits = sum(hit_mask[offset:offset + len(indexed_chunks)])
+                results[idx]['metadata']['cache'] = {
+                    'enabled': inference_stats.get('cache_enabled', False),
+                    'hits': chunk_hits,
+                    'misses': len(indexed_chunks) - chunk_hits
+                }
+                project_text_analysis(results[idx], text, processed_text, fields)
+        except Exception as e:
+            results[idx] = {"error": str(e), "type": "text_analysis_error"}
+    
+    return results
+
+def analyze_text(text: str, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Analyze sentiment of text using FinBERT only with reduced neutral bias"""
+    try:
+        return analyze_text_batch([text], options)[0]
     except Exception as e:
         return {"error": str(e), "type": "text_analysis_error"}
 
@@ -742,54 +2681,199 @@ def generate_summary(text: str, sentiments: List[Dict[str, Any]]) -> Dict[str, A
     except Exception as e:
         return {"error": str(e), "type": "summary_error"}
 
-def analyze_per_speaker(text: str) -> Dict[str, Any]:
-    """Analyze sentiment per speaker with improved speaker detection"""
-    try:
-        speaker_segments = []
-        current_speaker = None
-        current_segment = []
+class SentimentAggregator:
+    """
+    One-pass, O(k) memory equivalent of calculate_overall_sentiment + generate_summary
+    
+    Feed sentiment records with add() as they are produced; overall_sentiment()
+    and summary() return what the two functions would return for the full
+    list, without keeping the list. most_positive/most_negative come from
+    bounded min-heaps; ties keep arrival order like the stable sort does.
+    """
+    
+    def __init__(self, speaker_weights: Optional[Dict[str, float]] = None, top_k: int = 3, key_points: int = 5):
+        self.speaker_weights = speaker_weights
+        self.top_k = top_k
+        self.max_key_points = key_points
+        self.records = 0
+        self.confidence_total = 0.0
+        self.entropy_total = 0.0
+        self.weighted_score_total = 0.0
+        self.weighted_count = 0
+        self.total_weight = 0.0
+        self.label_counts = {'positive': 0, 'negative': 0, 'neutral': 0}
+        self.valid = 0
+        self.valid_confidence_total = 0.0
+        self.min_confidence: Optional[float] = None
+        self.max_confidence: Optional[float] = None
+        self.high_confidence_chunks = 0
+        self.key_points: List[str] = []
+        self.top_positive: List[Tuple[float, int, Dict[str, Any]]] = []
+        self.top_negative: List[Tuple[float, int, Dict[str, Any]]] = []
+    
+    def copy(self) -> 'SentimentAggregator':
+        clone = copy.copy(self)
+        clone.label_counts = dict(self.label_counts)
+        clone.key_points = list(self.key_points)
+        clone.top_positive = list(self.top_positive)
+        clone.top_negative = list(self.top_negative)
+        return clone
+    
+    def add(self, sentiment: Dict[str, Any]) -> 'SentimentAggregator':
+        """Consume one sentiment record"""
+        self.records += 1
+        self.confidence_total += sentiment.get('confidence', 0.5)
+        self.entropy_total += sentiment.get('entropy', 1.0)
+        if 'error' in sentiment:
+            return self
+        
+        # calculate_overall_sentiment terms
+        speaker = sentiment.get('speaker', 'Unknown')
+        speaker_weight = 1.0
+        if self.speaker_weights and speaker in self.speaker_weights:
+            speaker_weight = self.speaker_weights[speaker]
+        sentiment_numeric, certainty_weight = sentiment_components(sentiment)
+        composite_weight = speaker_weight * certainty_weight
+        self.weighted_score_total += sentiment_numeric * composite_weight
+        self.weighted_count += 1
+        self.total_weight += composite_weight
+        
+        # generate_summary terms
+        label = sentiment['label']
+        confidence = sentiment.get('confidence', 0.5)
+        self.label_counts[label] = self.label_counts.get(label, 0) + 1
+        self.valid += 1
+        self.valid_confidence_total += confidence
+        self.min_confidence = confidence if self.min_confidence is None else min(self.min_confidence, confidence)
+        self.max_confidence = confidence if self.max_confidence is None else max(self.max_confidence, confidence)
+        if confidence > 0.8:
+            self.high_confidence_chunks += 1
+        
+        text = sentiment['text']
+        if len(self.key_points) < self.max_key_points and len(text.split()) > 10:
+            self.key_points.append(text[:200] + '...' if len(text) > 200 else text)
+        
+        heap = self.top_positive if label == 'positive' else self.top_negative if label == 'negative' else None
+        if heap is not None:
+            entry = (sentiment['score'], -self.valid, {
+                'text': text[:150] + '...' if len(text) > 150 else text,
+                'score': round(sentiment['score'], 3),
+                'confidence': round(confidence, 3)
+            })
+            if len(heap) < self.top_k:
+                heapq.heappush(heap, entry)
+            elif entry[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, entry)
+        return self
+    
+    def overall_sentiment(self) -> float:
+        """Same value as calculate_overall_sentiment over everything added"""
+        if self.weighted_count and self.total_weight > 0:
+            overall_score = self.weighted_score_total / self.total_weight
+        elif self.weighted_count:
+            overall_score = self.weighted_score_total / self.weighted_count
+        else:
+            overall_score = 0.0
+        return max(-1.0, min(1.0, overall_score))
+    
+    def avg_confidence(self) -> float:
+        """Mean confidence over all records, errors included (the metadata figure)"""
+        return self.confidence_total / self.records if self.records else 0.0
+    
+    def avg_entropy(self) -> float:
+        return self.entropy_total / self.records if self.records else 0.0
+    
+    def summary(self) -> Dict[str, Any]:
+        """Same structure and values as generate_summary over everything added"""
+        total_chunks = self.valid
+        if total_chunks == 0:
+            return generate_summary("", [])
         
-        lines = text.split('\n')
+        def ranked(heap: List[Tuple[float, int, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+            return [entry for _, _, entry in sorted(heap, key=lambda item: (-item[0], -item[1]))]
         
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            
-            # Enhanced speaker detection
-            speaker_patterns = [
-                r'^([A-Z][a-zA-Z\s]+):\s*$',
-                r'^([A-Z][a-zA-Z\s]+)\s*-\s*',
-                r'^\[([A-Z][a-zA-Z\s]+)\]',
-                r'^([A-Z]+):\s*$'
-            ]
-            
-            is_speaker_line = False
-            for pattern in speaker_patterns:
-                match = re.match(pattern, line)
-                if match and len(match.group(1)) < 50:
-                    if current_speaker and current_segment:
-                        speaker_segments.append({
-                            'speaker': current_speaker,
-                            'text': ' '.join(current_segment)
-                        })
-                    current_speaker = match.group(1).strip()
-                    current_segment = []
-                    is_speaker_line = True
-                    break
-            
-            if not is_speaker_line and current_speaker:
-                current_segment.append(line)
-        
-        # Add the last segment
-        if current_speaker and current_segment:
-            speaker_segments.append({
-                'speaker': current_speaker,
-                'text': ' '.join(current_segment)
-            })
+        positive = self.label_counts.get('positive', 0)
+        negative = self.label_counts.get('negative', 0)
+        neutral = self.label_counts.get('neutral', 0)
+        return {
+            'key_points': list(self.key_points),
+            'most_positive': ranked(self.top_positive),
+            'most_negative': ranked(self.top_negative),
+            'sentiment_distribution': {
+                'positive': positive,
+                'negative': negative,
+                'neutral': neutral,
+                'total': total_chunks
+            },
+            'sentiment_ratios': {
+                'positive_ratio': round(positive / total_chunks, 3),
+                'negative_ratio': round(negative / total_chunks, 3),
+                'neutral_ratio': round(neutral / total_chunks, 3)
+            },
+            'confidence_metrics': {
+                'avg_confidence': round(self.valid_confidence_total / total_chunks, 3),
+                'min_confidence': round(self.min_confidence, 3),
+                'max_confidence': round(self.max_confidence, 3),
+                'high_confidence_chunks': self.high_confidence_chunks
+            }
+        }
+
+def split_speaker_segments(text: str) -> List[Dict[str, str]]:
+    """Split a transcript into consecutive {'speaker', 'text'} segments"""
+    speaker_segments = []
+    current_speaker = None
+    current_segment = []
+    
+    lines = text.split('\n')
+    
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        
+        # Enhanced speaker detection
+        speaker_patterns = [
+            r'^([A-Z][a-zA-Z\s]+):\s*$',
+            r'^([A-Z][a-zA-Z\s]+)\s*-\s*',
+            r'^\[([A-Z][a-zA-Z\s]+)\]',
+            r'^([A-Z]+):\s*$'
+        ]
+        
+        is_speaker_line = False
+        for pattern in speaker_patterns:
+            match = re.match(pattern, line)
+            if match and len(match.group(1)) < 50:
+                if current_speaker and current_segment:
+                    speaker_segments.append({
+                        'speaker': current_speaker,
+                        'text': ' '.join(current_segment)
+                    })
+                current_speaker = match.group(1).strip()
+                current_segment = []
+                is_speaker_line = True
+                break
+        
+        if not is_speaker_line and current_speaker:
+            current_segment.append(line)
+    
+    # Add the last segment
+    if current_speaker and current_segment:
+        speaker_segments.append({
+            'speaker': current_speaker,
+            'text': ' '.join(current_segment)
+        })
+    
+    return speaker_segments
+
+def analyze_per_speaker(text: str, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Analyze sentiment per speaker with improved speaker detection"""
+    options = options or {}
+    
+    try:
+        speaker_segments = split_speaker_segments(text)
         
         if not speaker_segments:
-            return analyze_text(text)
+            return analyze_text(text, options)
         
         # Analyze each speaker's sentiment with role weighting
         speaker_results = []
@@ -797,10 +2881,17 @@ def analyze_per_speaker(text: str) -> Dict[str, Any]:
         speaker_weights = {}
         speaker_roles = {}
         
-        for segment in speaker_segments:
-            if not segment['text'].strip():
-                continue
-                
+        valid_segments = [segment for segment in speaker_segments if segment['text'].strip()]
+        
+        # Score every segment's chunks in one shared batched pass unless disabled
+        cross_speaker_batching = options.get('cross_speaker_batching', True)
+        if cross_speaker_batching:
+            segment_results = analyze_text_batch([segment['text'] for segment in valid_segments], options, internal=True)
+        else:
+            segment_results = [analyze_text_batch([segment['text']], options, internal=True)[0]
+                               for segment in valid_segments]
+        
+        for segment, sentiment_result in zip(valid_segments, segment_results):
             speaker_name = segment['speaker']
             speaker_text = segment['text']
             
@@ -811,7 +2902,6 @@ def analyze_per_speaker(text: str) -> Dict[str, Any]:
             
             print(f"Speaker: {speaker_name} | Role: {speaker_role} | Weight: {speaker_weight}", file=sys.stderr)
             
-            sentiment_result = analyze_text(speaker_text)
             if 'error' not in sentiment_result:
                 # Add speaker information to each sentiment
                 for sentiment in sentiment_result.get('sentiments', []):
@@ -840,7 +2930,9 @@ def analyze_per_speaker(text: str) -> Dict[str, Any]:
                 all_sentiments.extend(sentiment_result.get('sentiments', []))
         
         # Calculate weighted overall sentiment using speaker weights
-        overall_sentiment = calculate_overall_sentiment(all_sentiments, speaker_weights)
+        with timed_stage('summary'):
+            overall_sentiment = calculate_overall_sentiment(all_sentiments, speaker_weights)
+            summary = generate_summary(text, all_sentiments)
         
         # Calculate role-based summary statistics
         role_stats = {}
@@ -858,7 +2950,7 @@ def analyze_per_speaker(text: str) -> Dict[str, Any]:
         return {
             "speaker_analysis": speaker_results,
             "overall_sentiment": round(overall_sentiment, 3),
-            "summary": generate_summary(text, all_sentiments),
+            "summary": summary,
             "speaker_weights": speaker_weights,
             "speaker_roles": speaker_roles,
             "role_statistics": role_stats,
@@ -869,6 +2961,16 @@ def analyze_per_speaker(text: str) -> Dict[str, Any]:
                 "model_used": "FinBERT_Enhanced",
                 "device": "CPU",
                 "speaker_weighting_enabled": True,
+                "cross_speaker_batching": bool(cross_speaker_batching),
+                "inference_backend": resolve_backend(options.get('backend')),
+                "padding": next((r['metadata']['padding'] for r in segment_results if 'padding' in r.get('metadata', {})), None),
+                "process_pool": next((r['metadata']['process_pool'] for r in segment_results if 'process_pool' in r.get('metadata', {})), None),
+                "dedup": next((r['metadata']['dedup'] for r in segment_results if 'dedup' in r.get('metadata', {})), None),
+                "cascade": next((r['metadata']['cascade'] for r in segment_results if 'cascade' in r.get('metadata', {})), None),
+                "cache": {
+                    'hits': sum(r.get('metadata', {}).get('cache', {}).get('hits', 0) for r in segment_results),
+                    'misses': sum(r.get('metadata', {}).get('cache', {}).get('misses', 0) for r in segment_results)
+                },
                 "entropy_adjustment_enabled": True,
                 "role_weighting_enabled": True,
                 "ceo_cfo_detected": any(role in ['CEO', 'CFO'] for role in speaker_roles.values()),
@@ -881,22 +2983,486 @@ def analyze_per_speaker(text: str) -> Dict[str, Any]:
     except Exception as e:
         return {"error": str(e), "type": "speaker_analysis_error"}
 
+# ========== OUTPUT PROJECTION ==========
+
+# Diagnostic blocks of a chunk record; they are only computed when requested
+CHUNK_DIAGNOSTIC_FIELDS = ('debug_info', 'decision_info', 'enhanced_metrics')
+# Chunk record in compact mode: the text is referenced by [start, end) character offsets
+COMPACT_CHUNK_FIELDS = ('chunk_id', 'start', 'end', 'label', 'score', 'confidence', 'entropy')
+
+def requested_chunk_fields(options: Optional[Dict[str, Any]]) -> Optional[Tuple[str, ...]]:
+    """
+    Per-chunk keys requested through options.fields or options.compact
+    
+    options.fields is a list (or comma-separated string) of record keys;
+    'start' and 'end' ask for character offsets. options.compact without
+    fields selects COMPACT_CHUNK_FIELDS.
+    
+    Returns:
+        Tuple of keys, or None for the full default record
+    """
+    options = options or {}
+    fields = options.get('fields')
+    if isinstance(fields, str):
+        fields = [field.strip() for field in fields.split(',') if field.strip()]
+    if fields:
+        return tuple(str(field) for field in fields)
+    if options.get('compact'):
+        return COMPACT_CHUNK_FIELDS
+    return None
+
+def requested_diagnostics(fields: Optional[Tuple[str, ...]]) -> Optional[frozenset]:
+    """Diagnostic blocks to compute for a field projection (None: all, for full records)"""
+    if fields is None:
+        return None
+    return frozenset(field for field in fields if field in CHUNK_DIAGNOSTIC_FIELDS)
+
+def wants_offsets(fields: Optional[Tuple[str, ...]]) -> bool:
+    return bool(fields) and ('start' in fields or 'end' in fields)
+
+class ChunkLocator:
+    """Resolve chunk texts, in split order, to [start, end) offsets in the text they came from"""
+    
+    def __init__(self, text: str):
+        self.text = text
+        self.cursor = 0
+    
+    def locate(self, chunk: str) -> Optional[Tuple[int, int]]:
+        start = self.text.find(chunk, self.cursor)
+        if start >= 0:
+            end = start + len(chunk)
+        else:
+            # The character splitter re-appends '. ' to sentences, so a chunk can
+            # end in periods the text does not have at that position
+            stem = chunk.rstrip('.')
+            start = self.text.find(stem, self.cursor) if stem else -1
+            if start < 0:
+                return None
+            end = start + len(stem)
+            while end < len(self.text) and self.text[end] == '.' and end - start < len(chunk):
+                end += 1
+        
+        self.cursor = end
+        return start, end
+
+def project_chunk_record(record: Dict[str, Any], fields: Tuple[str, ...],
+                         span: Optional[Tuple[int, int]] = None) -> Dict[str, Any]:
+    """Keep only the requested keys of a chunk record; 'start'/'end' come from span"""
+    projected = {}
+    for field in fields:
+        if field == 'start' or field == 'end':
+            if span is not None:
+                projected[field] = span[0] if field == 'start' else span[1]
+        elif field in record:
+            projected[field] = record[field]
+    
+    if 'error' in record:
+        projected['error'] = record['error']
+    # Without resolvable offsets the text is kept so the record still says what was scored
+    if span is None and wants_offsets(fields) and 'text' not in projected:
+        projected['text'] = record.get('text', '')
+    return projected
+
+def project_text_analysis(result: Dict[str, Any], text: str, processed_text: Optional[str],
+                          fields: Optional[Tuple[str, ...]]) -> Dict[str, Any]:
+    """
+    Apply a chunk field projection to an analyze_text result, in place
+    
+    Offsets index the preprocessed text. That is the input itself unless
+    preprocessing rewrote financial terms, in which case the processed text
+    is returned once as `processed_text` (metadata.offsets says which).
+    processed_text=None means the chunks don't come from one contiguous text
+    (speaker segments), so records keep their text instead of offsets.
+    """
+    if fields is None or 'sentiments' not in result:
+        return result
+    
+    locator = ChunkLocator(processed_text) if wants_offsets(fields) and processed_text is not None else None
+    result['sentiments'] = [
+        project_chunk_record(sentiment, fields, locator.locate(sentiment.get('text', '')) if locator else None)
+        for sentiment in result['sentiments']
+    ]
+    
+    metadata = result.setdefault('metadata', {})
+    metadata['fields'] = list(fields)
+    if locator is not None:
+        metadata['offsets'] = 'text' if processed_text == text else 'processed_text'
+        if processed_text != text:
+            result['processed_text'] = processed_text
+    return result
+
+# ========== APPROXIMATE SENTIMENT ==========
+
+APPROX_POSITION_STRATA = 5
+APPROX_DEFAULT_TOLERANCE = 0.05
+APPROX_DEFAULT_MAX_SAMPLE = 256
+APPROX_DEFAULT_MIN_SAMPLE = 32
+APPROX_Z_95 = 1.96
+
+def stratified_ratio_estimate(strata: Dict[Any, Dict[str, Any]]) -> Tuple[float, float]:
+    """
+    Stratified ratio estimate of sum(w * x) / sum(w) and its standard error
+    
+    Each stratum holds its population size 'N' and the sampled 'x' and 'w'
+    values. The variance uses the linearized residuals x*w - R*w with a
+    finite population correction; strata with fewer than two samples borrow
+    the pooled residual variance.
+    """
+    sampled = [h for h in strata.values() if h['x']]
+    weighted_total = sum(h['N'] * np.mean(h['w']) for h in sampled)
+    if weighted_total <= 0:
+        return 0.0, float('inf')
+    ratio = sum(h['N'] * np.mean(np.array(h['x']) * np.array(h['w'])) for h in sampled) / weighted_total
+    
+    residuals = {key: np.array(h['x']) * np.array(h['w']) - ratio * np.array(h['w']) for key, h in strata.items() if h['x']}
+    all_residuals = np.concatenate(list(residuals.values()))
+    pooled_variance = float(np.var(all_residuals, ddof=1)) if len(all_residuals) > 1 else float('inf')
+    
+    variance = 0.0
+    for key, h in strata.items():
+        n = len(h['x'])
+        if n == 0:
+            # Unsampled stratum: no information, treat it like the pooled population
+            variance += h['N'] ** 2 * pooled_variance
+            continue
+        stratum_variance = float(np.var(residuals[key], ddof=1)) if n > 1 else pooled_variance
+        variance += h['N'] ** 2 * (1 - n / h['N']) * stratum_variance / n
+    
+    return float(ratio), float(np.sqrt(variance)) / weighted_total
+
+def approximate_sentiment(text: str, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Estimate overall sentiment from a stratified sample of chunks
+    
+    Chunks are stratified by position in the text and by speaker role
+    (classify_speaker_role), then sampled in rounds proportional to stratum
+    size. Sampling stops once at least options.min_sample_size chunks are
+    scored and the 95% confidence interval half-width is at most
+    options.tolerance, or at options.max_sample_size chunks, so latency stays
+    bounded however long the input is.
+    
+    Returns:
+        Dict: overall_sentiment, confidence_interval, sample_size, the sampled
+        sentiments and their summary
+    """
+    options = options or {}
+    
+    try:
+        if not text or not text.strip():
+            return {"error": "Empty text provided"}
+        
+        batch_size = max(1, int(options.get('batch_size', DEFAULT_BATCH_SIZE)))
+        tolerance = float(options.get('tolerance', APPROX_DEFAULT_TOLERANCE))
+        max_sample = max(1, int(options.get('max_sample_size', APPROX_DEFAULT_MAX_SAMPLE)))
+        min_sample = int(options.get('min_sample_size', APPROX_DEFAULT_MIN_SAMPLE))
+        round_size = max(1, int(options.get('sample_round_size', batch_size)))
+        backend = resolve_backend(options.get('backend'))
+        rng = np.random.RandomState(int(options.get('seed', 0)))
+        fields = requested_chunk_fields(options)
+        
+        segments = [segment for segment in split_speaker_segments(text) if segment['text'].strip()]
+        if not segments:
+            segments = [{'speaker': None, 'text': text}]
+        
+        # Population: every chunk with its speaker role, weight and global position
+        population = []
+        for segment in segments:
+            if segment['speaker'] is not None:
+                role, role_weight = classify_speaker_role(segment['speaker'], segment['text'])
+            else:
+                role, role_weight = 'Unknown', 1.0
+            speaker_weight = role_weight if options.get('per_speaker') else 1.0
+            
+            processed_text, indexed_chunks, chunk_input_ids = prepare_text_chunks(segment['text'], options)
+            for position, (i, chunk) in enumerate(indexed_chunks):
+                population.append({
+                    'chunk_id': i + 1, 'chunk': chunk,
+                    'ids': chunk_input_ids[position] if chunk_input_ids else None,
+                    'speaker': segment['speaker'], 'role': role, 'weight': speaker_weight
+                })
+        
+        if not population:
+            return {"error": "No valid text chunks found after processing"}
+        
+        strata: Dict[Any, Dict[str, Any]] = {}
+        for order, item in enumerate(population):
+            key = (min(APPROX_POSITION_STRATA - 1, order * APPROX_POSITION_STRATA // len(population)), item['role'])
+            strata.setdefault(key, {'N': 0, 'pending': [], 'taken': 0, 'x': [], 'w': []})
+            strata[key]['N'] += 1
+            strata[key]['pending'].append(order)
+        for h in strata.values():
+            rng.shuffle(h['pending'])
+        
+        sampled: List[Tuple[int, Dict[str, Any]]] = []
+        inference_stats: Dict[str, Any] = {}
+        rounds = 0
+        ratio, standard_error = 0.0, float('inf')
+        
+        while len(sampled) < min(max_sample, len(population)):
+            # Allocate the round proportionally to stratum size, two per stratum first
+            budget = min(round_size, max_sample - len(sampled))
+            picks: List[Tuple[int, Dict[str, Any]]] = []
+            
+            def take(h: Dict[str, Any]) -> None:
+                h['taken'] += 1
+                picks.append((h['pending'].pop(), h))
+            
+            for h in strata.values():
+                while h['taken'] < 2 and h['pending'] and len(picks) < budget:
+                    take(h)
+            remaining = budget - len(picks)
+            pending_total = sum(len(h['pending']) for h in strata.values())
+            if remaining > 0 and pending_total:
+                for h in list(strata.values()):
+                    share = int(remaining * len(h['pending']) / pending_total)
+                    for _ in range(min(share, len(h['pending']))):
+                        take(h)
+                # Rounding leftovers go to the largest pending strata
+                for h in sorted(strata.values(), key=lambda h: -len(h['pending'])):
+                    if len(picks) >= budget:
+                        break
+                    if h['pending']:
+                        take(h)
+            if not picks:
+                break
+            
+            items = [population[order] for order, _ in picks]
+            raw_outputs = run_finbert_batches(
+                [item['chunk'] for item in items], batch_size,
+                use_cache=options.get('use_cache', True), stats=inference_stats, backend=backend,
+                input_ids=[item['ids'] for item in items] if all(item['ids'] for item in items) else None,
+                length_bucketing=options.get('length_bucketing', True)
+            )
+            with timed_stage('postprocess'):
+                chunk_sentiments = score_chunk_outputs(
+                    [(item['chunk_id'] - 1, item['chunk']) for item in items], raw_outputs,
+                    options.get('vectorized_scoring', True), requested_diagnostics(fields)
+                )
+            
+            for (order, h), item, sentiment in zip(picks, items, chunk_sentiments):
+                if item['speaker'] is not None:
+                    sentiment['speaker'] = item['speaker']
+                    sentiment['speaker_role'] = item['role']
+                    sentiment['speaker_role_weight'] = item['weight']
+                sampled.append((order, sentiment))
+                if 'error' in sentiment:
+                    continue
+                sentiment_numeric, certainty_weight = sentiment_components(sentiment)
+                h['x'].append(sentiment_numeric)
+                h['w'].append(item['weight'] * certainty_weight)
+            
+            rounds += 1
+            ratio, standard_error = stratified_ratio_estimate(strata)
+            if APPROX_Z_95 * standard_error <= tolerance and len(sampled) >= min_sample:
+                break
+        
+        sentiments = [sentiment for _, sentiment in sorted(sampled, key=lambda pair: pair[0])]
+        with timed_stage('summary'):
+            summary = generate_summary(text, sentiments)
+        half_width = APPROX_Z_95 * standard_error
+        overall_sentiment = float(max(-1.0, min(1.0, ratio)))
+        exact = len(sampled) == len(population)
+        
+        result = {
+            "overall_sentiment": round(overall_sentiment, 3),
+            "confidence_interval": [
+                round(float(max(-1.0, overall_sentiment - half_width)), 3),
+                round(float(min(1.0, overall_sentiment + half_width)), 3)
+            ] if np.isfinite(half_width) else [-1.0, 1.0],
+            "confidence_level": 0.95,
+            "sample_size": len(sampled),
+            "population_chunks": len(population),
+            "sentiments": sentiments,
+            "summary": summary,
+            "metadata": {
+                "analysis_type": "approximate_stratified",
+                "model_used": "FinBERT",
+                "tolerance": tolerance,
+                "max_sample_size": max_sample,
+                "converged": bool(half_width <= tolerance),
+                "exact": exact,
+                "rounds": rounds,
+                "strata": len(strata),
+                "sampling_fraction": round(len(sampled) / len(population), 3),
+                "inference_backend": backend,
+                "cache": {
+                    'hits': inference_stats.get('cache_hits', 0),
+                    'misses': inference_stats.get('cache_misses', 0)
+                }
+            }
+        }
+        
+        return project_text_analysis(
+            result, text, processed_text if segments[0]['speaker'] is None else None, fields
+        )
+        
+    except Exception as e:
+        return {"error": str(e), "type": "approximate_analysis_error"}
+
 def analyze_sentiment(text: str, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """Main sentiment analysis function with options"""
     options = options or {}
     
     try:
-        if options.get('per_speaker'):
-            return analyze_per_speaker(text)
+        if options.get('approximate'):
+            analyze = approximate_sentiment
+        elif options.get('per_speaker'):
+            analyze = analyze_per_speaker
         else:
-            return analyze_text(text)
+            analyze = analyze_text
+        
+        result, timings = profiled_call(options, 'analyze', analyze, text, options)
+        
+        if timings is not None and 'metadata' in result:
+            result['metadata']['timings'] = timings
+        if options.get('report_startup') and 'metadata' in result:
+            result['metadata']['startup'] = startup_profile(warmup=False)
+        
+        return result
     except Exception as e:
         return {"error": str(e), "type": "analysis_error"}
 
+# ========== STREAMING RESULTS ==========
+
+def is_streaming_request(data: Dict[str, Any]) -> bool:
+    """True when an analyze request asks for NDJSON streaming output"""
+    return data.get('action', 'analyze') == 'analyze' and bool((data.get('options') or {}).get('stream'))
+
+def stream_sentiment(text: str, options: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Analyze text and yield results incrementally, one event per NDJSON line
+    
+    Chunks are scored in order one batch at a time. Each chunk's record is
+    yielded as {"event": "chunk", "sentiment": {...}} as soon as its batch
+    finishes, followed by a single {"event": "summary", "result": {...}} with
+    overall_sentiment, summary and metadata (the analyze_sentiment result
+    without the per-chunk list). Chunks are folded into a SentimentAggregator
+    rather than buffered. Errors are reported in the summary result.
+    
+    Args:
+        text: Text or transcript to analyze
+        options: analyze_sentiment options; per_speaker tags chunks with
+                 speaker fields and applies role weighting to the summary,
+                 fields/compact project each chunk event
+    """
+    options = options or {}
+    batch_size = max(1, int(options.get('batch_size', DEFAULT_BATCH_SIZE)))
+    backend = resolve_backend(options.get('backend'))
+    
+    try:
+        if not text or not text.strip():
+            yield {"event": "summary", "result": {"error": "Empty text provided"}}
+            return
+        
+        segments = []
+        if options.get('per_speaker'):
+            segments = [segment for segment in split_speaker_segments(text) if segment['text'].strip()]
+        per_speaker = bool(segments)
+        if not per_speaker:
+            segments = [{'speaker': None, 'text': text}]
+        
+        speaker_weights: Dict[str, float] = {}
+        # Speaker weights are filled in as segments arrive (the aggregator holds the same
+        # dict), so a speaker's chunks use the weight known when they were scored
+        aggregator = SentimentAggregator(speaker_weights if per_speaker else None)
+        speaker_roles: Dict[str, str] = {}
+        inference_stats: Dict[str, Any] = {}
+        processed_text = ''
+        chunker = 'chars'
+        fields = requested_chunk_fields(options)
+        diagnostics = requested_diagnostics(fields)
+        
+        for segment in segments:
+            processed_text, indexed_chunks, chunk_input_ids = prepare_text_chunks(segment['text'], options)
+            if chunk_input_ids is not None:
+                chunker = 'tokens'
+            # Speaker segments are re-joined lines, so offsets are only given for plain text
+            locator = ChunkLocator(processed_text) if wants_offsets(fields) and not per_speaker else None
+            
+            if per_speaker:
+                speaker_role, speaker_weight = classify_speaker_role(segment['speaker'], segment['text'])
+                speaker_weights[segment['speaker']] = speaker_weight
+                speaker_roles[segment['speaker']] = speaker_role
+            
+            for start in range(0, len(indexed_chunks), batch_size):
+                window = indexed_chunks[start:start + batch_size]
+                raw_outputs = run_finbert_batches(
+                    [chunk for _, chunk in window], batch_size,
+                    use_cache=options.get('use_cache', True), stats=inference_stats, backend=backend,
+                    input_ids=chunk_input_ids[start:start + batch_size] if chunk_input_ids else None,
+                    length_bucketing=options.get('length_bucketing', True)
+                )
+                
+                for sentiment in score_chunk_outputs(window, raw_outputs, options.get('vectorized_scoring', True),
+                                                     diagnostics):
+                    if per_speaker:
+                        sentiment['speaker'] = segment['speaker']
+                        sentiment['speaker_role'] = speaker_role
+                        sentiment['speaker_role_weight'] = speaker_weight
+                    aggregator.add(sentiment)
+                    if fields is not None:
+                        span = locator.locate(sentiment['text']) if locator else None
+                        sentiment = project_chunk_record(sentiment, fields, span)
+                    yield {"event": "chunk", "sentiment": sentiment}
+        
+        if not aggregator.records:
+            yield {"event": "summary", "result": {"error": "No valid text chunks found after processing"}}
+            return
+        
+        if per_speaker:
+            metadata = {
+                "total_speakers": len(speaker_weights),
+                "total_chunks": aggregator.records,
+                "analysis_type": "per_speaker_weighted_enhanced",
+                "model_used": "FinBERT_Enhanced",
+                "device": "CPU",
+                "speaker_weighting_enabled": True,
+                "avg_confidence": round(aggregator.avg_confidence(), 3),
+                "avg_entropy": round(aggregator.avg_entropy(), 3)
+            }
+        else:
+            metadata = text_analysis_metadata(
+                text, processed_text, aggregator.records, aggregator.avg_confidence(), batch_size
+            )
+        
+        metadata.update({
+            "streamed": True,
+            "inference_backend": backend,
+            "chunker": chunker,
+            "padding": padding_summary(inference_stats, options.get('length_bucketing', True)),
+            "process_pool": process_pool_summary(inference_stats),
+            "cache": {
+                'enabled': inference_stats.get('cache_enabled', False),
+                'hits': inference_stats.get('cache_hits', 0),
+                'misses': inference_stats.get('cache_misses', 0)
+            }
+        })
+        
+        if fields is not None:
+            metadata["fields"] = list(fields)
+        
+        result = {
+            "overall_sentiment": round(aggregator.overall_sentiment(), 3),
+            "summary": aggregator.summary(),
+            "metadata": metadata
+        }
+        if wants_offsets(fields) and not per_speaker:
+            metadata["offsets"] = 'text' if processed_text == text else 'processed_text'
+            if processed_text != text:
+                result["processed_text"] = processed_text
+        if per_speaker:
+            result["speaker_weights"] = speaker_weights
+            result["speaker_roles"] = speaker_roles
+        
+        yield {"event": "summary", "result": result}
+        
+    except Exception as e:
+        yield {"event": "summary", "result": {"error": str(e), "type": "stream_analysis_error"}}
+
 def process_audio_transcript(transcript: str, company: str = "", ticker: str = "") -> Dict[str, Any]:
     """Process audio transcript with company context"""
     try:
-        analysis = analyze_text(transcript)
+        analysis = analyze_text_batch([transcript], internal=True)[0]
         
         if 'error' in analysis:
             return analysis
@@ -918,11 +3484,221 @@ def process_audio_transcript(transcript: str, company: str = "", ticker: str = "
     except Exception as e:
         return {"error": str(e), "type": "audio_processing_error"}
 
-def process_historical_data(transcript: str, ticker: str, year: int, quarter: int) -> Dict[str, Any]:
+# ========== LIVE CALL SESSIONS ==========
+
+# Idle live sessions are dropped after this many seconds
+LIVE_SESSION_TTL = int(os.getenv("FINBERT_LIVE_SESSION_TTL", "7200"))
+LIVE_MAX_SESSIONS = int(os.getenv("FINBERT_LIVE_MAX_SESSIONS", "64"))
+# Most recent chunk sentiments a session keeps for its final result; totals come from the aggregator
+LIVE_KEEP_CHUNKS = int(os.getenv("FINBERT_LIVE_KEEP_CHUNKS", "200"))
+
+class LiveSentimentSession:
+    """
+    Incrementally analyzed live-call transcript
+    
+    Appended text is preprocessed once per segment and joined onto the last
+    (still open) chunk, so only that trailing chunk and any new chunks are
+    re-split and re-scored. Chunks that can no longer change are folded into a
+    SentimentAggregator; the open chunk is added on top when reporting. Only the
+    open chunk and the last LIVE_KEEP_CHUNKS sentiments are kept in memory.
+    
+    preprocess_financial_text rewrites terms based on cue words found anywhere
+    in its input. Here the input is one segment, so a cue only affects terms in
+    the same segment, and results can differ from analyzing the finished
+    transcript in one request.
+    """
+    
+    def __init__(self, session_id: str, company: str = "", ticker: str = "",
+                 options: Optional[Dict[str, Any]] = None):
+        self.session_id = session_id
+        self.company = company
+        self.ticker = ticker
+        self.options = options or {}
+        self.lock = threading.Lock()
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.segment_count = 0
+        self.received_chars = 0
+        self.transcript_length = 0
+        self.transcript_preview = ""
+        self.chunk_count = 0
+        self.recent_sentiments: deque = deque(maxlen=max(0, LIVE_KEEP_CHUNKS))
+        self.open_sentiment: Optional[Dict[str, Any]] = None
+        self.tail_text = ""
+        # Every chunk except the open trailing one
+        self.closed_aggregator = SentimentAggregator()
+    
+    def aggregate(self) -> SentimentAggregator:
+        """Aggregate over all chunks, including the open trailing one"""
+        aggregator = self.closed_aggregator.copy()
+        if self.open_sentiment is not None:
+            aggregator.add(self.open_sentiment)
+        return aggregator
+    
+    def close_sentiment(self, sentiment: Dict[str, Any]) -> None:
+        self.closed_aggregator.add(sentiment)
+        self.recent_sentiments.append(sentiment)
+    
+    def append(self, text: str) -> Dict[str, Any]:
+        """Add a transcript segment and re-score only the trailing chunks it touches"""
+        with self.lock:
+            self.updated_at = time.time()
+            if not text or not text.strip():
+                return self.snapshot([])
+            
+            segment = text.strip()
+            self.received_chars += len(text)
+            self.transcript_length += len(segment) + (1 if self.segment_count else 0)
+            if len(self.transcript_preview) <= 500:
+                self.transcript_preview = f"{self.transcript_preview} {segment}" if self.segment_count else segment
+                self.transcript_preview = self.transcript_preview[:501]
+            self.segment_count += 1
+            processed_segment = preprocess_financial_text(text.strip())
+            region = f"{self.tail_text} {processed_segment}" if self.tail_text else processed_segment
+            indexed_chunks, chunk_input_ids = chunk_processed_text(region, self.options)
+            if not indexed_chunks:
+                return self.snapshot([])
+            
+            chunks = [chunk for _, chunk in indexed_chunks]
+            
+            # The open chunk is replaced by the re-split region unless it came back unchanged
+            first_id = self.chunk_count
+            if self.tail_text and self.open_sentiment is not None:
+                if chunks[0] == self.tail_text and len(chunks) > 1:
+                    chunks = chunks[1:]
+                    chunk_input_ids = chunk_input_ids[1:] if chunk_input_ids else None
+                    self.close_sentiment(self.open_sentiment)
+                else:
+                    first_id -= 1
+            
+            raw_outputs = run_finbert_batches(
+                chunks, max(1, int(self.options.get('batch_size', DEFAULT_BATCH_SIZE))),
+                use_cache=self.options.get('use_cache', True), backend=self.options.get('backend'),
+                input_ids=chunk_input_ids, length_bucketing=self.options.get('length_bucketing', True)
+            )
+            updated = score_chunk_outputs(
+                [(first_id + offset, chunk) for offset, chunk in enumerate(chunks)], raw_outputs,
+                self.options.get('vectorized_scoring', True)
+            )
+            for sentiment in updated[:-1]:
+                self.close_sentiment(sentiment)
+            self.open_sentiment = updated[-1]
+            self.chunk_count = first_id + len(updated)
+            self.tail_text = chunks[-1]
+            
+            return self.snapshot(updated)
+    
+    def snapshot(self, updated: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            "session_id": self.session_id,
+            "updated_chunks": updated,
+            "rescored_chunks": len(updated),
+            "total_chunks": self.chunk_count,
+            "overall_sentiment": round(self.aggregate().overall_sentiment(), 3),
+            "segments": self.segment_count,
+            "transcript_length": self.received_chars
+        }
+    
+    def result(self) -> Dict[str, Any]:
+        """
+        process_audio_transcript-style result for the transcript so far
+        
+        overall_sentiment and summary cover every chunk; sentiments holds only
+        the most recent LIVE_KEEP_CHUNKS chunks (plus the open one).
+        """
+        with self.lock:
+            preview = self.transcript_preview
+            aggregator = self.aggregate()
+            sentiments = list(self.recent_sentiments)
+            if self.open_sentiment is not None:
+                sentiments.append(self.open_sentiment)
+            return {
+                "company": self.company,
+                "ticker": self.ticker,
+                "session_id": self.session_id,
+                "transcript_preview": preview[:500] + '...' if len(preview) > 500 else preview,
+                "overall_sentiment": round(aggregator.overall_sentiment(), 3),
+                "summary": aggregator.summary(),
+                "sentiments": sentiments,
+                "metadata": {
+                    "total_chunks": self.chunk_count,
+                    "returned_chunks": len(sentiments),
+                    "segments": self.segment_count,
+                    "transcript_length": self.transcript_length,
+                    "preprocessing": "per_segment",
+                    "analysis_type": "live_transcript",
+                    "model_used": "FinBERT",
+                    "started_at": self.created_at,
+                    "updated_at": self.updated_at
+                }
+            }
+
+_live_sessions: Dict[str, LiveSentimentSession] = {}
+_live_sessions_lock = threading.Lock()
+
+def open_live_session(company: str = "", ticker: str = "", options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Start a live-call session; returns its session_id"""
+    try:
+        now = time.time()
+        with _live_sessions_lock:
+            for session_id in [sid for sid, session in _live_sessions.items() if now - session.updated_at > LIVE_SESSION_TTL]:
+                del _live_sessions[session_id]
+            if len(_live_sessions) >= LIVE_MAX_SESSIONS:
+                return {"error": "Too many live sessions open", "type": "live_session_error"}
+            
+            session_id = hashlib.sha1(f"{os.getpid()}:{now}:{len(_live_sessions)}:{ticker}".encode('utf-8')).hexdigest()[:16]
+            _live_sessions[session_id] = LiveSentimentSession(session_id, company, ticker, options)
+        
+        return {"session_id": session_id, "company": company, "ticker": ticker, "pid": os.getpid()}
+    except Exception as e:
+        return {"error": str(e), "type": "live_session_error"}
+
+def append_live_session(session_id: str, text: str) -> Dict[str, Any]:
+    """Append transcript text to a live session and return the updated chunks and running sentiment"""
+    try:
+        session = _live_sessions.get(session_id)
+        if session is None:
+            return {"error": f"Unknown live session: {session_id}", "type": "live_session_error"}
+        return session.append(text)
+    except Exception as e:
+        return {"error": str(e), "type": "live_session_error"}
+
+def close_live_session(session_id: str) -> Dict[str, Any]:
+    """End a live session and return its full analysis"""
+    try:
+        with _live_sessions_lock:
+            session = _live_sessions.pop(session_id, None)
+        if session is None:
+            return {"error": f"Unknown live session: {session_id}", "type": "live_session_error"}
+        return session.result()
+    except Exception as e:
+        return {"error": str(e), "type": "live_session_error"}
+
+def process_historical_data(transcript: str, ticker: str, year: int, quarter: int,
+                            options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """Process historical earnings call data"""
     try:
-        analysis_result = analyze_text(transcript)
+        analysis_result, timings = profiled_call(options, 'historical', analyze_text, transcript, options)
+        if timings is not None and 'metadata' in analysis_result:
+            analysis_result['metadata']['timings'] = timings
+        
+        return build_historical_result(
+            analysis_result, transcript, ticker, year, quarter,
+            include_transcript=not (options or {}).get('compact')
+        )
         
+    except Exception as e:
+        return {"error": str(e), "type": "historical_processing_error"}
+
+def build_historical_result(analysis_result: Dict[str, Any], transcript: str, ticker: str,
+                            year: int, quarter: int, include_transcript: bool = True) -> Dict[str, Any]:
+    """
+    Shape an analyze_text result into the historical (per ticker/quarter) response
+    
+    include_transcript=False drops the transcript echo (compact mode: the
+    caller already has it, and chunk offsets index into it).
+    """
+    try:
         if 'error' in analysis_result:
             return analysis_result
         
@@ -949,7 +3725,7 @@ def process_historical_data(transcript: str, ticker: str, year: int, quarter: in
             if 'neutral_ratio' not in summary:
                 summary['neutral_ratio'] = summary['sentiment_ratios']['neutral_ratio']
         
-        return {
+        result = {
             "ticker": ticker,
             "year": year,
             "quarter": quarter,
@@ -959,10 +3735,68 @@ def process_historical_data(transcript: str, ticker: str, year: int, quarter: in
             "sentiments": analysis_result.get('sentiments', []),
             "metadata": analysis_result.get('metadata', {})
         }
+        if not include_transcript:
+            del result["transcript"]
+        if 'processed_text' in analysis_result:
+            result["processed_text"] = analysis_result['processed_text']
+        return result
         
     except Exception as e:
         return {"error": str(e), "type": "historical_processing_error"}
 
+def process_historical_batch(items: List[Dict[str, Any]], options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Process several historical transcripts with one shared batched FinBERT pass
+    
+    Args:
+        items: List of {ticker, year, quarter, transcript} dicts
+        options: analyze_text options (batch_size, backend, use_cache, ...)
+        
+    Returns:
+        Dict: {"results": [...], "metadata": {...}} where each result has the
+        process_historical_data shape, or an error dict tagged with its ticker
+    """
+    try:
+        if not isinstance(items, list) or not items:
+            return {"error": "No historical items provided", "type": "batch_historical_error"}
+        
+        items = [item if isinstance(item, dict) else {} for item in items]
+        analyses, timings = profiled_call(
+            options, 'batch_historical', analyze_text_batch, [item.get('transcript') or '' for item in items], options
+        )
+        
+        results = []
+        for item, analysis_result in zip(items, analyses):
+            result = build_historical_result(
+                analysis_result,
+                item.get('transcript', ''),
+                item.get('ticker', ''),
+                item.get('year', 0),
+                item.get('quarter', 0),
+                include_transcript=not (options or {}).get('compact')
+            )
+            if 'error' in result:
+                result = {**result, "ticker": item.get('ticker', ''),
+                          "year": item.get('year', 0), "quarter": item.get('quarter', 0)}
+            results.append(result)
+        
+        successful = sum(1 for result in results if 'error' not in result)
+        metadata = {
+            "total": len(results),
+            "successful": successful,
+            "failed": len(results) - successful,
+            "total_chunks": sum(len(result.get('sentiments', [])) for result in results),
+            "inference_backend": resolve_backend((options or {}).get('backend')),
+            "shared_batching": True
+        }
+        if timings is not None:
+            metadata["timings"] = timings
+        
+        return {"results": results, "metadata": metadata}
+        
+    except Exception as e:
+        return {"error": str(e), "type": "batch_historical_error"}
+
 def test_enhanced_sentiment_analysis() -> Dict[str, Any]:
     """
     Test function to validate enhanced sentiment analysis features
@@ -1046,39 +3880,155 @@ def load_input_data(arg: str) -> Dict[str, Any]:
     except Exception as e:
         return {"error": f"Failed to load input: {str(e)}"}
 
+def handle_request(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Dispatch a single request payload to the matching analysis action"""
+    action = data.get('action', 'analyze')
+    
+    if action == 'analyze':
+        return analyze_sentiment(data.get('text', ''), data.get('options', {}))
+    elif action == 'audio_transcript':
+        return process_audio_transcript(
+            data.get('transcript', ''), 
+            data.get('company', ''), 
+            data.get('ticker', '')
+        )
+    elif action == 'historical':
+        return process_historical_data(
+            data.get('transcript', ''),
+            data.get('ticker', ''),
+            data.get('year', 0),
+            data.get('quarter', 0),
+            data.get('options', {})
+        )
+    elif action == 'live_open':
+        return open_live_session(data.get('company', ''), data.get('ticker', ''), data.get('options', {}))
+    elif action == 'live_append':
+        return append_live_session(data.get('session_id', ''), data.get('text', ''))
+    elif action == 'live_close':
+        return close_live_session(data.get('session_id', ''))
+    elif action == 'batch_historical':
+        return process_historical_batch(data.get('items', []), data.get('options', {}))
+    elif action == 'startup_profile':
+        return startup_profile(data.get('warmup', True))
+    elif action == 'backend_parity':
+        return backend_parity_check(data.get('backend'), data.get('sample'))
+    else:
+        return {"error": f"Unknown action: {action}"}
+
+def run_worker(input_stream=None, output_stream=None) -> None:
+    """
+    Long-running worker mode: read newline-delimited JSON requests and answer each
+    with one JSON line, so the model is loaded once per process instead of per request.
+    
+    Request:  {"id": "...", "action": "analyze" | "audio_transcript" | "historical" | "batch_historical" |
+              "live_open" | "live_append" | "live_close" | "ping", ...}
+    Response: {"id": "...", "result": {...}}
+    
+    Streaming analyze requests (options.stream) first emit one
+    {"id": "...", "event": "chunk", "sentiment": {...}} line per chunk; the
+    final summary then arrives as the regular {"id": "...", "result": {...}}.
+    """
+    input_stream = input_stream or sys.stdin
+    output_stream = output_stream or sys.stdout
+    
+    def respond(request_id: Any, result: Dict[str, Any]) -> None:
+        output_stream.write(json.dumps({"id": request_id, "result": result}, ensure_ascii=False) + "\n")
+        output_stream.flush()
+    
+    # Load the model before announcing readiness so the first request is warm
+    load_error = None
+    try:
+        load_finbert()
+    except Exception as e:
+        load_error = str(e)
+        print(f"Sentiment worker started without a model: {e}", file=sys.stderr)
+    
+    # Fork the inference pool right after the load, before any inference, so workers
+    # share the weights; it is never re-forked afterwards
+    if load_error is None:
+        try:
+            start_inference_pool(POOL_BACKENDS)
+        except Exception as e:
+            print(f"Inference pool unavailable, running in-process: {e}", file=sys.stderr)
+    
+    output_stream.write(json.dumps({"id": None, "event": "ready", "pid": os.getpid(), "error": load_error}) + "\n")
+    output_stream.flush()
+    print("Sentiment worker ready", file=sys.stderr)
+    
+    for line in input_stream:
+        line = line.strip()
+        if not line:
+            continue
+        
+        request_id = None
+        try:
+            data = json.loads(line)
+            if not isinstance(data, dict):
+                respond(None, {"error": "Request must be a JSON object", "type": "worker_error"})
+                continue
+            
+            request_id = data.get('id')
+            action = data.get('action', 'analyze')
+            
+            if action == 'ping':
+                cache = get_chunk_cache()
+                respond(request_id, {
+                    "status": "ok",
+                    "pid": os.getpid(),
+                    "cache": cache.stats() if cache else None,
+                    "process_pool": _inference_pool.stats() if _inference_pool is not None else None
+                })
+            elif action == 'shutdown':
+                respond(request_id, {"status": "shutting_down"})
+                break
+            elif is_streaming_request(data):
+                for event in stream_sentiment(data.get('text', ''), data.get('options', {})):
+                    if event['event'] == 'summary':
+                        respond(request_id, event['result'])
+                    else:
+                        output_stream.write(json.dumps({"id": request_id, **event}, ensure_ascii=False) + "\n")
+                        output_stream.flush()
+            else:
+                respond(request_id, handle_request(data))
+        except json.JSONDecodeError as e:
+            respond(None, {"error": f"Invalid JSON: {str(e)}", "type": "worker_error"})
+        except Exception as e:
+            respond(request_id, {"error": str(e), "type": "main_error"})
+
+STARTUP_TIMINGS['module_import'] = round(time.perf_counter() - _import_start, 4)
+
 if __name__ == "__main__":
     try:
         if len(sys.argv) < 2:
             print(json.dumps({"error": "No input data provided"}))
             sys.exit(1)
         
+        if sys.argv[1] == '--worker':
+            run_worker()
+            sys.exit(0)
+        
+        if sys.argv[1] == '--curate-boilerplate':
+            corpus = []
+            for path in sys.argv[2:]:
+                with open(path, 'r', encoding='utf-8') as f:
+                    corpus.append(f.read())
+            print(json.dumps(curate_boilerplate_library(corpus)))
+            sys.exit(0)
+        
         data = load_input_data(sys.argv[1])
         
         if 'error' in data:
             print(json.dumps(data))
             sys.exit(1)
         
-        action = data.get('action', 'analyze')
+        if is_streaming_request(data):
+            for event in stream_sentiment(data.get('text', ''), data.get('options', {})):
+                print(json.dumps(event, ensure_ascii=False), flush=True)
+            sys.exit(0)
         
-        if action == 'analyze':
-            result = analyze_sentiment(data.get('text', ''), data.get('options', {}))
-        elif action == 'audio_transcript':
-            result = process_audio_transcript(
-                data.get('transcript', ''), 
-                data.get('company', ''), 
-                data.get('ticker', '')
-            )
-        elif action == 'historical':
-            result = process_historical_data(
-                data.get('transcript', ''),
-                data.get('ticker', ''),
-                data.get('year', 0),
-                data.get('quarter', 0)
-            )
-        else:
-            result = {"error": f"Unknown action: {action}"}
+        result = handle_request(data)
         
         print(json.dumps(result, ensure_ascii=False))
         
     except Exception as e:
-        print(json.dumps({"error": str(e), "type": "main_error"}))
\ No newline at end of file
+        print(json.dumps({"error": str(e), "type": "main_error"}))
@@ -0,0 +1,304 @@
+"""
+Async HTTP sentiment service with dynamic micro-batching across requests
+
+Wraps corporate.py's analyze_sentiment, process_audio_transcript and
+process_historical_data. Request handlers run the regular corporate.py code
+in worker threads, but every chunk that misses the cache is handed to a
+shared MicroBatcher instead of being scored on the spot. The batcher collects
+chunks from all in-flight requests and flushes them to FinBERT as one batch
+when the batch is full or when the oldest chunk has waited max_wait_ms.
+
+Run locally (no external services needed with FINBERT_MODEL_DIR / FINBERT_OFFLINE):
+    python sentiment_service.py
+    uvicorn sentiment_service:app --port 8001
+
+Endpoints:
+    POST /analyze           {"text": "...", "options": {...}}
+    POST /audio_transcript  {"transcript": "...", "company": "...", "ticker": "..."}
+    POST /historical        {"transcript": "...", "ticker": "...", "year": 2024, "quarter": 1, "options": {...}}
+    POST /live/open, /live/append, /live/close   incremental live-call sessions
+    GET  /metrics           queue depth, batch-size and queue-wait histograms
+    GET  /health
+"""
+import sys
+import os
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Dict, List, Any, Optional
+
+try:
+    from fastapi import FastAPI, Body
+except ImportError as e:
+    print(f"Missing required library: {e}", file=sys.stderr)
+    print("Please install: pip install fastapi uvicorn", file=sys.stderr)
+    sys.exit(1)
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import corporate
+
+# Largest number of chunks flushed to the model in one batch
+MAX_BATCH_SIZE = int(os.getenv("SENTIMENT_MAX_BATCH", "32"))
+# How long the oldest queued chunk may wait for the batch to fill
+MAX_WAIT_MS = float(os.getenv("SENTIMENT_MAX_WAIT_MS", "10"))
+# Concurrent requests executing corporate.py code (they block while waiting on the batcher)
+REQUEST_THREADS = int(os.getenv("SENTIMENT_REQUEST_THREADS", "16"))
+SERVICE_HOST = os.getenv("SENTIMENT_SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.getenv("SENTIMENT_SERVICE_PORT", "8001"))
+
+QUEUE_WAIT_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 250, 1000)
+
+# ========== MICRO-BATCHING ==========
+
+class MicroBatcher:
+    """
+    Collects chunks from concurrent requests and scores them in shared batches
+
+    Chunks are queued with a future each. A single flush loop takes the first
+    waiting chunk, keeps pulling until max_batch_size chunks are collected or
+    max_wait_ms has passed, and runs the batch through
+    corporate.infer_finbert_chunks on a dedicated inference thread.
+    """
+
+    def __init__(self, max_batch_size: int = MAX_BATCH_SIZE, max_wait_ms: float = MAX_WAIT_MS):
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.queue: Optional[asyncio.Queue] = None
+        self.task: Optional[asyncio.Task] = None
+        # One inference thread: batches run back to back, never concurrently
+        self.inference_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="finbert-batch")
+
+        self.batches = 0
+        self.chunks = 0
+        self.flush_reasons = {'full': 0, 'deadline': 0}
+        self.batch_size_histogram: Dict[int, int] = {}
+        self.queue_wait_histogram: Dict[str, int] = {}
+        self.inference_seconds = 0.0
+
+    async def start(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        self.inference_executor.shutdown(wait=False)
+
+    async def submit(self, chunks: List[str], backend: str,
+                     input_ids: Optional[List[Optional[List[int]]]] = None) -> List[Any]:
+        """Queue chunks for batched scoring and wait for their raw outputs"""
+        futures = []
+        enqueued_at = time.perf_counter()
+        for i, chunk in enumerate(chunks):
+            future = self.loop.create_future()
+            ids = input_ids[i] if input_ids else None
+            await self.queue.put((chunk, ids, backend, future, enqueued_at))
+            futures.append(future)
+        return list(await asyncio.gather(*futures))
+
+    def infer_blocking(self, chunks: List[str], batch_size: int = 0, backend: Optional[str] = None,
+                       input_ids: Optional[List[Optional[List[int]]]] = None,
+                       length_bucketing: bool = True, stats: Optional[Dict[str, Any]] = None) -> List[Any]:
+        """
+        Drop-in for corporate.infer_finbert_chunks, called from request threads
+
+        batch_size and length_bucketing are ignored: the batcher decides how
+        chunks are grouped.
+        """
+        future = asyncio.run_coroutine_threadsafe(
+            self.submit(chunks, corporate.resolve_backend(backend), input_ids), self.loop
+        )
+        return future.result()
+
+    async def _collect(self) -> List[Any]:
+        """Wait for one queued chunk, then fill the batch until full or the deadline passes"""
+        batch = [await self.queue.get()]
+        deadline = self.loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            if not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                continue
+            timeout = deadline - self.loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect()
+            self._record_batch(batch)
+
+            by_backend: Dict[str, List[Any]] = {}
+            for item in batch:
+                by_backend.setdefault(item[2], []).append(item)
+
+            for backend, items in by_backend.items():
+                start_time = time.perf_counter()
+                try:
+                    raw_outputs = await self.loop.run_in_executor(
+                        self.inference_executor,
+                        corporate.infer_finbert_chunks,
+                        [item[0] for item in items],
+                        self.max_batch_size,
+                        backend,
+                        [item[1] for item in items],
+                        True,
+                        None
+                    )
+                except Exception as e:
+                    print(f"Micro-batch inference failed: {e}", file=sys.stderr)
+                    raw_outputs = [e] * len(items)
+                self.inference_seconds += time.perf_counter() - start_time
+
+                for item, raw_output in zip(items, raw_outputs):
+                    future = item[3]
+                    if not future.done():
+                        future.set_result(raw_output)
+
+    def _record_batch(self, batch: List[Any]) -> None:
+        now = time.perf_counter()
+        self.batches += 1
+        self.chunks += len(batch)
+        self.flush_reasons['full' if len(batch) >= self.max_batch_size else 'deadline'] += 1
+        self.batch_size_histogram[len(batch)] = self.batch_size_histogram.get(len(batch), 0) + 1
+
+        for item in batch:
+            waited_ms = (now - item[4]) * 1000.0
+            bucket = next((f"<={limit}ms" for limit in QUEUE_WAIT_BUCKETS_MS if waited_ms <= limit),
+                          f">{QUEUE_WAIT_BUCKETS_MS[-1]}ms")
+            self.queue_wait_histogram[bucket] = self.queue_wait_histogram.get(bucket, 0) + 1
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            'queue_depth': self.queue.qsize() if self.queue is not None else 0,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000.0,
+            'batches': self.batches,
+            'chunks': self.chunks,
+            'avg_batch_size': round(self.chunks / self.batches, 2) if self.batches else 0.0,
+            'flush_reasons': dict(self.flush_reasons),
+            'batch_size_histogram': {str(size): count for size, count in sorted(self.batch_size_histogram.items())},
+            'queue_wait_histogram': {
+                bucket: self.queue_wait_histogram[bucket]
+                for bucket in [f"<={limit}ms" for limit in QUEUE_WAIT_BUCKETS_MS] + [f">{QUEUE_WAIT_BUCKETS_MS[-1]}ms"]
+                if bucket in self.queue_wait_histogram
+            },
+            'inference_seconds': round(self.inference_seconds, 4)
+        }
+
+# ========== HTTP SERVICE ==========
+
+batcher = MicroBatcher()
+request_executor = ThreadPoolExecutor(max_workers=REQUEST_THREADS, thread_name_prefix="sentiment-request")
+service_state: Dict[str, Any] = {'requests': {}, 'in_flight': 0, 'model_error': None}
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.run_in_executor(request_executor, corporate.load_finbert)
+    except Exception as e:
+        service_state['model_error'] = str(e)
+        print(f"Sentiment service started without a model: {e}", file=sys.stderr)
+    # Fork the inference pool before any batch runs, as run_worker does; once
+    # inference has run in this threaded process it is never forked
+    pool = None
+    if service_state['model_error'] is None:
+        try:
+            pool = corporate.start_inference_pool()
+        except Exception as e:
+            print(f"Inference pool unavailable, running in-process: {e}", file=sys.stderr)
+    await batcher.start()
+    print(f"Sentiment service ready (max batch {batcher.max_batch_size}, max wait {MAX_WAIT_MS}ms)", file=sys.stderr)
+    yield
+    await batcher.stop()
+    request_executor.shutdown(wait=False)
+    if pool is not None:
+        pool.close()
+
+app = FastAPI(title="Corporate sentiment service", lifespan=lifespan)
+
+async def run_batched(endpoint: str, fn: Any, *args: Any) -> Dict[str, Any]:
+    """Run a corporate.py entry point in a request thread with inference routed to the batcher"""
+    def call() -> Dict[str, Any]:
+        corporate.set_inference_override(batcher.infer_blocking)
+        try:
+            return fn(*args)
+        finally:
+            corporate.set_inference_override(None)
+
+    service_state['requests'][endpoint] = service_state['requests'].get(endpoint, 0) + 1
+    service_state['in_flight'] += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(request_executor, call)
+    finally:
+        service_state['in_flight'] -= 1
+
+@app.post("/analyze")
+async def analyze(payload: Dict[str, Any] = Body(...)) -> Dict[str, Any]:
+    return await run_batched('analyze', corporate.analyze_sentiment,
+                             payload.get('text', ''), payload.get('options', {}))
+
+@app.post("/audio_transcript")
+async def audio_transcript(payload: Dict[str, Any] = Body(...)) -> Dict[str, Any]:
+    return await run_batched('audio_transcript', corporate.process_audio_transcript,
+                             payload.get('transcript', ''), payload.get('company', ''), payload.get('ticker', ''))
+
+@app.post("/historical")
+async def historical(payload: Dict[str, Any] = Body(...)) -> Dict[str, Any]:
+    return await run_batched('historical', corporate.process_historical_data,
+                             payload.get('transcript', ''), payload.get('ticker', ''),
+                             payload.get('year', 0), payload.get('quarter', 0), payload.get('options', {}))
+
+@app.post("/live/open")
+async def live_open(payload: Dict[str, Any] = Body(...)) -> Dict[str, Any]:
+    return await run_batched('live_open', corporate.open_live_session,
+                             payload.get('company', ''), payload.get('ticker', ''), payload.get('options', {}))
+
+@app.post("/live/append")
+async def live_append(payload: Dict[str, Any] = Body(...)) -> Dict[str, Any]:
+    return await run_batched('live_append', corporate.append_live_session,
+                             payload.get('session_id', ''), payload.get('text', ''))
+
+@app.post("/live/close")
+async def live_close(payload: Dict[str, Any] = Body(...)) -> Dict[str, Any]:
+    return await run_batched('live_close', corporate.close_live_session, payload.get('session_id', ''))
+
+@app.get("/metrics")
+async def metrics() -> Dict[str, Any]:
+    return {
+        'batcher': batcher.metrics(),
+        'requests': dict(service_state['requests']),
+        'in_flight_requests': service_state['in_flight']
+    }
+
+@app.get("/health")
+async def health() -> Dict[str, Any]:
+    return {
+        'status': 'ok' if service_state['model_error'] is None else 'degraded',
+        'model_error': service_state['model_error'],
+        'pid': os.getpid()
+    }
+
+if __name__ == "__main__":
+    try:
+        import uvicorn
+    except ImportError as e:
+        print(f"Missing required library: {e}", file=sys.stderr)
+        print("Please install: pip install uvicorn", file=sys.stderr)
+        sys.exit(1)
+
+    uvicorn.run(app, host=SERVICE_HOST, port=SERVICE_PORT)
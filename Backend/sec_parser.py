@@ -9,6 +9,13 @@ from nltk.tokenize import sent_tokenize
 import logging
 import nltk
 import sys
+import time
+import shutil
+import sqlite3
+import gzip
+import hashlib
+import mmap
+import tempfile
 
 # Ensure NLTK punkt is downloaded
 try:
@@ -27,22 +34,635 @@ LARGE_CAP_TICKERS = [
     'ADBE', 'INTC', 'CMCSA', 'PFE', 'WMT', 'CRM', 'NFLX', 'VZ', 'ABT', 'KO'
 ]
 
-def fetch_sec_filing(ticker, form_type, year):
-    download_dir = "sec-edgar"
-    os.makedirs(download_dir, exist_ok=True)
-    dl = sec_edgar_downloader.Downloader("FinTech-App", "noreply@fintechapp.example.com", download_dir)
-    try:
-        after_date = f"{int(year) - 1}-07-01"
-        before_date = f"{int(year) + 1}-12-31"
+# Local filing store: downloaded submissions are indexed so repeat requests skip EDGAR
+FILING_STORE_DIR = os.getenv("SEC_FILING_DIR", "sec-edgar")
+FILING_INDEX_PATH = os.getenv("SEC_FILING_INDEX", os.path.join(FILING_STORE_DIR, "filing_index.sqlite"))
+# Least recently used submissions are deleted once the store grows past this size
+FILING_STORE_MAX_BYTES = int(float(os.getenv("SEC_FILING_STORE_MAX_MB", "2048")) * 1024 * 1024)
+# A request whose EDGAR date window has not closed yet may gain a newer filing;
+# its resolution is re-checked against EDGAR after this long
+FILING_OPEN_WINDOW_TTL = float(os.getenv("SEC_FILING_INDEX_TTL_DAYS", "7")) * 86400
+
+# Parsed output cache: filings never change once filed, so parse_filing output is
+# stored gzipped per accession and reused until this file changes
+PARSE_CACHE_DIR = os.getenv("SEC_PARSE_CACHE_DIR", os.path.join(FILING_STORE_DIR, "parsed"))
+PARSE_CACHE_MAX_BYTES = int(float(os.getenv("SEC_PARSE_CACHE_MAX_MB", "512")) * 1024 * 1024)
+with open(os.path.abspath(__file__), 'rb') as _source:
+    PARSER_VERSION = hashlib.sha256(_source.read()).hexdigest()[:12]
+
+HEADER_FIELDS = {
+    'accession': r'ACCESSION NUMBER:\s*([\d-]+)',
+    'cik': r'CENTRAL INDEX KEY:\s*0*(\d{1,10})',
+    'form': r'CONFORMED SUBMISSION TYPE:\s*(\S+)',
+    'period': r'CONFORMED PERIOD OF REPORT:\s*(\d{8})',
+    'filed': r'FILED AS OF DATE:\s*(\d{8})'
+}
+
+def read_submission_header(path, max_bytes=262144):
+    """Read accession, CIK, form, period and filing date from a submission's SEC-HEADER"""
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        head = f.read(max_bytes)
+    end = head.find("</SEC-HEADER>")
+    if end != -1:
+        head = head[:end]
+    header = {}
+    for field, pattern in HEADER_FIELDS.items():
+        match = re.search(pattern, head, re.I)
+        header[field] = match.group(1) if match else None
+    if header['cik']:
+        header['cik'] = header['cik'].zfill(10)
+    if not header['accession']:
+        # sec-edgar-downloader names the directory after the accession number
+        header['accession'] = os.path.basename(os.path.dirname(path))
+    return header
+
+def request_window(year):
+    """EDGAR date window searched for a (form, year) request"""
+    return f"{int(year) - 1}-07-01", f"{int(year) + 1}-12-31"
+
+class FilingStore:
+    """
+    SQLite index over the submissions sec-edgar-downloader saved to disk
+    
+    filings: one row per accession (ticker, CIK, form, fiscal year, path, size,
+    last access). requests: which accession a (ticker, form, year) request
+    resolved to, so a repeat request is answered without touching EDGAR.
+    Only resolutions confirmed by EDGAR are recorded. Refresh policy: those for
+    closed date windows never expire; open windows are re-checked after
+    FILING_OPEN_WINDOW_TTL; refresh=True always asks EDGAR. When EDGAR is
+    unreachable the stored filing is served, or failing that the newest one
+    on disk in the request's window.
+    Eviction: least recently used submissions are deleted past max_bytes.
+    """
+    
+    def __init__(self, root=FILING_STORE_DIR, index_path=FILING_INDEX_PATH, max_bytes=FILING_STORE_MAX_BYTES):
+        self.root = root
+        self.index_path = index_path
+        self.max_bytes = max_bytes
+        self._db = None
+    
+    def _connection(self):
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(self.index_path, timeout=30)
+            self._db.executescript("""
+                CREATE TABLE IF NOT EXISTS filings (
+                    accession TEXT PRIMARY KEY, ticker TEXT NOT NULL, cik TEXT, form TEXT NOT NULL,
+                    fiscal_year INTEGER, period TEXT, filed TEXT, path TEXT NOT NULL,
+                    size INTEGER NOT NULL, fetched_at REAL NOT NULL, last_access REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS filings_lookup ON filings (ticker, form, fiscal_year);
+                CREATE INDEX IF NOT EXISTS filings_cik ON filings (cik, form, fiscal_year);
+                CREATE INDEX IF NOT EXISTS filings_filed ON filings (ticker, form, filed);
+                CREATE TABLE IF NOT EXISTS requests (
+                    ticker TEXT NOT NULL, form TEXT NOT NULL, year INTEGER NOT NULL,
+                    accession TEXT NOT NULL, resolved_at REAL NOT NULL, window_open INTEGER NOT NULL,
+                    PRIMARY KEY (ticker, form, year)
+                );
+            """)
+        return self._db
+    
+    def filing_dir(self, ticker, form_type):
+        return os.path.join(self.root, "sec-edgar-filings", ticker, form_type)
+    
+    def add(self, ticker, form_type, path):
+        """Index one downloaded full-submission.txt and return its row"""
+        header = read_submission_header(path)
+        now = time.time()
+        fiscal_year = int(header['period'][:4]) if header['period'] else None
+        db = self._connection()
+        with db:
+            db.execute(
+                "INSERT OR REPLACE INTO filings VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (header['accession'], ticker.upper(), header['cik'], form_type, fiscal_year,
+                 header['period'], header['filed'], path, os.path.getsize(path), now, now)
+            )
+        return {'accession': header['accession'], 'path': path, 'fiscal_year': fiscal_year, 'cik': header['cik']}
+    
+    def scan(self, ticker, form_type):
+        """Index submissions already on disk (e.g. downloaded before the index existed)"""
+        db = self._connection()
+        known = {row[0] for row in db.execute("SELECT path FROM filings WHERE ticker = ?", (ticker.upper(),))}
+        for path in glob.glob(os.path.join(self.filing_dir(ticker, form_type), "*", "full-submission.txt")):
+            if path not in known:
+                try:
+                    self.add(ticker, form_type, path)
+                except OSError as e:
+                    logger.warning("Could not index %s: %s", path, str(e))
+    
+    def accession(self, path):
+        """Accession number of an indexed (or not yet indexed) submission file"""
+        row = self._connection().execute("SELECT accession FROM filings WHERE path = ?", (path,)).fetchone()
+        return row[0] if row else read_submission_header(path)['accession']
+    
+    def _usable(self, row):
+        return row is not None and os.path.isfile(row[1])
+    
+    def _touch(self, accession):
+        db = self._connection()
+        with db:
+            db.execute("UPDATE filings SET last_access = ? WHERE accession = ?", (time.time(), accession))
+    
+    def _remember_request(self, ticker, form_type, year, accession):
+        _, before_date = request_window(year)
+        window_open = time.strftime("%Y-%m-%d") <= before_date
+        db = self._connection()
+        with db:
+            db.execute(
+                "INSERT OR REPLACE INTO requests VALUES (?, ?, ?, ?, ?, ?)",
+                (ticker.upper(), form_type, int(year), accession, time.time(), int(window_open))
+            )
+    
+    def lookup(self, ticker, form_type, year, allow_stale=False):
+        """
+        Path of the stored filing for a request, or None when EDGAR must be asked
+        
+        Only a resolution recorded by download(), i.e. confirmed by EDGAR, is
+        served. A filing that merely sits on disk inside the request's window
+        may not be the newest one EDGAR has, so it is left to download().
+        """
+        db = self._connection()
+        key = (ticker.upper(), form_type, int(year))
+        
+        request = db.execute(
+            "SELECT r.accession, f.path, r.resolved_at, r.window_open FROM requests r "
+            "JOIN filings f ON f.accession = r.accession WHERE r.ticker = ? AND r.form = ? AND r.year = ?", key
+        ).fetchone()
+        if self._usable(request):
+            expired = request[3] and time.time() - request[2] > FILING_OPEN_WINDOW_TTL
+            if allow_stale or not expired:
+                self._touch(request[0])
+                return request[1]
+        return None
+    
+    def newest_in_window(self, ticker, form_type, year):
+        """
+        (accession, path) of the latest indexed filing dated within request_window(year)
+        
+        Same rule as the EDGAR query in download(): newest filing date in the
+        window, whatever its period of report.
+        """
+        after_date, before_date = request_window(year)
+        return self._connection().execute(
+            "SELECT accession, path FROM filings WHERE (ticker = ? OR cik = ?) AND form = ? "
+            "AND filed BETWEEN ? AND ? ORDER BY filed DESC, accession DESC LIMIT 1",
+            (ticker.upper(), ticker.zfill(10), form_type,
+             after_date.replace("-", ""), before_date.replace("-", ""))
+        ).fetchone()
+    
+    def download(self, ticker, form_type, year):
+        """Fetch the filing from EDGAR, index it and record the request's resolution"""
+        os.makedirs(self.root, exist_ok=True)
+        dl = sec_edgar_downloader.Downloader("FinTech-App", "noreply@fintechapp.example.com", self.root)
+        after_date, before_date = request_window(year)
         dl.get(form_type, ticker, limit=1, after=after_date, before=before_date)
-        path = os.path.join(download_dir, "sec-edgar-filings", ticker, form_type, "*", "full-submission.txt")
-        txt_files = glob.glob(path)
-        if not txt_files:
-            logger.error("No filing found for %s %s %s", ticker, form_type, year)
-            return None, None
-        txt_file = max(txt_files, key=os.path.getctime)
-        with open(txt_file, 'r', encoding='utf-8', errors='ignore') as f:
-            full_content = f.read()
+        
+        # The downloader skips submissions already on disk, so pick from the index, not by ctime
+        self.scan(ticker, form_type)
+        filing = self.newest_in_window(ticker, form_type, year)
+        if not self._usable(filing):
+            return None
+        self._remember_request(ticker, form_type, year, filing[0])
+        self.evict(keep=filing[0])
+        return filing[1]
+    
+    def resolve(self, ticker, form_type, year, refresh=False):
+        """Path of the full-submission.txt for a request, downloading only on a store miss"""
+        if not refresh:
+            path = self.lookup(ticker, form_type, year)
+            if path:
+                logger.info("Filing store hit for %s %s %s: %s", ticker, form_type, year, path)
+                return path
+        try:
+            return self.download(ticker, form_type, year)
+        except Exception as e:
+            path = self.lookup(ticker, form_type, year, allow_stale=True) or self.offline_match(ticker, form_type, year)
+            if not path:
+                raise
+            logger.warning("EDGAR refresh failed (%s), serving stored filing %s", str(e), path)
+            return path
+    
+    def offline_match(self, ticker, form_type, year):
+        """Best stored filing for a request EDGAR could not answer; not recorded as its resolution"""
+        self.scan(ticker, form_type)
+        filing = self.newest_in_window(ticker, form_type, year)
+        if not self._usable(filing):
+            return None
+        self._touch(filing[0])
+        return filing[1]
+    
+    def evict(self, keep=None):
+        """Delete least recently used submissions until the store fits in max_bytes"""
+        db = self._connection()
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM filings").fetchone()[0]
+        if total <= self.max_bytes:
+            return []
+        
+        evicted = []
+        filings_root = os.path.abspath(os.path.join(self.root, "sec-edgar-filings"))
+        for accession, path, size in db.execute(
+                "SELECT accession, path, size FROM filings ORDER BY last_access").fetchall():
+            if total <= self.max_bytes:
+                break
+            if accession == keep:
+                continue
+            filing_dir = os.path.abspath(os.path.dirname(path))
+            if filing_dir.startswith(filings_root + os.sep):
+                shutil.rmtree(filing_dir, ignore_errors=True)
+            with db:
+                db.execute("DELETE FROM filings WHERE accession = ?", (accession,))
+                db.execute("DELETE FROM requests WHERE accession = ?", (accession,))
+            total -= size
+            evicted.append(accession)
+        logger.info("Evicted %d filings from the local store", len(evicted))
+        return evicted
+
+_filing_store = None
+
+def get_filing_store():
+    global _filing_store
+    if _filing_store is None:
+        _filing_store = FilingStore()
+    return _filing_store
+
+class ParseCache:
+    """
+    Gzipped JSON cache of parse results, one file per accession and variant
+    
+    File names carry PARSER_VERSION, so editing sec_parser.py orphans every
+    existing entry; orphans are the first to go when the cache is over
+    max_bytes, followed by the least recently read entries.
+    """
+    
+    def __init__(self, root=PARSE_CACHE_DIR, max_bytes=PARSE_CACHE_MAX_BYTES, version=PARSER_VERSION):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.version = version
+    
+    def key(self, accession, ticker, form_type, year, variant="full"):
+        request = f"{ticker.upper()}|{form_type}|{year}|{variant}"
+        digest = hashlib.sha256(request.encode('utf-8')).hexdigest()[:12]
+        return f"{accession}_{digest}_{self.version}"
+    
+    def path(self, key):
+        return os.path.join(self.root, key + ".json.gz")
+    
+    def _open(self, key):
+        path = self.path(key)
+        try:
+            f = gzip.open(path, 'rb')
+        except OSError:
+            return None
+        # mtime doubles as last access time for eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return f
+    
+    def get(self, key):
+        f = self._open(key)
+        if f is None:
+            return None
+        try:
+            with f:
+                return json.load(f)
+        except (OSError, EOFError, ValueError) as e:
+            logger.warning("Discarding unreadable parse cache entry %s: %s", key, str(e))
+            self.discard(key)
+            return None
+    
+    def stream(self, key, chunk_size=65536):
+        """
+        File object holding the cached JSON as raw bytes (not decoded), or None
+        
+        The entry is fully decompressed first, so a truncated or corrupt entry
+        (bad CRC, short stream) is discarded as a miss before any of it reaches
+        the caller. Large entries spill to a temporary file instead of memory.
+        """
+        f = self._open(key)
+        if f is None:
+            return None
+        
+        out = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+        try:
+            with f:
+                shutil.copyfileobj(f, out, chunk_size)
+            out.seek(0)
+            if out.read(1) != b"{":
+                raise ValueError("not a JSON object")
+        except (OSError, EOFError, ValueError) as e:
+            out.close()
+            logger.warning("Discarding unreadable parse cache entry %s: %s", key, str(e))
+            self.discard(key)
+            return None
+        out.seek(0)
+        return out
+    
+    def put(self, key, result):
+        os.makedirs(self.root, exist_ok=True)
+        path = self.path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=6) as f:
+                json.dump(result, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("Could not write parse cache entry %s: %s", key, str(e))
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self.evict(keep=path)
+    
+    def discard(self, key):
+        try:
+            os.remove(self.path(key))
+        except OSError:
+            pass
+    
+    def evict(self, keep=None):
+        """Delete stale-version entries, then least recently read ones, until under max_bytes"""
+        entries = []
+        for path in glob.glob(os.path.join(self.root, "*.json.gz")):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            current = path.endswith(f"_{self.version}.json.gz")
+            entries.append((current, stat.st_mtime, stat.st_size, path))
+        
+        total = sum(entry[2] for entry in entries)
+        evicted = 0
+        for current, _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            evicted += 1
+        if evicted:
+            logger.info("Evicted %d parse cache entries", evicted)
+        return evicted
+
+_parse_cache = None
+
+def get_parse_cache():
+    global _parse_cache
+    if _parse_cache is None:
+        _parse_cache = ParseCache()
+    return _parse_cache
+
+def locate_sec_filing(ticker, form_type, year, refresh=False):
+    """Path of the full-submission.txt for a request, or None"""
+    try:
+        txt_file = get_filing_store().resolve(ticker, form_type, year, refresh=refresh)
+    except Exception as e:
+        logger.error("Error fetching filing for %s %s %s: %s", ticker, form_type, year, str(e))
+        return None
+    if not txt_file:
+        logger.error("No filing found for %s %s %s", ticker, form_type, year)
+    return txt_file
+
+def parse_cache_key(txt_file, ticker, form_type, year, variant="full", exhibits=()):
+    accession = get_filing_store().accession(txt_file)
+    if exhibits:
+        variant = f"{variant}+{','.join(exhibits)}"
+    return get_parse_cache().key(accession, ticker, form_type, year, variant)
+
+DOCUMENT_OPEN = re.compile(rb"<DOCUMENT>", re.I)
+DOCUMENT_CLOSE = re.compile(rb"</DOCUMENT>", re.I)
+TEXT_OPEN_OR_DOCUMENT_CLOSE = re.compile(rb"<TEXT>|</DOCUMENT>", re.I)
+TEXT_CLOSE_OR_DOCUMENT_CLOSE = re.compile(rb"</TEXT>|</DOCUMENT>", re.I)
+SEC_HEADER_OPEN = re.compile(rb"<SEC-HEADER>", re.I)
+SEC_HEADER_CLOSE = re.compile(rb"</SEC-HEADER>", re.I)
+DOCUMENT_FIELDS = {
+    'type': re.compile(rb"<TYPE>([^<\n]*)", re.I),
+    'sequence': re.compile(rb"<SEQUENCE>([^<\n]*)", re.I),
+    'filename': re.compile(rb"<FILENAME>([^<\n]*)", re.I),
+    'description': re.compile(rb"<DESCRIPTION>([^<\n]*)", re.I)
+}
+
+# Documents the parser never reads: images, archives, spreadsheets, PDFs and XBRL
+BINARY_DOCUMENT_TYPES = {'GRAPHIC', 'ZIP', 'EXCEL', 'XLSX', 'PDF', 'XML', 'JSON'}
+BINARY_TYPE_PREFIXES = ('EX-101.',)
+BINARY_EXTENSIONS = ('.jpg', '.jpeg', '.gif', '.png', '.zip', '.xls', '.xlsx', '.pdf', '.xml', '.xsd', '.json')
+BINARY_BODY_PREFIXES = (b"begin ", b"<PDF>", b"<XBRL>")
+
+def decode(data):
+    return data.decode('utf-8', errors='ignore')
+
+class SubmissionIndex:
+    """
+    Byte offsets of the SEC-HEADER and every <DOCUMENT> in a full submission
+    
+    Built with one forward scan over the raw bytes. Each document records its
+    TYPE, SEQUENCE, FILENAME and DESCRIPTION, whether it is a binary or XBRL
+    attachment, plus start/end (the document body between the DOCUMENT tags)
+    and text_start/text_end (the <TEXT> body, None when absent). Only the
+    ranges a handler asks for are ever decoded.
+    """
+    
+    def __init__(self, content):
+        self.content = content
+        self.header = None
+        self.documents = []
+        self.decoded_bytes = 0
+        self._released = 0
+        self._scan()
+    
+    def _scan(self):
+        content = self.content
+        first_document = DOCUMENT_OPEN.search(content)
+        header_limit = first_document.start() if first_document else len(content)
+        header_open = SEC_HEADER_OPEN.search(content, 0, header_limit)
+        if header_open:
+            header_close = SEC_HEADER_CLOSE.search(content, header_open.end())
+            if header_close:
+                self.header = (header_open.end(), header_close.start())
+        
+        open_match = first_document
+        while open_match:
+            start = open_match.end()
+            text_start = text_end = None
+            tag = TEXT_OPEN_OR_DOCUMENT_CLOSE.search(content, start)
+            if tag and tag.group(0).upper() == b"<TEXT>":
+                body_start = tag.end()
+                tag = TEXT_CLOSE_OR_DOCUMENT_CLOSE.search(content, body_start)
+                if tag and tag.group(0).upper() == b"</TEXT>":
+                    text_start, text_end = body_start, tag.start()
+                    tag = DOCUMENT_CLOSE.search(content, tag.end())
+            if not tag:
+                break
+            
+            fields_end = text_start if text_start is not None else tag.start()
+            document = {'start': start, 'end': tag.start(), 'text_start': text_start, 'text_end': text_end}
+            for field, pattern in DOCUMENT_FIELDS.items():
+                match = pattern.search(content, start, fields_end)
+                document[field] = decode(match.group(1)).strip() if match else None
+            document['binary'] = self._is_binary(document)
+            self.documents.append(document)
+            self._release(tag.end())
+            open_match = DOCUMENT_OPEN.search(content, tag.end())
+    
+    def _release(self, upto):
+        """Drop already scanned pages of a mapped file from RSS (they stay in the page cache)"""
+        if not isinstance(self.content, mmap.mmap) or not hasattr(mmap, 'MADV_DONTNEED'):
+            return
+        end = upto - upto % mmap.PAGESIZE
+        if end > self._released:
+            self.content.madvise(mmap.MADV_DONTNEED, self._released, end - self._released)
+            self._released = end
+    
+    def _is_binary(self, document):
+        doc_type = (document['type'] or "").upper()
+        filename = (document['filename'] or "").lower()
+        if doc_type in BINARY_DOCUMENT_TYPES or doc_type.startswith(BINARY_TYPE_PREFIXES):
+            return True
+        if filename.endswith(BINARY_EXTENSIONS):
+            return True
+        if document['text_start'] is None:
+            return False
+        body_head = self.content[document['text_start']:min(document['text_start'] + 64, document['text_end'])]
+        return body_head.lstrip().startswith(BINARY_BODY_PREFIXES)
+    
+    def slice(self, start, end):
+        """Decode content[start:end]"""
+        self.decoded_bytes += end - start
+        return decode(self.content[start:end])
+    
+    def header_text(self):
+        return self.slice(*self.header) if self.header else None
+    
+    def document(self, document):
+        return self.slice(document['start'], document['end'])
+    
+    def text(self, document):
+        if document['text_start'] is None:
+            return None
+        return self.slice(document['text_start'], document['text_end'])
+    
+    def with_text(self, include_binary=False):
+        return [
+            document for document in self.documents
+            if document['text_start'] is not None and (include_binary or not document['binary'])
+        ]
+    
+    def of_type(self, form_type, exact=False):
+        """Text documents whose TYPE is form_type (or starts with it unless exact)"""
+        return [
+            document for document in self.with_text()
+            if document['type'] is not None and
+            (document['type'] == form_type if exact else document['type'].startswith(form_type))
+        ]
+    
+    def primary(self, form_type):
+        """The form document itself, falling back to the first text document"""
+        candidates = self.of_type(form_type) or self.with_text()
+        return candidates[0] if candidates else None
+    
+    def html_span(self, document):
+        """(start, end) from the first <HTML> to the last </HTML> of a document"""
+        html_start = self.content.find(b"<HTML>", document['start'], document['end'])
+        html_end = self.content.rfind(b"</HTML>", document['start'], document['end']) + len(b"</HTML>")
+        return (html_start, html_end) if html_start != -1 and html_end > html_start else None
+    
+    def form_html(self, form_type, exhibits=()):
+        """
+        HTML of the primary form document plus any requested exhibits
+        
+        exhibits are TYPE prefixes (e.g. "EX-13"). Returns None when the
+        primary document has no HTML.
+        """
+        primary = self.primary(form_type)
+        span = self.html_span(primary) if primary else None
+        if not span:
+            return None
+        parts = [self.slice(*span)]
+        for document in self.with_text():
+            if document is primary or not document['type']:
+                continue
+            if any(document['type'].startswith(exhibit) for exhibit in exhibits):
+                exhibit_span = self.html_span(document)
+                parts.append(self.slice(*exhibit_span) if exhibit_span else self.text(document))
+        return "\n".join(parts)
+
+class Submission:
+    """
+    A full-submission.txt opened via mmap and decoded on demand
+    
+    Stands in for the submission string the handlers used to receive:
+    slicing decodes just that range and str() decodes everything (last resort).
+    """
+    
+    def __init__(self, data, mapped=None):
+        self.data = data
+        self._mapped = mapped
+        self.index = SubmissionIndex(data)
+    
+    @classmethod
+    def open(cls, path):
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return cls(b"")
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(mapped, mapped)
+    
+    @classmethod
+    def from_text(cls, text):
+        return cls(text.encode('utf-8'))
+    
+    def __len__(self):
+        return len(self.data)
+    
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            raise TypeError("Submission only supports slicing")
+        start, end, _ = key.indices(len(self.data))
+        return self.index.slice(start, end)
+    
+    def __str__(self):
+        return self.index.slice(0, len(self.data))
+    
+    def close(self):
+        if self._mapped is not None:
+            self.index.content = self.data = b""
+            self._mapped.close()
+            self._mapped = None
+
+_last_text_submission = (None, None)
+
+def submission_index(full_content):
+    """Index for a Submission, or for a plain submission string (reused when passed again)"""
+    global _last_text_submission
+    if isinstance(full_content, Submission):
+        return full_content.index
+    if _last_text_submission[0] is not full_content:
+        _last_text_submission = (full_content, Submission.from_text(full_content))
+    return _last_text_submission[1].index
+
+def fetch_sec_filing(ticker, form_type, year, refresh=False, exhibits=()):
+    txt_file = locate_sec_filing(ticker, form_type, year, refresh=refresh)
+    if not txt_file:
+        return None, None
+    return load_sec_filing(txt_file, ticker, form_type, year, exhibits)
+
+def load_sec_filing(txt_file, ticker, form_type, year, exhibits=()):
+    """
+    (html_content, submission) for a downloaded filing
+    
+    The submission is memory-mapped, not read: only the primary form document
+    and requested exhibits are decoded, binary attachments are never touched.
+    """
+    full_content = None
+    try:
+        full_content = Submission.open(txt_file)
+        index = full_content.index
+        logger.info("Indexed %d documents in %s (%d binary/XBRL skipped)", len(index.documents), txt_file,
+                    sum(1 for doc in index.documents if doc['binary']))
         
         # Check if this is a large-cap stock that might need special handling
         is_large_cap = ticker.upper() in LARGE_CAP_TICKERS
@@ -50,68 +670,57 @@ def fetch_sec_filing(ticker, form_type, year):
         # Special handling for TSLA which often has XBRL-heavy filings
         if ticker.upper() == 'TSLA':
             logger.info("Special handling for TSLA filing")
-            return handle_special_filing(full_content, form_type, ticker)
+            return handle_special_filing(full_content, form_type, ticker, exhibits)
         
         # Enhanced handling for large-cap stocks with complex filings
         elif is_large_cap:
             logger.info("Enhanced handling for large-cap stock: %s", ticker.upper())
-            return handle_large_cap_filing(full_content, form_type, ticker)
+            return handle_large_cap_filing(full_content, form_type, ticker, exhibits)
             
         # Standard processing for regular filings
-        html_start = full_content.find("<HTML>")
-        html_end = full_content.rfind("</HTML>") + len("</HTML>")
-        if html_start != -1 and html_end > html_start:
+        html_content = index.form_html(form_type, exhibits)
+        if html_content:
             logger.info("Extracted HTML content from %s", txt_file)
-            return full_content[html_start:html_end], full_content
-        documents = re.findall(r"<DOCUMENT>(.*?)</DOCUMENT>", full_content, re.DOTALL | re.IGNORECASE)
-        for doc in documents:
-            if f"<TYPE>{form_type}" in doc:
-                text_match = re.search(r"<TEXT>(.*?)</TEXT>", doc, re.DOTALL | re.IGNORECASE)
-                if text_match:
-                    logger.info("Extracted TEXT section for %s", form_type)
-                    return text_match.group(1), full_content
+            return html_content, full_content
+        for doc in index.of_type(form_type):
+            logger.info("Extracted TEXT section for %s", form_type)
+            return index.text(doc), full_content
         logger.error("No valid HTML or TEXT section found in %s", txt_file)
+        full_content.close()
         return None, None
     except Exception as e:
         logger.error("Error fetching filing for %s %s %s: %s", ticker, form_type, year, str(e))
+        if full_content is not None:
+            full_content.close()
         return None, None
 
-def handle_special_filing(full_content, form_type, ticker):
+def handle_special_filing(full_content, form_type, ticker, exhibits=()):
     """Special handler for Tesla filings which often have complex XBRL formatting"""
     logger.info("Processing %s filing with special handler", ticker)
     
+    index = submission_index(full_content)
+    
     # For TSLA specifically, first try to find the document with exactly this form type
     if ticker.upper() == 'TSLA':
-        documents = re.findall(r"<DOCUMENT>(.*?)</DOCUMENT>", full_content, re.DOTALL | re.IGNORECASE)
-        for doc in documents:
-            type_match = re.search(r"<TYPE>(.*?)</TYPE>", doc, re.DOTALL | re.IGNORECASE)
-            if type_match and type_match.group(1).strip() == form_type:
-                text_match = re.search(r"<TEXT>(.*?)</TEXT>", doc, re.DOTALL | re.IGNORECASE)
-                if text_match:
-                    content = text_match.group(1)
-                    logger.info("Found exact %s document for TSLA", form_type)
-                    return content, full_content
+        for doc in index.of_type(form_type, exact=True):
+            logger.info("Found exact %s document for TSLA", form_type)
+            return index.text(doc), full_content
         
         # If form not found directly, try specific sections for form 10-K
         if form_type == '10-K':
             # For 10-K, look for common sections that must be present
-            for doc in documents:
-                doc_content = doc.lower()
+            for doc in index.with_text():
+                doc_content = index.document(doc).lower()
                 # Look for key 10-K sections that must be included
                 if ('item 1' in doc_content and 'item 1a' in doc_content and 
                     'risk factors' in doc_content and 'management\'s discussion' in doc_content):
-                    text_match = re.search(r"<TEXT>(.*?)</TEXT>", doc, re.DOTALL | re.IGNORECASE)
-                    if text_match:
-                        content = text_match.group(1)
-                        logger.info("Found likely 10-K content for TSLA based on section markers")
-                        return content, full_content
+                    logger.info("Found likely 10-K content for TSLA based on section markers")
+                    return index.text(doc), full_content
     
     # First try to find the HTML section
-    html_start = full_content.find("<HTML>")
-    html_end = full_content.rfind("</HTML>") + len("</HTML>")
+    html_content = index.form_html(form_type, exhibits)
     
-    if html_start != -1 and html_end > html_start:
-        html_content = full_content[html_start:html_end]
+    if html_content:
         
         # XBRL tags often found in TSLA and other complex filings
         # Replace all ix:* tags with simple div tags to make parsing easier
@@ -120,38 +729,30 @@ def handle_special_filing(full_content, form_type, ticker):
         
         return html_content, full_content
     
-    # Try to extract from documents
-    documents = re.findall(r"<DOCUMENT>(.*?)</DOCUMENT>", full_content, re.DOTALL | re.IGNORECASE)
-    
     # Look for the form
-    for doc in documents:
-        if f"<TYPE>{form_type}" in doc:
-            text_match = re.search(r"<TEXT>(.*?)</TEXT>", doc, re.DOTALL | re.IGNORECASE)
-            if text_match:
-                return text_match.group(1), full_content
+    for doc in index.of_type(form_type):
+        return index.text(doc), full_content
     
     # If we can't find the right document, try looking for HTML in any document
-    for doc in documents:
-        if "<HTML>" in doc:
-            html_start = doc.find("<HTML>")
-            html_end = doc.rfind("</HTML>") + len("</HTML>")
-            if html_start != -1 and html_end > html_start:
-                return doc[html_start:html_end], full_content
+    for doc in index.with_text():
+        html_span = index.html_span(doc)
+        if html_span:
+            return index.slice(*html_span), full_content
     
     # Last resort - just return the full content
     logger.warning("Could not find proper HTML/TEXT section for %s, using full content", ticker)
-    return full_content, full_content
+    return str(full_content), full_content
 
-def handle_large_cap_filing(full_content, form_type, ticker):
+def handle_large_cap_filing(full_content, form_type, ticker, exhibits=()):
     """Enhanced handler for large-cap stocks with complex filings"""
     logger.info("Processing %s filing with large-cap handler", ticker)
     
+    index = submission_index(full_content)
+    
     # First try standard HTML extraction
-    html_start = full_content.find("<HTML>")
-    html_end = full_content.rfind("</HTML>") + len("</HTML>")
+    html_content = index.form_html(form_type, exhibits)
     
-    if html_start != -1 and html_end > html_start:
-        html_content = full_content[html_start:html_end]
+    if html_content:
         
         # Some large-caps use XBRL tags, handle them more gracefully
         if "<ix:" in html_content:
@@ -162,33 +763,26 @@ def handle_large_cap_filing(full_content, form_type, ticker):
         return html_content, full_content
     
     # If no HTML found, try document extraction
-    documents = re.findall(r"<DOCUMENT>(.*?)</DOCUMENT>", full_content, re.DOTALL | re.IGNORECASE)
-    
     # First look for the specific form type
-    for doc in documents:
-        if f"<TYPE>{form_type}" in doc:
-            text_match = re.search(r"<TEXT>(.*?)</TEXT>", doc, re.DOTALL | re.IGNORECASE)
-            if text_match:
-                content = text_match.group(1)
-                if "<HTML>" in content:
-                    # Extract just the HTML portion if available
-                    html_start = content.find("<HTML>")
-                    html_end = content.rfind("</HTML>") + len("</HTML>")
-                    if html_end > html_start:
-                        return content[html_start:html_end], full_content
-                return content, full_content
+    for doc in index.of_type(form_type):
+        content = index.text(doc)
+        if "<HTML>" in content:
+            # Extract just the HTML portion if available
+            html_start = content.find("<HTML>")
+            html_end = content.rfind("</HTML>") + len("</HTML>")
+            if html_end > html_start:
+                return content[html_start:html_end], full_content
+        return content, full_content
     
     # If form not found, look for any HTML content in other documents
-    for doc in documents:
-        if "<HTML>" in doc:
-            html_start = doc.find("<HTML>")
-            html_end = doc.rfind("</HTML>") + len("</HTML>")
-            if html_start != -1 and html_end > html_start:
-                return doc[html_start:html_end], full_content
+    for doc in index.with_text():
+        html_span = index.html_span(doc)
+        if html_span:
+            return index.slice(*html_span), full_content
     
     # Fallback to the full content as a last resort
     logger.warning("Could not extract specific content for %s, using full submission", ticker)
-    return full_content, full_content
+    return str(full_content), full_content
 
 def clean_text(text):
     if not text:
@@ -245,10 +839,10 @@ def parse_sections(html_content, full_content, form_type, ticker):
             return re.sub(r'<ix:.*?>|</ix:.*?>', '', text, flags=re.DOTALL)
 
         # Extract metadata from SEC-HEADER using full_content
-        sec_header = re.search(r'<SEC-HEADER>(.*?)</SEC-HEADER>', full_content, re.DOTALL | re.IGNORECASE)
+        sec_header = submission_index(full_content).header_text()
         header_text = ""
-        if sec_header:
-            header_text = clean_xbrl(sec_header.group(1))
+        if sec_header is not None:
+            header_text = clean_xbrl(sec_header)
             logger.info("SEC-HEADER found: %s", header_text[:200])
             cik_match = re.search(r'(?:CENTRAL INDEX KEY|CIK|CIK Number):\s*0*(\d{1,10})', header_text, re.I)
             if cik_match:
@@ -659,12 +1253,42 @@ def create_artificial_sections(full_text, ticker, toc_sections):
     
     return sections
 
-def parse_filing(ticker, form_type, year):
+def parse_filing(ticker, form_type, year, refresh=False, exhibits=()):
+    """
+    Structured and chunked output for a filing, served from the parse cache when possible
+    
+    exhibits lists TYPE prefixes (e.g. "EX-13") parsed along with the form document.
+    """
+    full_content = None
     try:
-        html_content, full_content = fetch_sec_filing(ticker, form_type, year)
+        txt_file = locate_sec_filing(ticker, form_type, year, refresh=refresh)
+        if not txt_file:
+            return {"error": "Filing could not be processed. Check ticker, form type, or year."}
+        
+        exhibits = tuple(exhibits or ())
+        cache_key = parse_cache_key(txt_file, ticker, form_type, year, exhibits=exhibits)
+        cached = get_parse_cache().get(cache_key)
+        if cached is not None:
+            logger.info("Parse cache hit for %s %s %s", ticker, form_type, year)
+            return cached
+        
+        html_content, full_content = load_sec_filing(txt_file, ticker, form_type, year, exhibits)
         if not html_content or not full_content:
             return {"error": "Filing could not be processed. Check ticker, form type, or year."}
         
+        result = parse_filing_content(html_content, full_content, ticker, form_type, year)
+        if result and not result.get("error"):
+            get_parse_cache().put(cache_key, result)
+        return result
+    except Exception as e:
+        logger.error("Error in parse_filing: %s", str(e))
+        return {"error": f"Error processing SEC filing: {str(e)}"}
+    finally:
+        if full_content is not None:
+            full_content.close()
+
+def parse_filing_content(html_content, full_content, ticker, form_type, year):
+    try:
         # Special case handling for TSLA
         if ticker.upper() == 'TSLA' and form_type == '10-K':
             # Try the special TSLA parser first
@@ -722,26 +1346,21 @@ def parse_tsla_filing(html_content, full_content, form_type, year):
     try:
         logger.info("Using custom TSLA 10-K parser")
         
-        # Extract documents from the full submission
-        documents = re.findall(r"<DOCUMENT>(.*?)</DOCUMENT>", full_content, re.DOTALL | re.IGNORECASE)
+        # Index the documents of the full submission
+        index = submission_index(full_content)
+        documents = index.documents
         
         # Find the 10-K document
         form_document = None
-        for doc in documents:
-            type_match = re.search(r"<TYPE>(.*?)</TYPE>", doc, re.DOTALL | re.IGNORECASE)
-            if type_match and type_match.group(1).strip() == form_type:
-                text_match = re.search(r"<TEXT>(.*?)</TEXT>", doc, re.DOTALL | re.IGNORECASE)
-                if text_match:
-                    form_document = text_match.group(1)
-                    logger.info("Found 10-K document for TSLA")
-                    break
+        for doc in index.of_type(form_type, exact=True):
+            form_document = index.text(doc)
+            logger.info("Found 10-K document for TSLA")
+            break
         
         if not form_document:
             # Try to find HTML in the full content as fallback
-            html_start = full_content.find("<HTML>")
-            html_end = full_content.rfind("</HTML>") + len("</HTML>")
-            if html_start != -1 and html_end > html_start:
-                form_document = full_content[html_start:html_end]
+            form_document = index.form_html(form_type)
+            if form_document:
                 logger.info("Using HTML content as fallback for TSLA")
             else:
                 logger.warning("Could not find 10-K document for TSLA")
@@ -901,16 +1520,13 @@ def parse_tsla_filing(html_content, full_content, form_type, year):
             logger.info("Searching in other documents for TSLA sections")
             
             for doc in documents:
-                doc_type = re.search(r"<TYPE>(.*?)</TYPE>", doc, re.IGNORECASE)
-                
-                # Skip the main document we already processed
-                if doc_type and doc_type.group(1).strip() == form_type:
+                # Skip the main document we already processed, and attachments with no text
+                if doc['type'] == form_type or doc['binary']:
                     continue
                 
                 # Get the text
-                text_match = re.search(r"<TEXT>(.*?)</TEXT>", doc, re.DOTALL | re.IGNORECASE)
-                if text_match:
-                    doc_text = text_match.group(1)
+                doc_text = index.text(doc)
+                if doc_text:
                     doc_soup = BeautifulSoup(doc_text, 'lxml')
                     all_doc_text = doc_soup.get_text()
                     
@@ -990,120 +1606,150 @@ def parse_tsla_filing(html_content, full_content, form_type, year):
         logger.error(f"Error in TSLA special parser: {str(e)}")
         return {"error": f"Error in TSLA special parser: {str(e)}"}
 
+def trim_parse_result(result, ticker):
+    """Truncate oversized sections and chunk lists for CLI output"""
+    if isinstance(result, dict) and "structured" in result and "chunked" in result:
+        # Check if this is a large cap stock
+        is_large_cap = ticker.upper() in LARGE_CAP_TICKERS
+        
+        # Define max sizes based on section importance and company size
+        if is_large_cap:
+            # Larger limits for large-cap companies like TSLA, AAPL, etc.
+            max_sizes = {
+                "item_1": 80000,    # Business section
+                "item_1a": 120000,  # Risk factors
+                "item_7": 120000,   # MD&A
+                "item_8": 200000,   # Financial statements - largest usually
+                "default": 60000    # Default for other sections
+            }
+            max_chunks = 1500       # More chunks for large companies
+        else:
+            # Standard limits for smaller companies
+            max_sizes = {
+                "item_1": 50000,    # Business section
+                "item_1a": 100000,  # Risk factors
+                "item_7": 100000,   # MD&A
+                "item_8": 150000,   # Financial statements
+                "default": 50000    # Default for other sections
+            }
+            max_chunks = 1000       # Standard chunk limit
+        
+        # Clean up sections
+        for key, section in result["structured"].items():
+            if not isinstance(section, dict) or "text" not in section:
+                continue
+                
+            # Get appropriate max size
+            max_size = max_sizes.get(key, max_sizes["default"])
+            
+            # Check if truncation needed
+            if len(section["text"]) > max_size:
+                # For item_8 (financial statements), try to keep important tables
+                if key == "item_8" and len(section["text"]) > max_size:
+                    # Try to find the most important tables
+                    logger.warning(f"Smart truncating {key} financial statements from {len(section['text'])} characters")
+                    
+                    # Keep beginning and look for important tables with keywords
+                    important_keywords = [
+                        "consolidated balance sheets", 
+                        "consolidated statements of operations",
+                        "consolidated income statements",
+                        "statements of income",
+                        "statement of earnings",
+                        "statements of cash flows",
+                        "statements of stockholders",
+                        "notes to consolidated"
+                    ]
+                    
+                    # For large-cap companies, add more potential keywords
+                    if is_large_cap:
+                        additional_keywords = [
+                            "consolidated statements of comprehensive income",
+                            "consolidated statements of cash flows",
+                            "consolidated statements of stockholders' equity",
+                            "consolidated statements of changes in equity",
+                            "consolidated statements of financial position",
+                            "notes to financial statements"
+                        ]
+                        important_keywords.extend(additional_keywords)
+                    
+                    text = section["text"]
+                    beginning = text[:25000] if is_large_cap else text[:20000]  # Keep larger first part for large caps
+                    
+                    # Try to find important tables
+                    important_sections = []
+                    for keyword in important_keywords:
+                        pos = text.lower().find(keyword)
+                        if pos >= 0:
+                            # Extract a portion around this keyword
+                            # For large caps, extract larger portions
+                            extract_size = 15000 if is_large_cap else 10000
+                            start = max(0, pos - 500)
+                            end = min(len(text), pos + extract_size)
+                            important_sections.append(text[start:end])
+                    
+                    # Combine sections with markers
+                    if important_sections:
+                        truncated_text = beginning + "\n\n... [CONTENT TRUNCATED] ...\n\n" + "\n\n... [SECTION BREAK] ...\n\n".join(important_sections)
+                        if len(truncated_text) > max_size:
+                            truncated_text = truncated_text[:max_size] + "... [TRUNCATED]"
+                        section["text"] = truncated_text
+                        logger.warning(f"Created smart extract for {key} with {len(important_sections)} important sections")
+                    else:
+                        section["text"] = section["text"][:max_size] + "... [TRUNCATED]"
+                else:
+                    section["text"] = section["text"][:max_size] + "... [TRUNCATED]"
+                logger.warning(f"Truncated section {key} from {len(section['text'])} to {max_size} characters")
+        
+        # Limit the number of chunks if excessive
+        if len(result["chunked"]["chunks"]) > max_chunks:
+            result["chunked"]["chunks"] = result["chunked"]["chunks"][:max_chunks]
+            result["chunked"]["_note"] = f"Limited to first {max_chunks} chunks due to size constraints"
+            logger.warning(f"Limited output to {max_chunks} chunks due to size constraints")
+    return result
+
 if __name__ == "__main__":
-    if len(sys.argv) != 4:
-        print("Usage: python sec_parser.py <ticker> <form_type> <year>")
+    refresh = "--refresh" in sys.argv[1:]
+    exhibits = ()
+    for arg in sys.argv[1:]:
+        if arg.startswith("--exhibits="):
+            exhibits = tuple(exhibit.strip() for exhibit in arg.split("=", 1)[1].split(",") if exhibit.strip())
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if len(args) != 3:
+        print("Usage: python sec_parser.py <ticker> <form_type> <year> [--refresh] [--exhibits=EX-13,...]")
         sys.exit(1)
     
-    ticker = sys.argv[1]
-    form_type = sys.argv[2]
-    year = sys.argv[3]
+    ticker = args[0]
+    form_type = args[1]
+    year = args[2]
     
     try:
         # Limit excessive logging for large files
         logging.getLogger().setLevel(logging.WARNING)
         
-        result = parse_filing(ticker, form_type, year)
+        trimmed_key = None
+        txt_file = None if refresh else locate_sec_filing(ticker, form_type, year)
+        if txt_file:
+            # The CLI output is cached too, so a hit is copied to stdout without decoding it
+            trimmed_key = parse_cache_key(txt_file, ticker, form_type, year, variant="trimmed", exhibits=exhibits)
+            cached = get_parse_cache().stream(trimmed_key)
+            if cached is not None:
+                with cached:
+                    shutil.copyfileobj(cached, sys.stdout.buffer)
+                sys.stdout.buffer.write(b"\n")
+                sys.stdout.flush()
+                sys.exit(0)
+        
+        result = parse_filing(ticker, form_type, year, refresh=refresh, exhibits=exhibits)
         
-        # For very large results, trim sections if needed
         if isinstance(result, dict) and "structured" in result and "chunked" in result:
-            # Check if this is a large cap stock
-            is_large_cap = ticker.upper() in LARGE_CAP_TICKERS
-            
-            # Define max sizes based on section importance and company size
-            if is_large_cap:
-                # Larger limits for large-cap companies like TSLA, AAPL, etc.
-                max_sizes = {
-                    "item_1": 80000,    # Business section
-                    "item_1a": 120000,  # Risk factors
-                    "item_7": 120000,   # MD&A
-                    "item_8": 200000,   # Financial statements - largest usually
-                    "default": 60000    # Default for other sections
-                }
-                max_chunks = 1500       # More chunks for large companies
-            else:
-                # Standard limits for smaller companies
-                max_sizes = {
-                    "item_1": 50000,    # Business section
-                    "item_1a": 100000,  # Risk factors
-                    "item_7": 100000,   # MD&A
-                    "item_8": 150000,   # Financial statements
-                    "default": 50000    # Default for other sections
-                }
-                max_chunks = 1000       # Standard chunk limit
-            
-            # Clean up sections
-            for key, section in result["structured"].items():
-                if not isinstance(section, dict) or "text" not in section:
-                    continue
-                    
-                # Get appropriate max size
-                max_size = max_sizes.get(key, max_sizes["default"])
-                
-                # Check if truncation needed
-                if len(section["text"]) > max_size:
-                    # For item_8 (financial statements), try to keep important tables
-                    if key == "item_8" and len(section["text"]) > max_size:
-                        # Try to find the most important tables
-                        logger.warning(f"Smart truncating {key} financial statements from {len(section['text'])} characters")
-                        
-                        # Keep beginning and look for important tables with keywords
-                        important_keywords = [
-                            "consolidated balance sheets", 
-                            "consolidated statements of operations",
-                            "consolidated income statements",
-                            "statements of income",
-                            "statement of earnings",
-                            "statements of cash flows",
-                            "statements of stockholders",
-                            "notes to consolidated"
-                        ]
-                        
-                        # For large-cap companies, add more potential keywords
-                        if is_large_cap:
-                            additional_keywords = [
-                                "consolidated statements of comprehensive income",
-                                "consolidated statements of cash flows",
-                                "consolidated statements of stockholders' equity",
-                                "consolidated statements of changes in equity",
-                                "consolidated statements of financial position",
-                                "notes to financial statements"
-                            ]
-                            important_keywords.extend(additional_keywords)
-                        
-                        text = section["text"]
-                        beginning = text[:25000] if is_large_cap else text[:20000]  # Keep larger first part for large caps
-                        
-                        # Try to find important tables
-                        important_sections = []
-                        for keyword in important_keywords:
-                            pos = text.lower().find(keyword)
-                            if pos >= 0:
-                                # Extract a portion around this keyword
-                                # For large caps, extract larger portions
-                                extract_size = 15000 if is_large_cap else 10000
-                                start = max(0, pos - 500)
-                                end = min(len(text), pos + extract_size)
-                                important_sections.append(text[start:end])
-                        
-                        # Combine sections with markers
-                        if important_sections:
-                            truncated_text = beginning + "\n\n... [CONTENT TRUNCATED] ...\n\n" + "\n\n... [SECTION BREAK] ...\n\n".join(important_sections)
-                            if len(truncated_text) > max_size:
-                                truncated_text = truncated_text[:max_size] + "... [TRUNCATED]"
-                            section["text"] = truncated_text
-                            logger.warning(f"Created smart extract for {key} with {len(important_sections)} important sections")
-                        else:
-                            section["text"] = section["text"][:max_size] + "... [TRUNCATED]"
-                    else:
-                        section["text"] = section["text"][:max_size] + "... [TRUNCATED]"
-                    logger.warning(f"Truncated section {key} from {len(section['text'])} to {max_size} characters")
-            
-            # Limit the number of chunks if excessive
-            if len(result["chunked"]["chunks"]) > max_chunks:
-                result["chunked"]["chunks"] = result["chunked"]["chunks"][:max_chunks]
-                result["chunked"]["_note"] = f"Limited to first {max_chunks} chunks due to size constraints"
-                logger.warning(f"Limited output to {max_chunks} chunks due to size constraints")
+            result = trim_parse_result(result, ticker)
+            if trimmed_key is None:
+                txt_file = locate_sec_filing(ticker, form_type, year)
+                trimmed_key = txt_file and parse_cache_key(txt_file, ticker, form_type, year,
+                                                           variant="trimmed", exhibits=exhibits)
+            if trimmed_key:
+                get_parse_cache().put(trimmed_key, result)
         
         print(json.dumps(result))
     except Exception as e:
@@ -721,4 +721,15 @@ const startServer = () => {
   }
 };
 
+// Stop the warm corporate.py workers with the server so they are not orphaned
+const shutdown = (signal) => {
+  console.log(`\n🛑 Received ${signal}, shutting down...`);
+  corporateRoutes.shutdownSentimentWorkers();
+  server.close(() => process.exit(0));
+  setTimeout(() => process.exit(0), 5000).unref();
+};
+
+process.on('SIGINT', () => shutdown('SIGINT'));
+process.on('SIGTERM', () => shutdown('SIGTERM'));
+
 startServer();
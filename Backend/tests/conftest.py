@@ -0,0 +1,83 @@
+"""
+Shared pytest setup for the Backend Python code
+
+corporate.py reads its configuration from the environment at import time, so
+it is set here before any test module imports it. Unless FINBERT_MODEL_DIR
+already points at a model, a tiny randomly initialized BERT classifier with
+FinBERT's label set is built once per session: its scores mean nothing, but
+the fast tokenizer, direct inference and pipeline paths all run offline.
+"""
+import os
+import sys
+import atexit
+import shutil
+import string
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "api"))
+
+TINY_MODEL_WORDS = (
+    "the a an and or but of to in on for with we our is are was were be been this that it as at by from "
+    "revenue revenues growth grew margin margins profit profits earnings quarter year guidance demand "
+    "strong strongly weak weaker solid record improved improvement decline declined loss losses risk risks "
+    "concern concerns expect expected outlook cash flow costs cost sales customers market markets "
+    "thank thanks you question questions call operator ceo cfo analyst good morning results"
+).split()
+
+def build_tiny_model(path):
+    """Save a seeded 2-layer BERT classifier and WordPiece tokenizer to path"""
+    import torch
+    from transformers import BertConfig, BertForSequenceClassification, BertTokenizerFast
+
+    torch.manual_seed(0)
+    characters = string.ascii_lowercase + string.digits
+    vocab = (["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + TINY_MODEL_WORDS
+             + list(characters + string.punctuation) + ["##" + c for c in characters])
+    os.makedirs(path, exist_ok=True)
+    vocab_file = os.path.join(path, "vocab.txt")
+    with open(vocab_file, "w", encoding="utf-8") as f:
+        f.write("\n".join(dict.fromkeys(vocab)))
+
+    tokenizer = BertTokenizerFast(vocab_file=vocab_file, do_lower_case=True)
+    tokenizer.model_max_length = 512
+    labels = ("positive", "negative", "neutral")
+    config = BertConfig(
+        vocab_size=len(dict.fromkeys(vocab)), hidden_size=32, num_hidden_layers=2, num_attention_heads=2,
+        intermediate_size=64, max_position_embeddings=512, num_labels=3,
+        id2label=dict(enumerate(labels)), label2id={label: i for i, label in enumerate(labels)}
+    )
+    model = BertForSequenceClassification(config)
+    # Spread the logits so labels and confidences vary between chunks
+    with torch.no_grad():
+        model.classifier.weight.mul_(40)
+    model.save_pretrained(path)
+    tokenizer.save_pretrained(path)
+
+_scratch_dir = tempfile.mkdtemp(prefix="backend-tests-")
+atexit.register(shutil.rmtree, _scratch_dir, True)
+
+if not os.environ.get("FINBERT_MODEL_DIR"):
+    try:
+        build_tiny_model(os.path.join(_scratch_dir, "model"))
+        os.environ["FINBERT_MODEL_DIR"] = os.path.join(_scratch_dir, "model")
+    except ImportError:
+        # corporate.load_finbert reports the missing library; model-backed tests fail with that message
+        pass
+
+os.environ.setdefault("FINBERT_CACHE", "off")
+os.environ.setdefault("FINBERT_PROCESSES", "0")
+os.environ["FINBERT_BOILERPLATE_PATH"] = os.path.join(_scratch_dir, "boilerplate_library.json")
+os.environ["FINBERT_PROFILE_DIR"] = ""
+
+@pytest.fixture
+def transcript():
+    """Thirty CEO/analyst turns: long enough for many 32-token chunks"""
+    return " ".join(
+        f"CEO: Revenue grew strongly in quarter {i} and margins improved. "
+        f"Analyst: Are you concerned about weak demand and higher costs in region {i}?"
+        for i in range(30)
+    )
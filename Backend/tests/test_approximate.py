@@ -0,0 +1,35 @@
+import corporate
+
+OPTIONS = {'max_tokens': 32, 'use_cache': False}
+
+def test_approximate_sentiment_bounds_the_sample(transcript):
+    result = corporate.handle_request({
+        'action': 'analyze', 'text': transcript,
+        'options': {**OPTIONS, 'approximate': True, 'max_sample_size': 8, 'min_sample_size': 4}
+    })
+
+    assert 'error' not in result
+    assert 4 <= result['sample_size'] <= 8 < result['population_chunks']
+    assert result['metadata']['exact'] is False
+    low, high = result['confidence_interval']
+    assert low <= result['overall_sentiment'] <= high
+    assert len(result['sentiments']) == result['sample_size']
+
+def test_approximate_sampling_is_seeded(transcript):
+    options = {**OPTIONS, 'approximate': True, 'max_sample_size': 8, 'seed': 3}
+
+    first = corporate.analyze_sentiment(transcript, options)
+    second = corporate.analyze_sentiment(transcript, options)
+
+    assert [chunk['chunk_id'] for chunk in first['sentiments']] == [chunk['chunk_id'] for chunk in second['sentiments']]
+    assert first['overall_sentiment'] == second['overall_sentiment']
+
+def test_full_sample_is_exact(transcript):
+    # A negative tolerance never converges, so sampling runs until every chunk is scored
+    result = corporate.analyze_sentiment(
+        transcript, {**OPTIONS, 'approximate': True, 'max_sample_size': 1000, 'tolerance': -1.0}
+    )
+
+    assert result['metadata']['exact'] is True
+    assert result['sample_size'] == result['population_chunks'] == len(result['sentiments'])
+    assert result['confidence_interval'] == [result['overall_sentiment'], result['overall_sentiment']]
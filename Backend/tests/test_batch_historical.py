@@ -0,0 +1,30 @@
+import pytest
+
+import corporate
+
+OPTIONS = {'max_tokens': 32, 'use_cache': False}
+
+def test_batch_historical_matches_single_requests(transcript):
+    items = [
+        {'ticker': 'AAPL', 'year': 2024, 'quarter': 1, 'transcript': transcript},
+        {'ticker': 'MSFT', 'year': 2024, 'quarter': 2, 'transcript': transcript[:700]},
+        {'ticker': 'EMPTY', 'year': 2024, 'quarter': 3, 'transcript': ''}
+    ]
+
+    batch = corporate.handle_request({'action': 'batch_historical', 'items': items, 'options': OPTIONS})
+
+    assert batch['metadata']['total'] == 3
+    assert batch['metadata']['successful'] == 2
+    assert batch['metadata']['shared_batching'] is True
+    for item, result in zip(items[:2], batch['results']):
+        single = corporate.handle_request({'action': 'historical', **item, 'options': OPTIONS})
+        assert (result['ticker'], result['year'], result['quarter']) == (item['ticker'], item['year'], item['quarter'])
+        assert len(result['sentiments']) == len(single['sentiments'])
+        assert result['overall_sentiment'] == pytest.approx(single['overall_sentiment'], abs=1e-3)
+    # One bad item is reported in place without failing the batch
+    assert 'error' in batch['results'][2]
+    assert batch['results'][2]['ticker'] == 'EMPTY'
+
+def test_batch_historical_rejects_empty_batch():
+    assert corporate.process_historical_batch([])['type'] == 'batch_historical_error'
+    assert corporate.handle_request({'action': 'batch_historical'})['type'] == 'batch_historical_error'
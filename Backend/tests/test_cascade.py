@@ -0,0 +1,27 @@
+import pytest
+
+import corporate
+
+OPTIONS = {'max_tokens': 32, 'use_cache': False}
+
+def test_cascade_reports_routing(transcript):
+    result = corporate.handle_request({
+        'action': 'analyze', 'text': transcript, 'options': {**OPTIONS, 'cascade': True}
+    })
+
+    cascade = result['metadata']['cascade']
+    assert cascade['enabled'] is True
+    assert cascade['total_chunks'] == len(result['sentiments'])
+    assert cascade['escalated'] + cascade['lexicon_scored'] + cascade['validation_sample'] == cascade['total_chunks']
+    assert 0.0 <= cascade['agreement_rate'] <= 1.0
+
+def test_cascade_with_closed_band_is_plain_finbert(transcript):
+    # No lexicon result can have a margin above 1, so every chunk is escalated
+    cascaded = corporate.analyze_sentiment(transcript, {**OPTIONS, 'cascade': True, 'cascade_min_margin': 1.1})
+    plain = corporate.analyze_sentiment(transcript, OPTIONS)
+
+    cascade = cascaded['metadata']['cascade']
+    assert cascade['escalated'] == cascade['total_chunks'] == len(plain['sentiments'])
+    assert cascade['lexicon_scored'] == 0
+    assert [chunk['label'] for chunk in cascaded['sentiments']] == [chunk['label'] for chunk in plain['sentiments']]
+    assert cascaded['overall_sentiment'] == pytest.approx(plain['overall_sentiment'], abs=1e-3)
@@ -0,0 +1,49 @@
+import pytest
+
+import corporate
+
+TRANSCRIPT = " ".join(
+    f"CEO: Revenue grew {i} percent in the quarter and margins improved. "
+    f"Analyst: Are you concerned about weak demand, higher costs and the outlook for region {i}? "
+    f"CFO: Cash flow was solid; we expect growth to continue next year."
+    for i in range(25)
+)
+LONG_SENTENCE = " ".join(["revenue growth was strong across every market"] * 60) + "."
+
+@pytest.mark.parametrize("text", [TRANSCRIPT, LONG_SENTENCE, TRANSCRIPT + " " + LONG_SENTENCE],
+                         ids=["transcript", "long_sentence", "mixed"])
+@pytest.mark.parametrize("max_tokens", [8, 16, 64, corporate.DEFAULT_MAX_CHUNK_TOKENS])
+def test_token_budget_split_invariants(text, max_tokens):
+    chunks = corporate.token_budget_split(text, max_tokens)
+    tokenizer = corporate.finbert_tokenizer
+    full_ids = tokenizer(text, add_special_tokens=False)['input_ids']
+
+    assert chunks
+    # Budget: every chunk fits, and the token stream is covered exactly once, in order
+    assert all(0 < len(ids) <= max_tokens for _, ids in chunks)
+    assert [token for _, ids in chunks for token in ids] == full_ids
+
+    # Chunk text is a slice of the input, in order, and carries exactly the chunk's tokens
+    position = 0
+    for chunk_text, ids in chunks:
+        start = text.index(chunk_text, position)
+        assert text[position:start].strip() == ""
+        position = start + len(chunk_text)
+        # A window cut mid-word starts with a ## piece that re-tokenizing cannot reproduce
+        if not tokenizer.convert_ids_to_tokens(ids[0]).startswith("##"):
+            assert tokenizer(chunk_text, add_special_tokens=False)['input_ids'] == ids
+    assert text[position:].strip() == ""
+
+def test_token_budget_split_keeps_sentences_whole_when_they_fit():
+    chunks = corporate.token_budget_split(TRANSCRIPT, 64)
+    sentence_ends = tuple(".?!")
+    assert len(chunks) > 1
+    assert all(chunk_text.rstrip().endswith(sentence_ends) for chunk_text, _ in chunks)
+
+def test_token_budget_split_edge_cases():
+    assert corporate.token_budget_split("") == []
+    assert corporate.token_budget_split("   \n ") == []
+    # Budgets are clamped to [8, DEFAULT_MAX_CHUNK_TOKENS]
+    assert all(len(ids) <= 8 for _, ids in corporate.token_budget_split(LONG_SENTENCE, 1))
+    assert all(len(ids) <= corporate.DEFAULT_MAX_CHUNK_TOKENS
+               for _, ids in corporate.token_budget_split(LONG_SENTENCE * 4, 10 ** 6))
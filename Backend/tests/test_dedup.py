@@ -0,0 +1,39 @@
+import os
+
+import corporate
+
+def test_chunk_with_own_content_is_not_boilerplate():
+    chunks = [
+        "Thank you for taking my question. Margins collapsed badly.",
+        "Thank you for taking my question.",
+        "Revenue grew strongly. Revenue grew strongly!"
+    ]
+
+    unique_chunks, _, assignment, report = corporate.deduplicate_chunks(chunks)
+
+    assert unique_chunks[assignment[0]] == chunks[0]
+    assert unique_chunks[assignment[1]] in corporate.BOILERPLATE_SEED
+    assert report['boilerplate_matches'] == 1
+
+def test_live_traffic_never_writes_the_library():
+    repeated = ["Please note this event is being recorded for replay purposes by the operator."] * 5
+
+    corporate.deduplicate_chunks(repeated)
+
+    assert len(corporate.get_boilerplate_library().entries) == len(corporate.BOILERPLATE_SEED)
+    assert not os.path.exists(corporate.BOILERPLATE_PATH)
+
+def test_curation_learns_clusters_repeated_across_transcripts():
+    disclaimer = "Please note this event is being recorded for replay purposes by the operator."
+    library = corporate.get_boilerplate_library()
+    try:
+        report = corporate.curate_boilerplate_library([disclaimer] * 3 + ["Revenue rose."], min_repeats=3)
+
+        assert report['learned'] == 1
+        assert os.path.exists(corporate.BOILERPLATE_PATH)
+        assert corporate.deduplicate_chunks([disclaimer])[3]['boilerplate_matches'] == 1
+    finally:
+        corporate._boilerplate_library = None
+        if os.path.exists(corporate.BOILERPLATE_PATH):
+            os.remove(corporate.BOILERPLATE_PATH)
+    assert library is not corporate.get_boilerplate_library()
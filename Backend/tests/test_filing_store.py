@@ -0,0 +1,80 @@
+import os
+
+import pytest
+
+import sec_parser
+
+# (accession, period of report, filing date) of the filings EDGAR lists for the ticker
+EDGAR_FILINGS = [
+    ("0000320193-22-000108", "20220924", "20221028"),
+    ("0000320193-23-000106", "20230930", "20231103"),
+    ("0000320193-24-000123", "20240928", "20241101"),
+    ("0000320193-25-000079", "20250927", "20251031"),
+]
+
+def write_submission(root, ticker, form_type, accession, period, filed):
+    directory = os.path.join(root, "sec-edgar-filings", ticker, form_type, accession)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, "full-submission.txt")
+    if not os.path.exists(path):
+        with open(path, "w") as f:
+            f.write(f"<SEC-HEADER>\nACCESSION NUMBER: {accession}\nCONFORMED SUBMISSION TYPE: {form_type}\n"
+                    f"CONFORMED PERIOD OF REPORT: {period}\nFILED AS OF DATE: {filed}\n"
+                    f"CENTRAL INDEX KEY: 0000320193\n</SEC-HEADER>\n")
+    return path
+
+@pytest.fixture
+def edgar(tmp_path, monkeypatch):
+    """A FilingStore in tmp_path and a fake EDGAR that honors the date window like sec-edgar-downloader"""
+    root = str(tmp_path / "sec-edgar")
+    state = {'calls': [], 'offline': False}
+
+    class FakeDownloader:
+        def __init__(self, company, email, download_folder):
+            self.root = download_folder
+
+        def get(self, form_type, ticker, limit=None, after=None, before=None):
+            if state['offline']:
+                raise ConnectionError("EDGAR unreachable")
+            state['calls'].append((ticker, form_type, after, before))
+            window = [filing for filing in EDGAR_FILINGS
+                      if after.replace("-", "") <= filing[2] <= before.replace("-", "")]
+            newest = sorted(window, key=lambda filing: filing[2])[-limit:]
+            for filing in newest:
+                write_submission(self.root, ticker, form_type, *filing)
+            return len(newest)
+
+    monkeypatch.setattr(sec_parser.sec_edgar_downloader, 'Downloader', FakeDownloader)
+    store = sec_parser.FilingStore(root=root, index_path=os.path.join(root, "index.sqlite"))
+    return store, state
+
+def accession_of(path):
+    return os.path.basename(os.path.dirname(path))
+
+def test_disk_only_filing_does_not_answer_other_requests(edgar):
+    store, state = edgar
+    write_submission(store.root, "AAPL", "10-K", *EDGAR_FILINGS[1])
+
+    # Both windows contain the stored FY2023 filing, but EDGAR has newer ones
+    assert accession_of(store.resolve("AAPL", "10-K", 2022)) == "0000320193-23-000106"
+    assert accession_of(store.resolve("AAPL", "10-K", 2024)) == "0000320193-25-000079"
+    assert len(state['calls']) == 2
+
+def test_confirmed_resolution_is_served_without_edgar(edgar):
+    store, state = edgar
+
+    first = store.resolve("AAPL", "10-K", 2022)
+    second = store.resolve("AAPL", "10-K", 2022)
+
+    assert first == second
+    assert len(state['calls']) == 1
+
+def test_offline_falls_back_to_disk_without_recording(edgar):
+    store, state = edgar
+    write_submission(store.root, "AAPL", "10-K", *EDGAR_FILINGS[1])
+    state['offline'] = True
+
+    assert accession_of(store.resolve("AAPL", "10-K", 2023)) == "0000320193-23-000106"
+    assert store.lookup("AAPL", "10-K", 2023) is None
+    with pytest.raises(ConnectionError):
+        store.resolve("AAPL", "10-K", 2020)
@@ -0,0 +1,49 @@
+import corporate
+
+OPTIONS = {'max_tokens': 32, 'use_cache': False}
+
+def run_session(transcript, segment_size=600):
+    opened = corporate.handle_request({'action': 'live_open', 'company': 'Acme', 'ticker': 'ACME', 'options': OPTIONS})
+    session_id = opened['session_id']
+    updates = [
+        corporate.handle_request({'action': 'live_append', 'session_id': session_id, 'text': transcript[i:i + segment_size]})
+        for i in range(0, len(transcript), segment_size)
+    ]
+    return session_id, updates
+
+def test_live_session_lifecycle(transcript):
+    session_id, updates = run_session(transcript[:1800])
+
+    for update in updates:
+        assert 'error' not in update
+        assert update['rescored_chunks'] == len(update['updated_chunks']) >= 1
+        assert -1.0 <= update['overall_sentiment'] <= 1.0
+    assert [update['segments'] for update in updates] == [1, 2, 3]
+
+    result = corporate.handle_request({'action': 'live_close', 'session_id': session_id})
+    assert result['ticker'] == 'ACME'
+    assert result['metadata']['total_chunks'] == updates[-1]['total_chunks']
+    assert result['overall_sentiment'] == updates[-1]['overall_sentiment']
+    assert sum(result['summary']['sentiment_distribution'][label]
+               for label in ('positive', 'negative', 'neutral')) == result['metadata']['total_chunks']
+
+    closed_again = corporate.handle_request({'action': 'live_close', 'session_id': session_id})
+    assert closed_again['type'] == 'live_session_error'
+
+def test_live_session_keeps_only_recent_chunks(transcript, monkeypatch):
+    monkeypatch.setattr(corporate, 'LIVE_KEEP_CHUNKS', 3)
+    session_id, updates = run_session(transcript)
+
+    result = corporate.close_live_session(session_id)
+
+    # Totals cover the whole call; only the open chunk and the last three closed ones are returned
+    assert result['metadata']['total_chunks'] == updates[-1]['total_chunks'] > 4
+    assert result['metadata']['returned_chunks'] == len(result['sentiments']) == 4
+    chunk_ids = [chunk['chunk_id'] for chunk in result['sentiments']]
+    assert chunk_ids == sorted(chunk_ids)
+    assert sum(result['summary']['sentiment_distribution'][label]
+               for label in ('positive', 'negative', 'neutral')) == result['metadata']['total_chunks']
+
+def test_append_to_unknown_session_is_an_error():
+    result = corporate.handle_request({'action': 'live_append', 'session_id': 'missing', 'text': 'Revenue grew.'})
+    assert result['type'] == 'live_session_error'
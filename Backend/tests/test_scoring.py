@@ -0,0 +1,68 @@
+import itertools
+
+import numpy as np
+import pytest
+
+import corporate
+
+LABEL_ORDERS = list(itertools.permutations(('positive', 'negative', 'neutral')))
+
+def assert_same(vectorized, reference, path="result"):
+    """Recursive equality that allows float rounding differences"""
+    if isinstance(reference, dict):
+        assert isinstance(vectorized, dict), path
+        assert vectorized.keys() == reference.keys(), path
+        for key in reference:
+            assert_same(vectorized[key], reference[key], f"{path}.{key}")
+    elif isinstance(reference, (list, tuple)):
+        assert len(vectorized) == len(reference), path
+        for i, (left, right) in enumerate(zip(vectorized, reference)):
+            assert_same(left, right, f"{path}[{i}]")
+    elif isinstance(reference, float):
+        assert vectorized == pytest.approx(reference, rel=1e-9, abs=1e-12), path
+    else:
+        assert vectorized == reference, path
+
+def probability_rows():
+    rng = np.random.RandomState(7)
+    rows = list(rng.dirichlet([1.0, 1.0, 1.0], size=200))
+    rows += list(rng.dirichlet([0.05, 0.05, 0.05], size=50))
+    # Exact ties, one-hot rows and near-neutral rows exercise the decision rules' edges
+    rows += [
+        [1 / 3, 1 / 3, 1 / 3], [1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0],
+        [0.5, 0.5, 0.0], [0.45, 0.1, 0.45], [0.1, 0.45, 0.45], [0.34, 0.33, 0.33],
+        [0.2, 0.2, 0.6], [0.31, 0.05, 0.64], [0.05, 0.31, 0.64]
+    ]
+    return np.array(rows, dtype=np.float64)
+
+@pytest.mark.parametrize("labels", LABEL_ORDERS)
+@pytest.mark.parametrize("diagnostics", [None, frozenset(), frozenset(corporate.CHUNK_DIAGNOSTIC_FIELDS)])
+def test_matrix_scorer_matches_per_chunk_scorer(labels, diagnostics):
+    probabilities = probability_rows()
+
+    vectorized = corporate.analyze_finbert_matrix(probabilities, labels, diagnostics)
+
+    assert len(vectorized) == len(probabilities)
+    for row, result in zip(probabilities, vectorized):
+        reference = corporate.analyze_finbert_results(
+            [{'label': label, 'score': float(score)} for label, score in zip(labels, row)], diagnostics
+        )
+        assert_same(result, reference)
+
+def test_matrix_scorer_handles_empty_input():
+    assert corporate.analyze_finbert_matrix(np.zeros((0, 3))) == []
+
+def test_score_chunk_outputs_is_independent_of_vectorization():
+    probabilities = probability_rows()[:40]
+    labels = ('positive', 'negative', 'neutral')
+    raw_outputs = [corporate.ProbabilityRow(labels, row) for row in probabilities[:20]]
+    raw_outputs += [[{'label': label, 'score': float(score)} for label, score in zip(labels, row)]
+                    for row in probabilities[20:]]
+    raw_outputs.append(RuntimeError("inference failed"))
+    indexed_chunks = [(i, f"chunk {i}") for i in range(len(raw_outputs))]
+
+    vectorized = corporate.score_chunk_outputs(indexed_chunks, raw_outputs, True)
+    reference = corporate.score_chunk_outputs(indexed_chunks, raw_outputs, False)
+
+    assert_same(vectorized, reference)
+    assert 'error' in vectorized[-1]
@@ -0,0 +1,99 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("fastapi")
+from fastapi.testclient import TestClient
+
+import corporate
+import sentiment_service
+
+PIPELINE_ROW = [
+    {'label': 'positive', 'score': 0.8},
+    {'label': 'negative', 'score': 0.1},
+    {'label': 'neutral', 'score': 0.1}
+]
+
+@pytest.fixture
+def service(monkeypatch):
+    """The app with a fresh batcher, request pool and state, and a stub model behind the batcher"""
+    calls = []
+    events = []
+    lock = threading.Lock()
+
+    def fake_infer(chunks, batch_size=0, backend=None, input_ids=None, length_bucketing=True, stats=None):
+        with lock:
+            calls.append(list(chunks))
+            events.append('batch')
+        return [list(PIPELINE_ROW) for _ in chunks]
+
+    def recording_start_inference_pool(*args):
+        events.append('start_pool')
+        return None
+
+    monkeypatch.setattr(corporate, 'infer_finbert_chunks', fake_infer)
+    monkeypatch.setattr(corporate, 'start_inference_pool', recording_start_inference_pool)
+    # Four concurrent single-chunk requests fill one batch long before the deadline
+    monkeypatch.setattr(sentiment_service, 'batcher', sentiment_service.MicroBatcher(max_batch_size=4, max_wait_ms=5000))
+    monkeypatch.setattr(sentiment_service, 'request_executor', ThreadPoolExecutor(max_workers=8))
+    monkeypatch.setattr(sentiment_service, 'service_state', {'requests': {}, 'in_flight': 0, 'model_error': None})
+
+    with TestClient(sentiment_service.app) as client:
+        yield client, calls, events
+
+def test_concurrent_requests_share_one_batch(service):
+    client, calls, events = service
+    texts = [f"Revenue grew strongly in region {i}." for i in range(4)]
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        responses = list(pool.map(
+            lambda text: client.post('/analyze', json={'text': text, 'options': {'use_cache': False}}), texts
+        ))
+
+    assert [response.status_code for response in responses] == [200] * 4
+    for response in responses:
+        result = response.json()
+        assert 'error' not in result
+        assert len(result['sentiments']) == 1
+        assert result['sentiments'][0]['label'] == 'positive'
+
+    assert len(calls) == 1
+    # The pool is forked at startup, never lazily from a batch thread
+    assert events == ['start_pool', 'batch']
+    assert sorted(calls[0]) == sorted(texts)
+
+    metrics = client.get('/metrics').json()
+    assert metrics['batcher']['batches'] == 1
+    assert metrics['batcher']['chunks'] == 4
+    assert metrics['batcher']['avg_batch_size'] == 4.0
+    assert metrics['batcher']['flush_reasons'] == {'full': 1, 'deadline': 0}
+    assert metrics['batcher']['batch_size_histogram'] == {'4': 1}
+    assert metrics['batcher']['queue_depth'] == 0
+    assert metrics['requests'] == {'analyze': 4}
+    assert metrics['in_flight_requests'] == 0
+
+def test_health_reports_model_state(service):
+    client, _, _ = service
+
+    health = client.get('/health').json()
+    assert health == {'status': 'ok', 'model_error': None, 'pid': os.getpid()}
+
+    sentiment_service.service_state['model_error'] = 'FinBERT initialization failed'
+    health = client.get('/health').json()
+    assert health['status'] == 'degraded'
+    assert health['model_error'] == 'FinBERT initialization failed'
+
+def test_pool_is_never_forked_lazily_from_a_helper_thread(monkeypatch):
+    def unexpected_fork(*args, **kwargs):
+        raise AssertionError("inference pool forked from a helper thread")
+
+    monkeypatch.setattr(corporate, 'INFERENCE_PROCESSES', 2)
+    monkeypatch.setattr(corporate, '_inference_pool', None)
+    monkeypatch.setattr(corporate, '_inference_pool_sealed', False)
+    monkeypatch.setattr(corporate, 'InferenceProcessPool', unexpected_fork)
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        assert pool.submit(corporate.get_inference_pool, 'pytorch').result() is None
+    assert corporate._inference_pool_sealed is False
@@ -0,0 +1,42 @@
+import io
+import json
+
+import pytest
+
+import corporate
+
+OPTIONS = {'max_tokens': 32, 'use_cache': False}
+
+def test_streaming_matches_analyze(transcript):
+    events = list(corporate.stream_sentiment(transcript, OPTIONS))
+    chunks = [event['sentiment'] for event in events if event['event'] == 'chunk']
+    summary = events[-1]
+
+    assert summary['event'] == 'summary'
+    assert [event['event'] for event in events[:-1]] == ['chunk'] * len(chunks)
+
+    expected = corporate.analyze_sentiment(transcript, OPTIONS)
+    assert [chunk['chunk_id'] for chunk in chunks] == [chunk['chunk_id'] for chunk in expected['sentiments']]
+    assert summary['result']['metadata']['total_chunks'] == len(chunks)
+    assert summary['result']['overall_sentiment'] == pytest.approx(expected['overall_sentiment'], abs=1e-3)
+
+def test_streaming_reports_empty_text_in_summary():
+    assert list(corporate.stream_sentiment("   ", OPTIONS)) == [
+        {"event": "summary", "result": {"error": "Empty text provided"}}
+    ]
+
+def test_worker_streams_chunk_events_before_result(transcript):
+    requests = [
+        {'id': 1, 'action': 'ping'},
+        {'id': 2, 'action': 'analyze', 'text': transcript[:600], 'options': {**OPTIONS, 'stream': True}}
+    ]
+    output = io.StringIO()
+
+    corporate.run_worker(io.StringIO("".join(json.dumps(request) + "\n" for request in requests)), output)
+
+    messages = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert messages[0]['event'] == 'ready' and messages[0]['error'] is None
+    streamed = [message for message in messages if message.get('id') == 2]
+    assert len(streamed) > 1
+    assert all(message['event'] == 'chunk' for message in streamed[:-1])
+    assert streamed[-1]['result']['metadata']['total_chunks'] == len(streamed) - 1